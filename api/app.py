@@ -1,97 +1,370 @@
 from http.server import BaseHTTPRequestHandler, HTTPServer
+from concurrent.futures import ThreadPoolExecutor
+import argparse
 import json
+import math
 import re
-import base64
 import sys
+import threading
+import time
 from pathlib import Path
 from urllib.parse import parse_qs, urlparse
 
 # Add database to path
 sys.path.append(str(Path(__file__).parent.parent / 'database'))
 
-from db_config import get_session
-from models import Transaction, User, TransactionCategory, TransactionFee, FeeType, SystemLog
+from sqlalchemy import Numeric, inspect
+from sqlalchemy.orm.attributes import set_committed_value
+
+from db_config import get_session, ensure_schema, write_lock
+from reference_data import reference_data, DEFAULT_CATEGORY_CODE
+from models import Transaction, TransactionFee
 from datetime import datetime
+from pagination import paginate, parse_limit
+from fieldsets import ALL_FIELDS, load_options, parse_fields, serialize
+from bulk import insert_transactions, delete_transactions
+from summary import parse_group_by, summary_query, summarize
+from filters import apply_filters
+from search import search_matches
+from auth import authenticate_request
+from response_cache import response_cache, cache_key, etag_matches
+from compression import GZIP_MIN_BYTES, accepts_gzip, gzip_body, gzip_stream
+from metrics import request_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+
+# Rows fetched from the database per batch when streaming a listing
+STREAM_BATCH_SIZE = 500
+
+# Response bytes collected before each write (one HTTP chunk) when streaming
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Fields every new transaction must have
+REQUIRED_FIELDS = ['external_ref', 'amount', 'raw_data', 'transaction_date']
+
+# Most items accepted by one POST or DELETE /transactions/batch
+MAX_BATCH_ITEMS = 5000
+
+# Type of each batch item field besides transaction_date, and whether it
+# may be null; checked per item so one bad item cannot fail the INSERT
+BATCH_ITEM_FIELDS = {
+    'external_ref': (str, False),
+    'amount': (float, False),
+    'raw_data': (str, False),
+    'currency': (str, False),
+    'transaction_status': (str, False),
+    'sender_notes': (str, True),
+    'counter_party': (str, True),
+    'category_code': (str, False),
+    'fee_amount': (float, False),
+}
+
+# Seconds a connection may sit idle mid-request (e.g. partway through
+# sending its body) before the server gives up on it
+REQUEST_TIMEOUT = 30
+
+def batch_item_rows(item, refs, now):
+    """
+    Validate one POST /transactions/batch item and build its Transactions
+    row and Transaction_fees row (None without fee_amount) for
+    bulk.insert_transactions. Raises ValueError for an invalid item.
+    """
+    if not isinstance(item, dict):
+        raise ValueError('Item must be a JSON object')
+    missing_fields = [f for f in REQUIRED_FIELDS if f not in item]
+    if missing_fields:
+        raise ValueError(f'Missing required fields: {", ".join(missing_fields)}')
+    
+    for field, (field_type, nullable) in BATCH_ITEM_FIELDS.items():
+        if field not in item:
+            continue
+        value = item[field]
+        if value is None:
+            if not nullable:
+                raise ValueError(f'{field} must not be null')
+        elif field_type is float:
+            # JSON numbers beyond a double (1e400) and NaN/Infinity
+            # parse, but cannot be stored
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f'{field} must be a number')
+            try:
+                finite = math.isfinite(value)
+            except OverflowError:
+                finite = False
+            if not finite:
+                raise ValueError(f'{field} must be a finite number')
+        elif not isinstance(value, field_type):
+            raise ValueError(f'{field} must be a string')
+    try:
+        trans_date = datetime.fromisoformat(item['transaction_date'])
+    except (TypeError, ValueError):
+        raise ValueError('transaction_date must be an ISO 8601 date and time')
+    
+    category = refs.category(item.get('category_code', DEFAULT_CATEGORY_CODE))
+    transaction_row = {
+        'external_ref': item['external_ref'],
+        'amount': item['amount'],
+        'currency': item.get('currency', 'RWF'),
+        'transaction_status': item.get('transaction_status', 'COMPLETED'),
+        'sender_notes': item.get('sender_notes'),
+        'raw_data': item['raw_data'],
+        'transaction_date': trans_date,
+        'counter_party': item.get('counter_party'),
+        'created_at': now,
+        'category_id': category.category_id,
+        'user_id': refs.default_user.user_id,
+    }
+    fee_row = None
+    if 'fee_amount' in item and refs.transaction_fee_type:
+        fee_row = {
+            'transaction_fee_amount': item['fee_amount'],
+            'created_at': now,
+            'fee_type_id': refs.transaction_fee_type.fee_type_id,
+        }
+    return transaction_row, fee_row
+
+def load_stored_numbers(instance, dialect):
+    """
+    Replace a just-committed object's Numeric attributes with the values
+    reading the row back would give, e.g. an amount of 12.345 becomes
+    12.35 in a Numeric(15, 2) column, without querying the database
+    """
+    for attribute in inspect(instance).mapper.column_attrs:
+        column_type = attribute.columns[0].type
+        if not isinstance(column_type, Numeric):
+            continue
+        value = getattr(instance, attribute.key)
+        if value is None:
+            continue
+        to_database = column_type.bind_processor(dialect)
+        from_database = column_type.result_processor(dialect, None)
+        if to_database:
+            value = to_database(value)
+        if from_database:
+            value = from_database(value)
+        set_committed_value(instance, attribute.key, value)
 
 class TransactionHandler(BaseHTTPRequestHandler):
     
-    def _set_headers(self, status=200):
-        """Set response headers"""
+    # HTTP/1.1 responses, so streamed listings can be chunked; every
+    # other response carries a Content-Length
+    protocol_version = 'HTTP/1.1'
+    
+    # Whether connections stay open between requests. The thread-pool
+    # server answers one request per connection (Connection: close), so
+    # an idle keep-alive client never holds one of its workers;
+    # async_server keeps them open on its event loop instead
+    keep_alive = False
+    
+    # Socket timeout, so a stalled client cannot hold a worker forever
+    timeout = REQUEST_TIMEOUT
+    
+    # RequestTimer of the request being handled (see metrics.py)
+    _metrics = None
+    
+    def handle_one_request(self):
+        """Handle one request, then record its metrics"""
+        self._metrics = None
+        try:
+            super().handle_one_request()
+        finally:
+            if self._metrics is not None:
+                request_metrics.finish(self._metrics)
+                self._metrics = None
+    
+    def parse_request(self):
+        """Parse the request line and headers; timing starts once they are read"""
+        parsed = super().parse_request()
+        if parsed:
+            self._metrics = request_metrics.start(self.command, self.path)
+        return parsed
+    
+    def send_response(self, code, message=None):
+        if self._metrics is not None:
+            self._metrics.status = code
+        super().send_response(code, message)
+        if not self.keep_alive:
+            self.send_header('Connection', 'close')
+    
+    def flush_headers(self):
+        if self._metrics is not None and hasattr(self, '_headers_buffer'):
+            self._metrics.bytes_written += sum(map(len, self._headers_buffer))
+        super().flush_headers()
+    
+    def _set_headers(self, status=200, content_length=0, headers=(), content_type='application/json'):
+        """Set response headers; content_length=None leaves it out"""
         self.send_response(status)
-        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Type', content_type)
+        if content_length is not None:
+            self.send_header('Content-Length', str(content_length))
+        for name, value in headers:
+            self.send_header(name, value)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
         self.end_headers()
     
     def _authenticate(self):
-        """Verify Basic Authentication"""
-        auth_header = self.headers.get('Authorization')
+        """Verify Basic Authentication (cached, see auth.verify_credentials)"""
+        return authenticate_request(self.headers)
+    
+    def _indent(self):
+        """JSON indent for success responses: compact unless ?pretty=1"""
+        query_params = parse_qs(urlparse(self.path).query)
+        return 2 if query_params.get('pretty', ['0'])[0] == '1' else None
+    
+    def _accepts_gzip(self):
+        return accepts_gzip(self.headers.get('Accept-Encoding'))
+    
+    def _send_json(self, status, payload, indent=None):
+        """
+        Send a JSON response, compact unless indent is given. Every
+        response carries a Content-Length, so a keep-alive connection
+        knows where the next one starts.
+        """
+        body = self._encode_json(payload, indent)
+        headers = [('Vary', 'Accept-Encoding')]
+        if len(body) >= GZIP_MIN_BYTES and self._accepts_gzip():
+            body = gzip_body(body)
+            headers.append(('Content-Encoding', 'gzip'))
+        self._set_headers(status, len(body), headers)
+        self._write_body(body)
+    
+    def _encode_json(self, payload, indent=None):
+        """JSON body bytes, compact unless indent is given (timed as serialization)"""
+        start = time.perf_counter()
+        separators = None if indent else (',', ':')
+        body = json.dumps(payload, indent=indent, separators=separators).encode()
+        if self._metrics is not None:
+            self._metrics.serialization_seconds += time.perf_counter() - start
+        return body
+    
+    def _write_body(self, body):
+        """Write response body bytes"""
+        if self._metrics is not None:
+            self._metrics.bytes_written += len(body)
+        self.wfile.write(body)
+    
+    def _send_cacheable(self, payload, key, generation, transaction_id=None):
+        """Send a 200 JSON response and keep it in the response cache"""
+        body = self._encode_json(payload, self._indent())
+        entry = response_cache.store(key, body, generation, transaction_id)
+        self._send_cached(entry)
+    
+    def _send_cached(self, entry):
+        """
+        Send a cached body with its ETag, or just 304 Not Modified when
+        the client's If-None-Match already names it. The gzip encoding
+        has its own ETag, as a different representation of the body.
+        """
+        body, etag = entry.body, entry.etag
+        headers = [('Cache-Control', 'no-cache'), ('Vary', 'Accept-Encoding')]
+        if len(body) >= GZIP_MIN_BYTES and self._accepts_gzip():
+            body, etag = entry.gzipped()
+            headers.append(('Content-Encoding', 'gzip'))
+        headers.append(('ETag', etag))
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            self._set_headers(304, None, headers)
+            return
+        self._set_headers(200, len(body), headers)
+        self._write_body(body)
+    
+    def _send_json_stream(self, status, fragments):
+        """
+        Send a JSON body produced piece by piece, without knowing its
+        length. HTTP/1.1 clients get chunked transfer encoding; for
+        HTTP/1.0 clients, which cannot read it, the body ends when the
+        connection is closed. Fragments are written in STREAM_CHUNK_BYTES
+        pieces, gzip-compressed one by one if the client accepts it.
+        """
+        headers = [('Vary', 'Accept-Encoding')]
+        chunked = self.request_version == 'HTTP/1.1'
+        if chunked:
+            headers.append(('Transfer-Encoding', 'chunked'))
+        else:
+            self.close_connection = True
+            if self.keep_alive:
+                headers.append(('Connection', 'close'))
+        
+        def pieces():
+            buffer = bytearray()
+            for fragment in fragments:
+                buffer += fragment
+                if len(buffer) >= STREAM_CHUNK_BYTES:
+                    yield bytes(buffer)
+                    buffer.clear()
+            if buffer:
+                yield bytes(buffer)
         
-        if not auth_header or not auth_header.startswith('Basic '):
-            return False
+        chunks = pieces()
+        if self._accepts_gzip():
+            chunks = gzip_stream(chunks)
+            headers.append(('Content-Encoding', 'gzip'))
+        self._set_headers(status, None, headers)
         
         try:
-            # Decode Base64 credentials
-            encoded = auth_header.split(' ')[1]
-            decoded = base64.b64decode(encoded).decode('utf-8')
-            username, password = decoded.split(':', 1)
-            
-            # Query database for user
-            session = get_session()
-            try:
-                user = session.query(User).filter_by(username=username).first()
-                if user and user.password_text == password:
-                    return True
-            finally:
-                session.close()
-            
-            return False
-            
+            for data in chunks:
+                if not data:
+                    continue
+                if chunked:
+                    data = b'%x\r\n%s\r\n' % (len(data), data)
+                self._write_body(data)
+            if chunked:
+                self._write_body(b'0\r\n\r\n')
         except Exception as e:
-            print(f"Auth error: {e}")
-            return False
+            # The status line is already sent: cut the response short so
+            # the client sees an incomplete body rather than a valid one
+            self.close_connection = True
+            self.log_error("Streaming response aborted: %s", e)
+    
+    def _stream_transactions(self, query, fields=ALL_FIELDS):
+        """
+        JSON fragments of a listing, read from the database in batches of
+        STREAM_BATCH_SIZE. The count comes last since it is only known
+        at the end.
+        """
+        dumps = json.JSONEncoder(separators=(',', ':')).encode
+        yield b'{"success":true,"data":['
+        count = 0
+        for transaction in query.yield_per(STREAM_BATCH_SIZE):
+            if count:
+                yield b','
+            start = time.perf_counter()
+            fragment = dumps(serialize(transaction, fields)).encode()
+            if self._metrics is not None:
+                self._metrics.serialization_seconds += time.perf_counter() - start
+            yield fragment
+            count += 1
+        yield b'],"count":%d}' % count
     
     def _send_unauthorized(self):
         """Send 401 Unauthorized response"""
+        body = json.dumps({
+            'error': 'Unauthorized',
+            'message': 'Valid credentials required'
+        }).encode()
         self.send_response(401)
         self.send_header('WWW-Authenticate', 'Basic realm="MoMo SMS API"')
         self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        self.wfile.write(json.dumps({
-            'error': 'Unauthorized',
-            'message': 'Valid credentials required'
-        }).encode())
-    
-    def _transaction_to_dict(self, transaction):
-        """Convert SQLAlchemy Transaction model to dictionary"""
-        return {
-            'transaction_id': transaction.transaction_id,
-            'external_ref': transaction.external_ref,
-            'amount': float(transaction.amount),
-            'currency': transaction.currency,
-            'transaction_status': transaction.transaction_status,
-            'sender_notes': transaction.sender_notes,
-            'transaction_date': transaction.transaction_date.isoformat() if transaction.transaction_date else None,
-            'counter_party': transaction.counter_party,
-            'created_at': transaction.created_at.isoformat() if transaction.created_at else None,
-            'category': {
-                'category_id': transaction.category.category_id,
-                'category_name': transaction.category.category_name,
-                'category_code': transaction.category.category_code
-            } if transaction.category else None,
-            'user': {
-                'user_id': transaction.user.user_id,
-                'full_name': transaction.user.full_name,
-                'phone_number': transaction.user.phone_number
-            } if transaction.user else None,
-            'fees': [
-                {
-                    'fee_type': fee.fee_type.fee_name,
-                    'amount': float(fee.transaction_fee_amount)
-                } for fee in transaction.fees
-            ] if transaction.fees else []
-        }
+        self._write_body(body)
+    
+    def _load_transaction(self, session, transaction_id, fields=ALL_FIELDS):
+        """
+        Fetch one transaction with everything _transaction_to_dict reads
+        for these fields, relations included, and nothing else
+        """
+        return session.get(
+            Transaction, transaction_id,
+            options=load_options(fields), populate_existing=True
+        )
+    
+    def _transaction_to_dict(self, transaction, fields=ALL_FIELDS):
+        """Convert SQLAlchemy Transaction model to dictionary of the given fields"""
+        start = time.perf_counter()
+        result = serialize(transaction, fields)
+        if self._metrics is not None:
+            self._metrics.serialization_seconds += time.perf_counter() - start
+        return result
     
     def do_OPTIONS(self):
         """Handle preflight requests"""
@@ -104,6 +377,21 @@ class TransactionHandler(BaseHTTPRequestHandler):
             self._send_unauthorized()
             return
         
+        # GET /metrics - Request metrics, Prometheus text format
+        if urlparse(self.path).path == '/metrics':
+            body = request_metrics.render().encode()
+            self._set_headers(200, len(body), content_type=METRICS_CONTENT_TYPE)
+            self._write_body(body)
+            return
+        
+        # Answer repeated polls from the response cache
+        key = cache_key(self.path)
+        cached = response_cache.lookup(key)
+        if cached:
+            self._send_cached(cached)
+            return
+        generation = response_cache.generation
+        
         session = get_session()
         
         try:
@@ -113,70 +401,334 @@ class TransactionHandler(BaseHTTPRequestHandler):
                 parsed_url = urlparse(self.path)
                 query_params = parse_qs(parsed_url.query)
                 
-                # Build query
-                query = session.query(Transaction)
-                
-                # Apply filters
-                if 'status' in query_params:
-                    status = query_params['status'][0]
-                    query = query.filter(Transaction.transaction_status == status)
+                # Sparse fieldset (?fields=) and filters
+                try:
+                    fields = parse_fields(query_params)
+                    query = session.query(Transaction).options(*load_options(fields))
+                    query = apply_filters(query, query_params)
+                except ValueError as e:
+                    self._send_json(400, {
+                        'error': 'Bad Request',
+                        'message': str(e)
+                    })
+                    return
                 
-                if 'category' in query_params:
-                    category_code = query_params['category'][0]
-                    query = query.join(TransactionCategory).filter(
-                        TransactionCategory.category_code == category_code
+                # Full-text search (?q=): best matches first, one page
+                if 'q' in query_params:
+                    try:
+                        if 'cursor' in query_params:
+                            raise ValueError('cursor cannot be combined with q')
+                        if query_params.get('stream', ['0'])[0] == '1':
+                            raise ValueError('stream cannot be combined with q')
+                        limit = parse_limit(query_params)
+                        matches = search_matches(query_params['q'][0])
+                    except ValueError as e:
+                        self._send_json(400, {
+                            'error': 'Bad Request',
+                            'message': str(e)
+                        })
+                        return
+                    transactions = (
+                        query.join(matches, matches.c.transaction_id == Transaction.transaction_id)
+                        .order_by(matches.c.rank, Transaction.transaction_id.desc())
+                        .limit(limit)
+                        .all()
                     )
+                    self._send_cacheable({
+                        'success': True,
+                        'count': len(transactions),
+                        'limit': limit,
+                        'data': [self._transaction_to_dict(t, fields) for t in transactions]
+                    }, key, generation)
+                    return
                 
-                # Execute query
-                transactions = query.all()
+                # Keyset pagination when limit or cursor is given,
+                # otherwise the whole (filtered) table as before
+                paginated = 'limit' in query_params or 'cursor' in query_params
+                if not paginated and query_params.get('stream', ['0'])[0] == '1':
+                    self._send_json_stream(200, self._stream_transactions(query, fields))
+                    return
+                if paginated:
+                    try:
+                        limit = parse_limit(query_params)
+                        cursor = query_params['cursor'][0] if 'cursor' in query_params else None
+                        transactions, next_cursor = paginate(query, limit, cursor)
+                    except ValueError as e:
+                        self._send_json(400, {
+                            'error': 'Bad Request',
+                            'message': str(e)
+                        })
+                        return
+                else:
+                    # Execute query
+                    transactions = query.all()
                 
                 result = {
                     'success': True,
                     'count': len(transactions),
-                    'data': [self._transaction_to_dict(t) for t in transactions]
+                    'data': [self._transaction_to_dict(t, fields) for t in transactions]
                 }
+                if paginated:
+                    result['limit'] = limit
+                    result['next_cursor'] = next_cursor
                 
-                self._set_headers(200)
-                self.wfile.write(json.dumps(result, indent=2).encode())
+                self._send_cacheable(result, key, generation)
+            
+            # GET /transactions/summary - Totals grouped in SQL
+            elif urlparse(self.path).path == '/transactions/summary':
+                query_params = parse_qs(urlparse(self.path).query)
+                try:
+                    group_by = parse_group_by(query_params)
+                    # Same filters as the listing
+                    query = apply_filters(summary_query(session, group_by), query_params)
+                except ValueError as e:
+                    self._send_json(400, {
+                        'error': 'Bad Request',
+                        'message': str(e)
+                    })
+                    return
+                
+                groups, totals = summarize(query, group_by)
+                result = {
+                    'success': True,
+                    'group_by': list(group_by),
+                    'count': len(groups),
+                    'totals': totals,
+                    'data': groups
+                }
+                
+                self._send_cacheable(result, key, generation)
             
             # GET /transactions/{id} - Get single transaction
-            elif re.match(r'^/transactions/\d+$', self.path):
-                transaction_id = int(self.path.split('/')[-1])
-                transaction = session.query(Transaction).get(transaction_id)
+            elif re.match(r'^/transactions/\d+$', urlparse(self.path).path):
+                transaction_id = int(urlparse(self.path).path.split('/')[-1])
+                
+                # Sparse fieldset (?fields=)
+                try:
+                    fields = parse_fields(parse_qs(urlparse(self.path).query))
+                except ValueError as e:
+                    self._send_json(400, {
+                        'error': 'Bad Request',
+                        'message': str(e)
+                    })
+                    return
+                
+                transaction = self._load_transaction(session, transaction_id, fields)
                 
                 if not transaction:
-                    self._set_headers(404)
-                    self.wfile.write(json.dumps({
+                    self._send_json(404, {
                         'error': 'Not Found',
                         'message': f'Transaction {transaction_id} not found'
-                    }).encode())
+                    })
                     return
                 
                 result = {
                     'success': True,
-                    'data': self._transaction_to_dict(transaction)
+                    'data': self._transaction_to_dict(transaction, fields)
                 }
                 
-                self._set_headers(200)
-                self.wfile.write(json.dumps(result, indent=2).encode())
+                self._send_cacheable(result, key, generation, transaction_id)
             
             else:
-                self._set_headers(404)
-                self.wfile.write(json.dumps({
+                self._send_json(404, {
                     'error': 'Not Found',
                     'message': 'Endpoint not found'
-                }).encode())
+                })
         
         except Exception as e:
-            self._set_headers(500)
-            self.wfile.write(json.dumps({
+            self._send_json(500, {
                 'error': 'Internal Server Error',
                 'message': str(e)
-            }).encode())
+            })
         
         finally:
             session.close()
     
+    def _read_body(self):
+        """
+        The request body as bytes
+
+        Raises:
+            ValueError: for a missing body or a Content-Length that is not
+                a non-negative integer (the connection is then closed,
+                as the body's end is unknown)
+        """
+        value = self.headers.get('Content-Length', '0').strip()
+        if not (value.isascii() and value.isdigit()):
+            self.close_connection = True
+            raise ValueError('Content-Length must be a non-negative integer')
+        content_length = int(value)
+        if content_length == 0:
+            raise ValueError('Request body required')
+        return self.rfile.read(content_length)
+    
+    def _read_object(self):
+        """
+        The JSON object body of a POST or PUT, or None after answering
+        400 for a missing or malformed one. Called before taking
+        write_lock, so a client slow to send its body holds up no writer
+        """
+        try:
+            data = json.loads(self._read_body().decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            message = 'Invalid JSON in request body'
+        except ValueError as e:
+            message = str(e)
+        else:
+            if isinstance(data, dict):
+                return data
+            message = 'Request body must be a JSON object'
+        self._send_json(400, {
+            'error': 'Bad Request',
+            'message': message
+        })
+        return None
+    
+    def _read_batch(self):
+        """
+        The JSON array body of a batch request, or None after answering
+        400 for a missing, malformed or oversized one
+        """
+        message = None
+        try:
+            items = json.loads(self._read_body().decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            message = 'Invalid JSON in request body'
+        except ValueError as e:
+            message = str(e)
+        else:
+            if not isinstance(items, list) or not items:
+                message = 'Request body must be a non-empty JSON array'
+            elif len(items) > MAX_BATCH_ITEMS:
+                message = f'At most {MAX_BATCH_ITEMS} items per batch'
+        if message:
+            self._send_json(400, {
+                'error': 'Bad Request',
+                'message': message
+            })
+            return None
+        return items
+    
+    def _send_batch_results(self, success_status, results):
+        """
+        Send per-item results: success_status when every item succeeded,
+        207 Multi-Status when some did, and the items' own status (or
+        400) when none did
+        """
+        failed = [result['status'] for result in results if result['status'] >= 400]
+        if not failed:
+            status = success_status
+        elif len(failed) < len(results):
+            status = 207
+        else:
+            status = failed[0] if len(set(failed)) == 1 else 400
+        self._send_json(status, {
+            'success': not failed,
+            'succeeded': len(results) - len(failed),
+            'failed': len(failed),
+            'results': results
+        }, indent=self._indent())
+    
+    def _create_batch(self):
+        """
+        POST /transactions/batch - Create every valid item of a JSON array
+        in one transaction with executemany INSERTs; invalid items are
+        reported and skipped
+        """
+        items = self._read_batch()
+        if items is None:
+            return
+        
+        refs = reference_data.get()
+        if refs.default_user is None or not refs.categories:
+            self._send_json(500, {
+                'error': 'Internal Server Error',
+                'message': 'Reference data missing. Run database/init_db.py first'
+            })
+            return
+        
+        now = datetime.now()
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, batch_item_rows(item, refs, now)))
+            except ValueError as e:
+                results[index] = {'index': index, 'status': 400, 'error': str(e)}
+        
+        if valid:
+            # Serialize writers (see db_config.write_lock)
+            error = None
+            with write_lock:
+                session = get_session()
+                try:
+                    transaction_ids = insert_transactions(
+                        session,
+                        [transaction_row for _, (transaction_row, _) in valid],
+                        [fee_row for _, (_, fee_row) in valid]
+                    )
+                    session.commit()
+                except Exception as e:
+                    session.rollback()
+                    error = str(e)
+                finally:
+                    session.close()
+            if error is not None:
+                self._send_json(500, {
+                    'error': 'Internal Server Error',
+                    'message': error
+                })
+                return
+            response_cache.invalidate()
+            for (index, _), transaction_id in zip(valid, transaction_ids):
+                results[index] = {'index': index, 'status': 201, 'transaction_id': transaction_id}
+        
+        self._send_batch_results(201, results)
+    
+    def _delete_batch(self):
+        """
+        DELETE /transactions/batch - Delete the transactions whose ids
+        are given as a JSON array, in one transaction
+        """
+        items = self._read_batch()
+        if items is None:
+            return
+        
+        ids = [item for item in items if isinstance(item, int) and not isinstance(item, bool)]
+        deleted = set()
+        if ids:
+            # Serialize writers (see db_config.write_lock)
+            error = None
+            with write_lock:
+                session = get_session()
+                try:
+                    deleted = delete_transactions(session, ids)
+                    session.commit()
+                except Exception as e:
+                    session.rollback()
+                    error = str(e)
+                finally:
+                    session.close()
+            if error is not None:
+                self._send_json(500, {
+                    'error': 'Internal Server Error',
+                    'message': error
+                })
+                return
+            response_cache.invalidate(*deleted)
+        
+        results = []
+        for index, item in enumerate(items):
+            if isinstance(item, bool) or not isinstance(item, int):
+                results.append({'index': index, 'status': 400, 'error': 'Item must be a transaction id'})
+            elif item in deleted:
+                results.append({'index': index, 'status': 200, 'transaction_id': item})
+            else:
+                results.append({'index': index, 'status': 404, 'transaction_id': item,
+                                'error': f'Transaction {item} not found'})
+        
+        self._send_batch_results(200, results)
+    
     def do_POST(self):
         """Handle POST requests - Create new transaction"""
         # Check authentication
@@ -184,50 +736,48 @@ class TransactionHandler(BaseHTTPRequestHandler):
             self._send_unauthorized()
             return
         
-        session = get_session()
+        if urlparse(self.path).path == '/transactions/batch':
+            self._create_batch()
+            return
+        
+        # Read request body
+        data = self._read_object()
+        if data is None:
+            return
+        
+        # Validate required fields
+        missing_fields = [f for f in REQUIRED_FIELDS if f not in data]
+        if missing_fields:
+            self._send_json(400, {
+                'error': 'Bad Request',
+                'message': f'Missing required fields: {", ".join(missing_fields)}'
+            })
+            return
+        
+        # Serialize writers (see db_config.write_lock); the lock covers
+        # the session work only, the response is sent after releasing it
+        write_lock.acquire()
+        session = get_session(expire_on_commit=False)
         
         try:
-            # Read request body
-            content_length = int(self.headers.get('Content-Length', 0))
-            if content_length == 0:
-                self._set_headers(400)
-                self.wfile.write(json.dumps({
-                    'error': 'Bad Request',
-                    'message': 'Request body required'
-                }).encode())
-                return
-            
-            raw_body = self.rfile.read(content_length)
-            data = json.loads(raw_body.decode('utf-8'))
-            
-            # Validate required fields
-            required_fields = ['external_ref', 'amount', 'raw_data', 'transaction_date']
-            missing_fields = [f for f in required_fields if f not in data]
-            if missing_fields:
-                self._set_headers(400)
-                self.wfile.write(json.dumps({
-                    'error': 'Bad Request',
-                    'message': f'Missing required fields: {", ".join(missing_fields)}'
-                }).encode())
-                return
-            
-            # Get default user
-            default_user = session.query(User).first()
-            
-            # Get category (default to TRANSFER if not specified)
-            category_code = data.get('category_code', 'TRANSFER')
-            category = session.query(TransactionCategory).filter_by(
-                category_code=category_code
-            ).first()
-            
-            if not category:
-                category = session.query(TransactionCategory).filter_by(
-                    category_code='TRANSFER'
-                ).first()
+            # Reference rows come from the shared cache; merge(load=False)
+            # attaches them to this session without a query
+            refs = reference_data.get()
+            category = refs.category(data.get('category_code', DEFAULT_CATEGORY_CODE))
             
             # Parse transaction date
             trans_date = datetime.fromisoformat(data['transaction_date'])
             
+            # Add fee if specified
+            fees = []
+            fee_type = refs.transaction_fee_type
+            if 'fee_amount' in data and fee_type:
+                fees.append(TransactionFee(
+                    transaction_fee_amount=data['fee_amount'],
+                    created_at=datetime.now(),
+                    fee_type=session.merge(fee_type, load=False)
+                ))
+            
             # Create transaction
             transaction = Transaction(
                 external_ref=data['external_ref'],
@@ -239,55 +789,39 @@ class TransactionHandler(BaseHTTPRequestHandler):
                 transaction_date=trans_date,
                 counter_party=data.get('counter_party'),
                 created_at=datetime.now(),
-                category_id=category.category_id,
-                user_id=default_user.user_id
+                category=session.merge(category, load=False),
+                user=session.merge(refs.default_user, load=False),
+                fees=fees
             )
             
+            # One INSERT per row, then the commit; the session does not
+            # expire on commit, so the response is built from the
+            # objects already in memory, with amounts rounded as stored
             session.add(transaction)
-            session.flush()
-            
-            # Add fee if specified
-            if 'fee_amount' in data:
-                fee_type = session.query(FeeType).filter_by(
-                    fee_name='Transaction Fee'
-                ).first()
-                
-                if fee_type:
-                    fee = TransactionFee(
-                        transaction_fee_amount=data['fee_amount'],
-                        created_at=datetime.now(),
-                        transaction_id=transaction.transaction_id,
-                        fee_type_id=fee_type.fee_type_id
-                    )
-                    session.add(fee)
-            
             session.commit()
+            response_cache.invalidate()
+            dialect = session.get_bind().dialect
+            for stored in (transaction, *fees):
+                load_stored_numbers(stored, dialect)
             
-            result = {
+            status, result = 201, {
                 'success': True,
                 'message': 'Transaction created successfully',
                 'data': self._transaction_to_dict(transaction)
             }
-            self._set_headers(201)
-            self.wfile.write(json.dumps(result, indent=2).encode())
-
-        except json.JSONDecodeError:    
-            self._set_headers(400)
-            self.wfile.write(json.dumps({
-                'error': 'Bad Request',
-                'message': 'Invalid JSON in request body'
-            }).encode())
     
         except Exception as e:
             session.rollback()
-            self._set_headers(500)
-            self.wfile.write(json.dumps({
+            status, result = 500, {
                 'error': 'Internal Server Error',
                 'message': str(e)
-            }).encode())
+            }
         
         finally:
             session.close()
+            write_lock.release()
+        
+        self._send_json(status, result, indent=self._indent() if status < 400 else None)
 
     def do_PUT(self):
         """Handle PUT requests - Update transaction"""
@@ -298,17 +832,25 @@ class TransactionHandler(BaseHTTPRequestHandler):
         
         # Extract transaction ID from URL
         pattern = r'^/transactions/(\d+)$'
-        match = re.match(pattern, self.path)
+        match = re.match(pattern, urlparse(self.path).path)
         
         if not match:
-            self._set_headers(400)
-            self.wfile.write(json.dumps({
+            self._send_json(400, {
                 'error': 'Bad Request',
                 'message': 'Invalid endpoint format. Use /transactions/{id}'
-            }).encode())
+            })
             return
         
         transaction_id = int(match.group(1))
+        
+        # Read request body
+        update_data = self._read_object()
+        if update_data is None:
+            return
+        
+        # Serialize writers (see db_config.write_lock); the lock covers
+        # the session work only, the response is sent after releasing it
+        write_lock.acquire()
         session = get_session()
         
         try:
@@ -316,65 +858,45 @@ class TransactionHandler(BaseHTTPRequestHandler):
             transaction = session.query(Transaction).get(transaction_id)
             
             if not transaction:
-                self._set_headers(404)
-                self.wfile.write(json.dumps({
+                status, result = 404, {
                     'error': 'Not Found',
                     'message': f'Transaction {transaction_id} not found' 
             
-                }).encode())
-                return
-            
-            # Read request body
-            content_length = int(self.headers.get('Content-Length', 0))
-            if content_length == 0:
-                self._set_headers(400)
-                self.wfile.write(json.dumps({
-                    'error': 'Bad Request',
-                    'message': 'Request body required'
-                }).encode())
-                return
-            
-            raw_body = self.rfile.read(content_length)
-            update_data = json.loads(raw_body.decode('utf-8'))
-            
-            # Update allowed fields only
-            allowed_fields = [
-                'amount', 'transaction_status', 'sender_notes', 
-                'counter_party', 'currency'
-            ]
-            
-            for key, value in update_data.items():
-                if key in allowed_fields:
-                    setattr(transaction, key, value)
-            
-            session.commit()
-            
-            result = {
-                'success': True,
-                'message': 'Transaction updated successfully',
-                'data': self._transaction_to_dict(transaction)
-            }
-            
-            self._set_headers(200)
-            self.wfile.write(json.dumps(result, indent=2).encode())
-        
-        except json.JSONDecodeError:
-            self._set_headers(400)
-            self.wfile.write(json.dumps({
-                'error': 'Bad Request',
-                'message': 'Invalid JSON in request body'
-            }).encode())
+                }
+            else:
+                # Update allowed fields only
+                allowed_fields = [
+                    'amount', 'transaction_status', 'sender_notes', 
+                    'counter_party', 'currency'
+                ]
+                
+                for key, value in update_data.items():
+                    if key in allowed_fields:
+                        setattr(transaction, key, value)
+                
+                session.commit()
+                response_cache.invalidate(transaction_id)
+                
+                # Reload after the commit expired it, with relations eager-loaded
+                transaction = self._load_transaction(session, transaction_id)
+                status, result = 200, {
+                    'success': True,
+                    'message': 'Transaction updated successfully',
+                    'data': self._transaction_to_dict(transaction)
+                }
         
         except Exception as e:
             session.rollback()
-            self._set_headers(500)
-            self.wfile.write(json.dumps({
+            status, result = 500, {
                 'error': 'Internal Server Error',
                 'message': str(e)
-            }).encode())
+            }
         
         finally:
             session.close()
+            write_lock.release()
+        
+        self._send_json(status, result, indent=self._indent() if status < 400 else None)
 
     def do_DELETE(self):
         """Handle DELETE requests - Delete transaction"""
@@ -383,19 +905,25 @@ class TransactionHandler(BaseHTTPRequestHandler):
             self._send_unauthorized()
             return
         
+        if urlparse(self.path).path == '/transactions/batch':
+            self._delete_batch()
+            return
+        
         # Extract transaction ID from URL
         pattern = r'^/transactions/(\d+)$'
-        match = re.match(pattern, self.path)
+        match = re.match(pattern, urlparse(self.path).path)
         
         if not match:
-            self._set_headers(400)
-            self.wfile.write(json.dumps({
+            self._send_json(400, {
                 'error': 'Bad Request',
                 'message': 'Invalid endpoint format. Use /transactions/{id}'
-            }).encode())
+            })
             return
         
         transaction_id = int(match.group(1))
+        # Serialize writers (see db_config.write_lock); the lock covers
+        # the session work only, the response is sent after releasing it
+        write_lock.acquire()
         session = get_session()
         
         try:
@@ -403,48 +931,100 @@ class TransactionHandler(BaseHTTPRequestHandler):
             transaction = session.query(Transaction).get(transaction_id)
             
             if not transaction:
-                self._set_headers(404)
-                self.wfile.write(json.dumps({
+                status, result = 404, {
                     'error': 'Not Found',
                     'message': f'Transaction {transaction_id} not found'
-                }).encode())
-                return
-            
-            # Delete transaction (fees cascade automatically)
-            session.delete(transaction)
-            session.commit()
-            
-            result = {
-                'success': True,
-                'message': f'Transaction {transaction_id} deleted successfully'
-            }
-            
-            self._set_headers(200)
-            self.wfile.write(json.dumps(result).encode())
+                }
+            else:
+                # Delete transaction (fees cascade automatically)
+                session.delete(transaction)
+                session.commit()
+                response_cache.invalidate(transaction_id)
+                
+                status, result = 200, {
+                    'success': True,
+                    'message': f'Transaction {transaction_id} deleted successfully'
+                }
         
         except Exception as e:
             session.rollback()
-            self._set_headers(500)
-            self.wfile.write(json.dumps({
+            status, result = 500, {
                 'error': 'Internal Server Error',
                 'message': str(e)
-            }).encode())
+            }
         
         finally:
             session.close()
+            write_lock.release()
+        
+        self._send_json(status, result, indent=self._indent() if status < 400 else None)
+
 
+# Worker threads of the concurrent server; 1 serves one request at a time
+DEFAULT_WORKERS = 8
 
-def run(port=8000):
+class PooledHTTPServer(HTTPServer):
+    """
+    HTTPServer that handles connections on a bounded thread pool, so a
+    slow request no longer blocks every other client. At most
+    max_pending connections are queued or in progress; beyond that the
+    accept loop waits and new clients queue in the listen backlog.
+    Every request opens its own session, which is safe across threads.
+    """
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, workers=DEFAULT_WORKERS,
+                 max_pending=None):
+        super().__init__(server_address, handler_class)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api')
+        self.slots = threading.BoundedSemaphore(max_pending or workers * 4)
+
+    def process_request(self, request, client_address):
+        self.slots.acquire()
+        try:
+            self.executor.submit(self._process_request_worker, request, client_address)
+        except Exception:
+            self.slots.release()
+            raise
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+def create_server(port=8000, workers=DEFAULT_WORKERS, host='localhost'):
+    """Build the API server; workers=1 gives the single-threaded HTTPServer"""
+    if workers <= 1:
+        return HTTPServer((host, port), TransactionHandler)
+    return PooledHTTPServer((host, port), TransactionHandler, workers=workers)
+
+def run(port=8000, workers=DEFAULT_WORKERS):
     """Start the HTTP server"""
-    server_address = ('localhost', port)
-    httpd = HTTPServer(server_address, TransactionHandler)
+    # Add indexes introduced since the database was created
+    ensure_schema()
+    # Categories, fee types and the default user, for every POST
+    reference_data.refresh()
+    httpd = create_server(port, workers)
     print(f"MoMo SMS API Server running at http://localhost:{port}")
+    print(f"Workers: {workers}")
     print(f"Endpoints:")
     print(f"GET    /transactions       - List all transactions")
+    print(f"GET    /transactions/summary - Totals grouped by category, status, counter party or period")
     print(f"GET    /transactions/{{id}}  - Get single transaction")
     print(f"POST   /transactions       - Create new transaction")
+    print(f"POST   /transactions/batch - Create transactions from a JSON array")
     print(f"PUT    /transactions/{{id}}  - Update transaction")
     print(f"DELETE /transactions/{{id}}  - Delete transaction")
+    print(f"DELETE /transactions/batch - Delete transactions by a JSON array of ids")
+    print(f"GET    /metrics            - Request metrics (Prometheus text format)")
     print(f"\n Authentication: Basic Auth")
     print(f"Username: admin")
     print(f"Password: password123")
@@ -456,5 +1036,21 @@ def run(port=8000):
         print("\n\n✓ Server stopped")
         httpd.server_close()
 
+def parse_args(argv=None):
+    """Command line options for the API server"""
+    parser = argparse.ArgumentParser(description="MoMo SMS API Server")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"request worker threads (1 = single-threaded, default: {DEFAULT_WORKERS})")
+    parser.add_argument('--async', dest='async_mode', action='store_true',
+                        help="serve on an asyncio event loop with HTTP/1.1 keep-alive "
+                             "(see async_server.py)")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    args = parse_args()
+    if args.async_mode:
+        from async_server import run as run_async
+        run_async(port=args.port, workers=args.workers)
+    else:
+        run(port=args.port, workers=args.workers)
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""
+Asyncio serving mode for the MoMo SMS API (standard library only)
+
+Connections are accepted and read on an asyncio event loop, which keeps
+idle HTTP/1.1 keep-alive connections cheap: a polling dashboard reuses
+one TCP connection instead of opening one per request. Each complete
+request is then handed to the regular TransactionHandler routes on a
+bounded thread pool, since SQLAlchemy calls block.
+
+Usage: python api/async_server.py [--port 8000] [--workers 8]
+   or: python api/app.py --async
+"""
+
+import argparse
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from app import TransactionHandler, DEFAULT_WORKERS
+from db_config import ensure_schema
+from reference_data import reference_data
+
+# Seconds an idle keep-alive connection is kept open
+KEEPALIVE_TIMEOUT = 15
+
+# Largest accepted request line plus headers
+MAX_HEADER_BYTES = 64 * 1024
+
+# Response bytes buffered by a worker before they are handed to the loop
+WRITE_BUFFER_SIZE = 64 * 1024
+
+
+class AsyncTransactionHandler(TransactionHandler):
+    """TransactionHandler keeping HTTP/1.1 connections open between requests"""
+    keep_alive = True
+
+
+class LoopWriter(io.RawIOBase):
+    """
+    File-like wfile for a handler running in a worker thread. Writes are
+    buffered and passed to the event loop's StreamWriter, waiting for
+    the transport to drain so a slow client applies backpressure.
+    """
+
+    def __init__(self, writer, loop, buffer_size=WRITE_BUFFER_SIZE):
+        self.writer = writer
+        self.loop = loop
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if not self.buffer:
+            return
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        asyncio.run_coroutine_threadsafe(self._send(data), self.loop).result()
+
+    async def _send(self, data):
+        self.writer.write(data)
+        await self.writer.drain()
+
+
+def parse_content_length(head):
+    """Content-Length of a raw request head, 0 if absent"""
+    for line in head.split(b'\r\n')[1:]:
+        name, _, value = line.partition(b':')
+        if name.strip().lower() == b'content-length':
+            return int(value.strip())
+    return 0
+
+
+class AsyncAPIServer:
+    """Asyncio front end running TransactionHandler on a thread pool"""
+
+    def __init__(self, host='localhost', port=8000, workers=DEFAULT_WORKERS,
+                 handler_class=AsyncTransactionHandler):
+        self.host = host
+        self.port = port
+        self.handler_class = handler_class
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api')
+        # Requests waiting for or running on the pool; beyond this, reading
+        # more requests waits instead of queueing without limit
+        self.slots = asyncio.Semaphore(workers * 4)
+        self.server = None
+
+    def process_request(self, raw_request, writer, loop, client_address):
+        """Run one request through the handler (in a worker thread)"""
+        handler = self.handler_class.__new__(self.handler_class)
+        handler.server = self
+        handler.client_address = client_address
+        handler.request = None
+        handler.rfile = io.BytesIO(raw_request)
+        handler.wfile = LoopWriter(writer, loop)
+        handler.close_connection = True
+        handler.handle_one_request()
+        handler.wfile.flush()
+        return handler.close_connection
+
+    async def handle_connection(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        client_address = writer.get_extra_info('peername') or ('', 0)
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(
+                        reader.readuntil(b'\r\n\r\n'), KEEPALIVE_TIMEOUT
+                    )
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                        asyncio.TimeoutError):
+                    break
+
+                try:
+                    body = await reader.readexactly(parse_content_length(head))
+                except (ValueError, asyncio.IncompleteReadError):
+                    break
+
+                async with self.slots:
+                    close = await loop.run_in_executor(
+                        self.executor, self.process_request,
+                        head + body, writer, loop, client_address
+                    )
+                if close:
+                    break
+        except ConnectionError:
+            pass
+        except Exception as e:
+            print(f"Connection error: {e}")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def serve_forever(self):
+        self.server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port, limit=MAX_HEADER_BYTES
+        )
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+def run(port=8000, workers=DEFAULT_WORKERS):
+    """Start the asyncio HTTP server"""
+    # Add indexes introduced since the database was created
+    ensure_schema()
+    # Categories, fee types and the default user, for every POST
+    reference_data.refresh()
+    server = AsyncAPIServer(port=port, workers=workers)
+    print(f"MoMo SMS API Server (asyncio, HTTP/1.1 keep-alive) running at http://localhost:{port}")
+    print(f"Workers: {workers}")
+    print(f"\n Press Ctrl+C to stop")
+
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\n\n✓ Server stopped")
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MoMo SMS API Server (asyncio)")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"threads running database work (default: {DEFAULT_WORKERS})")
+    args = parser.parse_args()
+    run(port=args.port, workers=args.workers)
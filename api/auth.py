@@ -1,25 +1,132 @@
 """
 Authentication utilities for MoMo SMS API
 
-This module provides helper functions for Basic Authentication.
-Note: The actual authentication is implemented inline in app.py
-This file exists for documentation and code organization purposes.
+This module provides helper functions for Basic Authentication, used by
+TransactionHandler in app.py. Verified credentials are cached in
+process so most requests authenticate without touching the database.
 """
 
 import base64
+import hashlib
+import hmac
 import sys
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 
 # Add database to path
 sys.path.append(str(Path(__file__).parent.parent / 'database'))
 
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
 from db_config import get_session
 from models import User
 
+# Seconds a cached credential is trusted before the database is asked
+# again; bounds how long a change made by another process goes unseen
+CREDENTIAL_CACHE_TTL = 60
+
+# Most usernames kept in the cache, least recently used dropped first
+CREDENTIAL_CACHE_SIZE = 1024
+
+
+def _digest(password):
+    """SHA-256 of a password, so the cache never holds it in plain text"""
+    return hashlib.sha256(password.encode('utf-8')).digest()
+
+
+class CredentialCache:
+    """
+    Thread-safe TTL + LRU cache of username -> password digest for users
+    whose credentials were read from the database. Lookups compare
+    digests with hmac.compare_digest, so timing does not reveal how much
+    of a password matched. A generation counter, bumped on every
+    invalidation, stops a lookup that read a password before it changed
+    from storing it after.
+    """
+
+    def __init__(self, ttl=CREDENTIAL_CACHE_TTL, max_size=CREDENTIAL_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, username, password):
+        """
+        Check a password against the cached credential
+
+        Returns:
+            bool or None: True/False for a cached user, None on a miss
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return None
+            digest, expires_at = entry
+            if expires_at <= now:
+                del self._entries[username]
+                return None
+            self._entries.move_to_end(username)
+        return hmac.compare_digest(digest, _digest(password))
+
+    def store(self, username, password_text, generation):
+        """
+        Cache a user's stored password unless the cache was invalidated
+        since generation was read, evicting the oldest entry when full
+        """
+        entry = (_digest(password_text), time.monotonic() + self.ttl)
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[username] = entry
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username=None):
+        """Drop one username, or every entry when username is None"""
+        with self._lock:
+            self.generation += 1
+            if username is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(username, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+credential_cache = CredentialCache()
+
+
+# Invalidation: any insert, update or delete of a User through the ORM
+# clears the cache when flushed and again when committed; a request that
+# read the old password before the commit finds the generation changed
+# and does not cache it
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    credential_cache.invalidate()
+    session = Session.object_session(target)
+    if session is not None:
+        session.info['users_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _users_committed(session):
+    if session.info.pop('users_changed', False):
+        credential_cache.invalidate()
+
 
 def verify_credentials(username, password):
     """
-    Verify username and password against database
+    Verify username and password, from the cache when possible and
+    against the database otherwise
     
     Args:
         username (str): Username to verify
@@ -28,12 +135,19 @@ def verify_credentials(username, password):
     Returns:
         bool: True if credentials are valid, False otherwise
     """
+    cached = credential_cache.check(username, password)
+    if cached is not None:
+        return cached
+
+    # Read before the query, so an invalidation during it is noticed
+    generation = credential_cache.generation
     session = get_session()
     try:
         user = session.query(User).filter_by(username=username).first()
-        if user and user.password_text == password:
-            return True
-        return False
+        if user is None:
+            return False
+        credential_cache.store(user.username, user.password_text, generation)
+        return hmac.compare_digest(_digest(user.password_text), _digest(password))
     except Exception as e:
         print(f"Database error during authentication: {e}")
         return False
@@ -0,0 +1,146 @@
+"""
+Sparse fieldsets for the transaction endpoints
+
+?fields=transaction_id,amount,transaction_date limits a transaction to
+the named keys. The same field list decides what the query loads:
+only the columns those keys read, and the category, user and fees
+relations only when asked for, so narrow requests skip their joins and
+the extra fees query. raw_data, which no response includes, is never
+loaded.
+"""
+
+import sys
+from pathlib import Path
+
+# Add database to path
+sys.path.append(str(Path(__file__).parent.parent / 'database'))
+
+from sqlalchemy.orm import joinedload, load_only, selectinload
+
+from models import Transaction, TransactionCategory, User, TransactionFee, FeeType
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+# Output key -> (columns it reads, serializer), in response order
+TRANSACTION_FIELDS = {
+    'transaction_id': (
+        (Transaction.transaction_id,),
+        lambda t: t.transaction_id,
+    ),
+    'external_ref': (
+        (Transaction.external_ref,),
+        lambda t: t.external_ref,
+    ),
+    'amount': (
+        (Transaction.amount,),
+        lambda t: float(t.amount),
+    ),
+    'currency': (
+        (Transaction.currency,),
+        lambda t: t.currency,
+    ),
+    'transaction_status': (
+        (Transaction.transaction_status,),
+        lambda t: t.transaction_status,
+    ),
+    'sender_notes': (
+        (Transaction.sender_notes,),
+        lambda t: t.sender_notes,
+    ),
+    'transaction_date': (
+        (Transaction.transaction_date,),
+        lambda t: _isoformat(t.transaction_date),
+    ),
+    'counter_party': (
+        (Transaction.counter_party,),
+        lambda t: t.counter_party,
+    ),
+    'created_at': (
+        (Transaction.created_at,),
+        lambda t: _isoformat(t.created_at),
+    ),
+    'category': (
+        (Transaction.category_id,),
+        lambda t: {
+            'category_id': t.category.category_id,
+            'category_name': t.category.category_name,
+            'category_code': t.category.category_code
+        } if t.category else None,
+    ),
+    'user': (
+        (Transaction.user_id,),
+        lambda t: {
+            'user_id': t.user.user_id,
+            'full_name': t.user.full_name,
+            'phone_number': t.user.phone_number
+        } if t.user else None,
+    ),
+    'fees': (
+        (),
+        lambda t: [
+            {
+                'fee_type': fee.fee_type.fee_name,
+                'amount': float(fee.transaction_fee_amount)
+            } for fee in t.fees
+        ] if t.fees else [],
+    ),
+}
+
+ALL_FIELDS = tuple(TRANSACTION_FIELDS)
+
+# Eager loads for the relation fields, each limited to the columns the
+# serializer reads (the user's password is never loaded)
+RELATION_LOAD_OPTIONS = {
+    'category': joinedload(Transaction.category).load_only(
+        TransactionCategory.category_name, TransactionCategory.category_code
+    ),
+    'user': joinedload(Transaction.user).load_only(
+        User.full_name, User.phone_number
+    ),
+    'fees': selectinload(Transaction.fees).load_only(
+        TransactionFee.transaction_fee_amount
+    ).joinedload(TransactionFee.fee_type).load_only(FeeType.fee_name),
+}
+
+
+def parse_fields(query_params):
+    """
+    Fields named by ?fields=, in response order, or ALL_FIELDS
+
+    Raises:
+        ValueError: if fields is empty or names an unknown field
+    """
+    if 'fields' not in query_params:
+        return ALL_FIELDS
+    requested = {name.strip() for name in query_params['fields'][0].split(',') if name.strip()}
+    if not requested:
+        raise ValueError('fields must name at least one field')
+    unknown = requested.difference(ALL_FIELDS)
+    if unknown:
+        raise ValueError(
+            f'Unknown field(s): {", ".join(sorted(unknown))}. '
+            f'Valid fields: {", ".join(ALL_FIELDS)}'
+        )
+    return tuple(field for field in ALL_FIELDS if field in requested)
+
+
+def load_options(fields=ALL_FIELDS):
+    """
+    Query options loading what serialize(..., fields) reads and nothing
+    else. The primary key and transaction_date are always loaded, since
+    keyset pagination cursors are built from them.
+    """
+    columns = {Transaction.transaction_id, Transaction.transaction_date}
+    for field in fields:
+        columns.update(TRANSACTION_FIELDS[field][0])
+    options = [load_only(*columns)]
+    options.extend(RELATION_LOAD_OPTIONS[field] for field in fields if field in RELATION_LOAD_OPTIONS)
+    return options
+
+
+def serialize(transaction, fields=ALL_FIELDS):
+    """Transaction as a dictionary of the given fields"""
+    return {field: TRANSACTION_FIELDS[field][1](transaction) for field in fields}
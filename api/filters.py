@@ -0,0 +1,98 @@
+"""
+Query filters shared by GET /transactions and GET /transactions/summary
+
+status, category, from/to (transaction_date) and min_amount/max_amount
+become WHERE conditions on Transactions alone, each one an index range
+(see the indexes in database/models.py):
+
+  from/to                  idx_transaction_date_id
+  status + from/to         idx_transaction_status_date_id
+  category + from/to       idx_transaction_category_date_id
+  min_amount/max_amount    idx_transaction_amount
+
+The category code is resolved in a scalar subquery rather than a join,
+so the category filter also searches the category_id index.
+"""
+
+import math
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add database to path
+sys.path.append(str(Path(__file__).parent.parent / 'database'))
+
+from sqlalchemy import select
+
+from models import Transaction, TransactionCategory
+
+
+def parse_date_bound(value, name):
+    """
+    (datetime, date_only) for a from/to value: an ISO 8601 date
+    (2024-05-01) or date and time (2024-05-01T14:30:00). Transaction
+    dates are stored as the SMS's local time with no offset, so a
+    value with one (+02:00, Z) cannot be compared and is rejected.
+    """
+    try:
+        bound = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an ISO 8601 date or date and time, got {value!r}')
+    if bound.tzinfo is not None:
+        raise ValueError(f'{name} must not have a timezone offset, got {value!r}')
+    return bound, len(value) == 10
+
+
+def parse_amount(value, name):
+    try:
+        amount = float(value)
+    except ValueError:
+        amount = math.nan
+    if not math.isfinite(amount):
+        raise ValueError(f'{name} must be a number, got {value!r}')
+    return amount
+
+
+def apply_filters(query, query_params):
+    """
+    Add the filters named in query_params to a query over Transaction.
+    from and to are inclusive; a date-only to covers that whole day.
+
+    Raises:
+        ValueError: for a malformed value or an empty range
+    """
+    if 'status' in query_params:
+        query = query.filter(Transaction.transaction_status == query_params['status'][0])
+
+    if 'category' in query_params:
+        category_id = (
+            select(TransactionCategory.category_id)
+            .where(TransactionCategory.category_code == query_params['category'][0])
+            .scalar_subquery()
+        )
+        query = query.filter(Transaction.category_id == category_id)
+
+    start = end = None
+    if 'from' in query_params:
+        start, _ = parse_date_bound(query_params['from'][0], 'from')
+        query = query.filter(Transaction.transaction_date >= start)
+    if 'to' in query_params:
+        end, date_only = parse_date_bound(query_params['to'][0], 'to')
+        if date_only:
+            query = query.filter(Transaction.transaction_date < end + timedelta(days=1))
+        else:
+            query = query.filter(Transaction.transaction_date <= end)
+    if start and end and start > end:
+        raise ValueError('from must not be after to')
+
+    low = high = None
+    if 'min_amount' in query_params:
+        low = parse_amount(query_params['min_amount'][0], 'min_amount')
+        query = query.filter(Transaction.amount >= low)
+    if 'max_amount' in query_params:
+        high = parse_amount(query_params['max_amount'][0], 'max_amount')
+        query = query.filter(Transaction.amount <= high)
+    if low is not None and high is not None and low > high:
+        raise ValueError('min_amount must not be greater than max_amount')
+
+    return query
@@ -0,0 +1,216 @@
+"""
+Request metrics for the MoMo SMS API, served at GET /metrics
+
+TransactionHandler times every request from its parsed headers to the
+flushed response and records, per method and route:
+
+  http_request_duration_seconds        latency histogram
+  http_request_db_seconds              time in SQL statements (histogram)
+  http_request_serialization_seconds   time building and encoding JSON (histogram)
+  http_responses_total                 responses by status code
+  http_response_bytes_total            bytes written, headers included
+
+plus http_requests_in_flight. /metrics renders them in the Prometheus
+text exposition format. Routes are path templates (/transactions/{id}),
+so ids and query strings never create new series.
+
+DB time comes from SQLAlchemy's cursor execute events on the thread
+handling the request. It covers executing each statement; rows SQLite
+produces after the first, as they are fetched, count towards neither
+DB nor serialization time.
+
+Recording costs two perf_counter() calls per timed section and one lock
+acquisition per request, a few microseconds in all.
+"""
+
+import re
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Routes reported by path; any other path is reported as 'other'
+ROUTES = {'/transactions', '/transactions/batch', '/transactions/summary', '/metrics'}
+ITEM_ROUTE = re.compile(r'/transactions/[^/]+')
+
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'DELETE', 'OPTIONS'}
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def route_of(path):
+    """Route template of a request path, e.g. /transactions/42 -> /transactions/{id}"""
+    path = path.partition('?')[0]
+    if path in ROUTES:
+        return path
+    if ITEM_ROUTE.fullmatch(path):
+        return '/transactions/{id}'
+    return 'other'
+
+
+class Histogram:
+    """Observation counts per bucket of LATENCY_BUCKETS, with their sum"""
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RouteMetrics:
+    """Everything recorded for one (method, route)"""
+    __slots__ = ('duration', 'db', 'serialization', 'statuses', 'bytes_written')
+
+    def __init__(self):
+        self.duration = Histogram()
+        self.db = Histogram()
+        self.serialization = Histogram()
+        self.statuses = {}
+        self.bytes_written = 0
+
+
+class RequestTimer:
+    """Measurements of one request in progress"""
+    __slots__ = ('method', 'route', 'started', 'status', 'db_seconds',
+                 'serialization_seconds', 'bytes_written', 'query_started')
+
+    def __init__(self, method, route):
+        self.method = method
+        self.route = route
+        self.started = time.perf_counter()
+        self.status = None
+        self.db_seconds = 0.0
+        self.serialization_seconds = 0.0
+        self.bytes_written = 0
+        self.query_started = None
+
+
+class RequestMetrics:
+    """Thread-safe store of request metrics, rendered for /metrics"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.in_flight = 0
+        self.current = threading.local()
+
+    def start(self, method, path):
+        """Begin timing a request on this thread, return its RequestTimer"""
+        timer = RequestTimer(method if method in METHODS else 'other', route_of(path))
+        with self.lock:
+            self.in_flight += 1
+        self.current.timer = timer
+        return timer
+
+    def finish(self, timer):
+        """Record a finished request"""
+        duration = time.perf_counter() - timer.started
+        self.current.timer = None
+        with self.lock:
+            self.in_flight -= 1
+            route = self.routes.get((timer.method, timer.route))
+            if route is None:
+                route = self.routes[(timer.method, timer.route)] = RouteMetrics()
+            route.duration.observe(duration)
+            route.db.observe(timer.db_seconds)
+            route.serialization.observe(timer.serialization_seconds)
+            if timer.status is not None:
+                route.statuses[timer.status] = route.statuses.get(timer.status, 0) + 1
+            route.bytes_written += timer.bytes_written
+
+    def active(self):
+        """RequestTimer of the request this thread is handling, if any"""
+        return getattr(self.current, 'timer', None)
+
+    def clear(self):
+        with self.lock:
+            self.routes.clear()
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self.lock:
+            snapshot = [
+                (method, route, _copy(metrics.duration), _copy(metrics.db),
+                 _copy(metrics.serialization), dict(metrics.statuses), metrics.bytes_written)
+                for (method, route), metrics in sorted(self.routes.items())
+            ]
+            in_flight = self.in_flight
+
+        lines = []
+        histograms = [
+            ('http_request_duration_seconds', 2,
+             'Time to handle a request, from parsed headers to flushed response'),
+            ('http_request_db_seconds', 3,
+             'Time a request spent executing SQL statements'),
+            ('http_request_serialization_seconds', 4,
+             'Time a request spent building and encoding JSON'),
+        ]
+        for name, column, help_text in histograms:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for row in snapshot:
+                labels = f'method="{row[0]}",route="{row[1]}"'
+                histogram = row[column]
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{{labels}}} {histogram.sum:.6f}')
+                lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+        lines += ['# HELP http_responses_total Responses sent, by status code',
+                  '# TYPE http_responses_total counter']
+        for method, route, *_, statuses, _written in snapshot:
+            for status, count in sorted(statuses.items()):
+                lines.append(
+                    f'http_responses_total{{method="{method}",route="{route}",status="{status}"}} {count}'
+                )
+
+        lines += ['# HELP http_response_bytes_total Response bytes written, headers included',
+                  '# TYPE http_response_bytes_total counter']
+        for method, route, *_, written in snapshot:
+            lines.append(f'http_response_bytes_total{{method="{method}",route="{route}"}} {written}')
+
+        lines += ['# HELP http_requests_in_flight Requests being handled',
+                  '# TYPE http_requests_in_flight gauge',
+                  f'http_requests_in_flight {in_flight}']
+        return '\n'.join(lines) + '\n'
+
+
+def _copy(histogram):
+    """Histogram copy taken under the lock, rendered outside it"""
+    copy = Histogram()
+    copy.counts = list(histogram.counts)
+    copy.sum = histogram.sum
+    copy.count = histogram.count
+    return copy
+
+
+# Shared by every request handler in this process
+request_metrics = RequestMetrics()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    timer = request_metrics.active()
+    if timer is not None:
+        timer.query_started = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _finish_query(conn, cursor, statement, parameters, context, executemany):
+    timer = request_metrics.active()
+    if timer is not None and timer.query_started is not None:
+        timer.db_seconds += time.perf_counter() - timer.query_started
+        timer.query_started = None
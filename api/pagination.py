@@ -0,0 +1,86 @@
+"""
+Keyset pagination for transaction listings
+
+Pages are ordered newest first by (transaction_date, transaction_id) and
+continue from an opaque cursor holding the last row's key, so fetching
+page 1000 costs the same index seek as page 1. The composite index
+idx_transaction_date_id (see models.Transaction) backs the ordering.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+from models import Transaction
+
+# Rows per page when a cursor is given without a limit
+DEFAULT_PAGE_SIZE = 100
+
+# Largest limit a client may ask for
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(transaction):
+    """Opaque cursor pointing just after the given transaction"""
+    key = [transaction.transaction_date.isoformat(), transaction.transaction_id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor from encode_cursor into (transaction_date, transaction_id).
+    Raises ValueError for anything else.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date_text, transaction_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(date_text), int(transaction_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def parse_limit(query_params):
+    """Page size from the query string. Raises ValueError if invalid."""
+    if 'limit' not in query_params:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(query_params['limit'][0])
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+    return limit
+
+
+def order_by_key(query):
+    """Order a Transaction query by the pagination key, newest first"""
+    return query.order_by(Transaction.transaction_date.desc(), Transaction.transaction_id.desc())
+
+
+def paginate(query, limit, cursor=None):
+    """
+    Fetch one page of a Transaction query.
+
+    Args:
+        query: Transaction query with any filters applied
+        limit (int): Rows per page
+        cursor (str): Cursor from the previous page, or None for the first
+
+    Returns:
+        tuple: (transactions, next_cursor); next_cursor is None on the last page
+    """
+    query = order_by_key(query)
+    if cursor is not None:
+        after = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(Transaction.transaction_date, Transaction.transaction_id) < after
+        )
+
+    # One extra row tells whether another page follows
+    transactions = query.limit(limit + 1).all()
+    if len(transactions) <= limit:
+        return transactions, None
+    transactions = transactions[:limit]
+    return transactions, encode_cursor(transactions[-1])
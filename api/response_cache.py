@@ -0,0 +1,157 @@
+"""
+Response cache for GET /transactions and GET /transactions/{id}
+
+Bodies of successful GET responses are kept in process, keyed by path
+and query, each with a strong ETag derived from its bytes. Repeated
+polls are answered from memory, and with 304 Not Modified when the
+client's If-None-Match already names the current body.
+
+Writes made through the API invalidate exactly what they can change:
+POST drops the listings, PUT and DELETE drop the listings and the
+transactions they touched. Writes from other processes (the ETL) are
+picked up once an entry is older than RESPONSE_CACHE_TTL.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from compression import gzip_body
+
+# Seconds an entry is served before the database is read again
+RESPONSE_CACHE_TTL = 30
+
+# Bounds on what the cache holds, least recently used dropped first
+RESPONSE_CACHE_ENTRIES = 512
+RESPONSE_CACHE_BYTES = 32 * 1024 * 1024
+
+
+class CachedResponse:
+    """A cached body, its ETag, and its gzip encoding once asked for"""
+    __slots__ = ('body', 'etag', 'expires_at', 'transaction_id', '_gzipped')
+
+    def __init__(self, body, etag, expires_at, transaction_id):
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+        self.transaction_id = transaction_id
+        self._gzipped = None
+
+    def gzipped(self):
+        """(body, ETag) of the gzip encoding, compressed on first use"""
+        if self._gzipped is None:
+            self._gzipped = (gzip_body(self.body), self.etag[:-1] + '-gzip"')
+        return self._gzipped
+
+
+def cache_key(path):
+    """Path with its query parameters sorted, so ?a=1&b=2 and ?b=2&a=1 share an entry"""
+    parsed = urlparse(path)
+    query = sorted(parse_qsl(parsed.query, keep_blank_values=True))
+    return f"{parsed.path}?{urlencode(query)}" if query else parsed.path
+
+
+def make_etag(body):
+    """Strong ETag from the body bytes: unchanged data keeps its ETag"""
+    return '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def etag_matches(if_none_match, etag):
+    """True when an If-None-Match header value names etag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU of CachedResponse by cache_key. A generation
+    counter, bumped on every invalidation, stops a GET that read the
+    database before a write from storing its now stale body after it.
+    """
+
+    def __init__(self, ttl=RESPONSE_CACHE_TTL, max_entries=RESPONSE_CACHE_ENTRIES,
+                 max_bytes=RESPONSE_CACHE_BYTES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, key):
+        """The live entry for key, or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= now:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def store(self, key, body, generation, transaction_id=None):
+        """
+        Cache body under key unless a write happened since generation
+        was read. transaction_id marks a single-transaction response;
+        None marks a listing.
+
+        Returns:
+            CachedResponse: the entry, whether or not it was kept
+        """
+        entry = CachedResponse(body, make_etag(body), time.monotonic() + self.ttl, transaction_id)
+        if len(body) > self.max_bytes:
+            return entry
+        with self._lock:
+            if generation != self.generation:
+                return entry
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        return entry
+
+    def invalidate(self, *transaction_ids):
+        """
+        Drop every listing, and the entries for any transaction_ids
+        given. Call after a write commits.
+        """
+        changed = set(transaction_ids)
+        with self._lock:
+            self.generation += 1
+            stale = [
+                key for key, entry in self._entries.items()
+                if entry.transaction_id is None or entry.transaction_id in changed
+            ]
+            for key in stale:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        self._bytes -= len(self._entries.pop(key).body)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+response_cache = ResponseCache()
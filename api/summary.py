@@ -0,0 +1,109 @@
+"""
+Transaction summaries for GET /transactions/summary
+
+?group_by=category,month groups transactions by any of the keys in
+GROUP_BY_COLUMNS and returns COUNT, SUM(amount) and SUM(fees) per group,
+computed by SQLite in one GROUP BY query. Fees are summed per
+transaction in a correlated subquery (an idx_transaction_id lookup),
+so a transaction with several fees still counts its amount once and
+filtered summaries read only the fees of matching transactions.
+"""
+
+import sys
+from pathlib import Path
+
+# Add database to path
+sys.path.append(str(Path(__file__).parent.parent / 'database'))
+
+from sqlalchemy import Integer, cast, func, select
+
+from models import Transaction, TransactionCategory, TransactionFee
+
+
+def iso_week(date):
+    """
+    SQL expression of a date's ISO 8601 week, e.g. '2024-W01' for
+    2024-12-30. SQLite's strftime has no %G/%V, so this takes the week's
+    Thursday, whose year is the ISO year and whose day of the year
+    gives the week number.
+    """
+    thursday = func.date(date, '-3 days', 'weekday 4')
+    day_of_year = cast(func.strftime('%j', thursday), Integer)
+    return func.printf('%s-W%02d', func.strftime('%Y', thursday), (day_of_year + 6) // 7)
+
+# group_by key -> SQL expression of the group's value
+GROUP_BY_COLUMNS = {
+    'category': TransactionCategory.category_code,
+    'status': Transaction.transaction_status,
+    'counter_party': Transaction.counter_party,
+    'day': func.strftime('%Y-%m-%d', Transaction.transaction_date),
+    'week': iso_week(Transaction.transaction_date),
+    'month': func.strftime('%Y-%m', Transaction.transaction_date),
+}
+
+DEFAULT_GROUP_BY = ('category',)
+
+
+def parse_group_by(query_params):
+    """
+    Keys named by ?group_by=, in the order given, or DEFAULT_GROUP_BY
+
+    Raises:
+        ValueError: if a key is unknown or repeated
+    """
+    if 'group_by' not in query_params:
+        return DEFAULT_GROUP_BY
+    keys = tuple(key.strip() for key in query_params['group_by'][0].split(',') if key.strip())
+    unknown = [key for key in keys if key not in GROUP_BY_COLUMNS]
+    if not keys or unknown:
+        raise ValueError(
+            f'Invalid group_by: {", ".join(unknown) or "empty"}. '
+            f'Valid keys: {", ".join(GROUP_BY_COLUMNS)}'
+        )
+    if len(set(keys)) != len(keys):
+        raise ValueError('group_by keys must not repeat')
+    return keys
+
+
+def summary_query(session, group_by):
+    """
+    Query of (group values..., count, amount, fees) rows for group_by,
+    ready for filters.apply_filters
+    """
+    fee_total = (
+        select(func.sum(TransactionFee.transaction_fee_amount))
+        .where(TransactionFee.transaction_id == Transaction.transaction_id)
+        .correlate(Transaction)
+        .scalar_subquery()
+    )
+    columns = [GROUP_BY_COLUMNS[key].label(key) for key in group_by]
+    return (
+        session.query(
+            *columns,
+            func.count(Transaction.transaction_id).label('count'),
+            func.sum(Transaction.amount).label('amount'),
+            func.coalesce(func.sum(fee_total), 0).label('fees'),
+        )
+        .select_from(Transaction)
+        .join(TransactionCategory, Transaction.category_id == TransactionCategory.category_id)
+        .group_by(*columns)
+        .order_by(*columns)
+    )
+
+
+def summarize(query, group_by):
+    """Run a summary_query, return (groups, totals) as dictionaries"""
+    groups = []
+    totals = {'count': 0, 'amount': 0.0, 'fees': 0.0}
+    for row in query:
+        group = {key: row[index] for index, key in enumerate(group_by)}
+        group['count'] = row.count
+        group['amount'] = round(float(row.amount or 0), 2)
+        group['fees'] = round(float(row.fees or 0), 2)
+        groups.append(group)
+        totals['count'] += group['count']
+        totals['amount'] += group['amount']
+        totals['fees'] += group['fees']
+    totals['amount'] = round(totals['amount'], 2)
+    totals['fees'] = round(totals['fees'], 2)
+    return groups, totals
@@ -0,0 +1,76 @@
+"""
+Bulk write helpers shared by the ETL loader and the API.
+
+These use SQLAlchemy Core executemany statements instead of adding ORM
+objects one at a time, so a whole batch of transactions costs a couple
+of round-trips instead of several per record.
+"""
+
+from sqlalchemy import delete, insert
+
+from models import Transaction, TransactionFee
+
+# Most ids bound in one IN list
+IN_CHUNK_SIZE = 500
+
+
+def insert_transactions(session, transaction_rows, fee_rows=None):
+    """
+    Insert a batch of transactions (and their fees) with executemany.
+
+    Args:
+        session: Active SQLAlchemy session (the caller commits)
+        transaction_rows (list): Dicts of Transactions column values
+        fee_rows (list): Optional list, parallel to transaction_rows, of
+            dicts of Transaction_fees column values (without
+            transaction_id) or None for transactions without a fee
+
+    Returns:
+        list: New transaction_id values, in the order of transaction_rows
+    """
+    if not transaction_rows:
+        return []
+
+    stmt = insert(Transaction.__table__).returning(
+        Transaction.__table__.c.transaction_id, sort_by_parameter_order=True
+    )
+    transaction_ids = session.execute(stmt, transaction_rows).scalars().all()
+
+    if fee_rows:
+        fees = [
+            {**fee, 'transaction_id': transaction_id}
+            for transaction_id, fee in zip(transaction_ids, fee_rows)
+            if fee is not None
+        ]
+        if fees:
+            session.execute(insert(TransactionFee.__table__), fees)
+
+    return transaction_ids
+
+def delete_transactions(session, transaction_ids):
+    """
+    Delete transactions, and their fees, by id with set-based DELETEs.
+
+    Args:
+        session: Active SQLAlchemy session (the caller commits)
+        transaction_ids (iterable): transaction_id values; ids that do
+            not exist are ignored
+
+    Returns:
+        set: The transaction_id values that existed and were deleted
+    """
+    transactions = Transaction.__table__
+    fees = TransactionFee.__table__
+    ids = list(dict.fromkeys(transaction_ids))
+    deleted = set()
+
+    for start in range(0, len(ids), IN_CHUNK_SIZE):
+        chunk = ids[start:start + IN_CHUNK_SIZE]
+        session.execute(delete(fees).where(fees.c.transaction_id.in_(chunk)))
+        deleted.update(session.execute(
+            delete(transactions)
+            .where(transactions.c.transaction_id.in_(chunk))
+            .returning(transactions.c.transaction_id)
+        ).scalars())
+
+    return deleted
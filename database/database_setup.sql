@@ -9,6 +9,7 @@ DROP TABLE IF EXISTS Transactions;
 DROP TABLE IF EXISTS Transaction_Categories;
 DROP TABLE IF EXISTS Fee_Type;
 DROP TABLE IF EXISTS System_Logs;
+DROP TABLE IF EXISTS Etl_Watermarks;
 DROP TABLE IF EXISTS Momo_User;
 
 -- 1. MOMO_USER TABLE
@@ -71,6 +72,10 @@ CREATE TABLE Transactions (
     INDEX idx_user_id (user_id),
     INDEX idx_category_id (category_id),
     INDEX idx_transaction_date (transaction_date),
+    INDEX idx_transaction_date_id (transaction_date, transaction_id),
+    INDEX idx_transaction_status_date_id (transaction_status, transaction_date, transaction_id),
+    INDEX idx_transaction_category_date_id (category_id, transaction_date, transaction_id),
+    INDEX idx_transaction_amount (amount),
     INDEX idx_transaction_status (transaction_status),
     INDEX idx_external_ref (external_ref)
 ) COMMENT = 'Main transaction records from SMS data';
@@ -130,6 +135,16 @@ CREATE TABLE System_Logs (
     INDEX idx_log_time (log_time)
 ) COMMENT = 'System processing logs for debugging and monitoring';
 
+-- 7. ETL_WATERMARKS TABLE
+
+CREATE TABLE Etl_Watermarks (
+    watermark_id BIGINT AUTO_INCREMENT PRIMARY KEY COMMENT 'Unique watermark identifier',
+    source_name VARCHAR(100) NOT NULL UNIQUE COMMENT 'SMS backup source tracked by incremental ETL',
+    last_sms_date BIGINT NOT NULL COMMENT 'Highest SMS date (epoch ms) already ingested',
+    last_batch_hash CHAR(64) COMMENT 'SHA-256 of the last ingested batch',
+    updated_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) COMMENT 'When the watermark last moved'
+) COMMENT = 'High-watermarks for incremental ETL runs';
+
 -- SAMPLE DATA INSERTION (DML)
 -- Insert sample users 
 INSERT INTO Momo_User (full_name, email_address, phone_number, username, password_text) VALUES
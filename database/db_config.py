@@ -1,31 +1,114 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 from models import Base
+from search import drop_search_index, ensure_search_index
 import os
+import threading
 
 # Get the database directory
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATABASE_PATH = os.path.join(BASE_DIR, 'db.sqlite3')
 DATABASE_URL = f'sqlite:///{DATABASE_PATH}'
 
+# Seconds a connection waits for another writer before "database is locked"
+SQLITE_BUSY_TIMEOUT = 30
+
+def create_db_engine(url=DATABASE_URL):
+    """
+    Create an engine whose connections can be shared between threads.
+    Every SQLite connection runs in WAL mode, so readers do not block
+    the writer, and waits up to SQLITE_BUSY_TIMEOUT for a busy database.
+    """
+    engine = create_engine(
+        url, echo=False,
+        connect_args={'check_same_thread': False, 'timeout': SQLITE_BUSY_TIMEOUT}
+    )
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
+
+    return engine
+
 # Create engine
-engine = create_engine(DATABASE_URL, echo=False)
+engine = create_db_engine()
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# SQLite allows one writer at a time, and a transaction that reads and
+# then writes can fail instead of waiting if another writer got in
+# first. Threads of this process that write hold this lock for the
+# whole unit of work.
+write_lock = threading.RLock()
+
+
+# Query counting: statements executed by the current thread on any engine
+_query_counters = threading.local()
+
+class QueryCounter:
+    """Statements, and their parameters, seen inside a count_queries() block"""
+    def __init__(self):
+        self.statements = []
+        self.parameters = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    for counter in getattr(_query_counters, 'active', ()):
+        counter.statements.append(statement)
+        counter.parameters.append(parameters)
+
+@contextmanager
+def count_queries():
+    """
+    Count the SQL statements this thread executes inside the block, e.g.
+
+        with count_queries() as queries:
+            ...
+        assert queries.count == 2, queries.statements
+    """
+    counter = QueryCounter()
+    active = getattr(_query_counters, 'active', None)
+    if active is None:
+        active = _query_counters.active = []
+    active.append(counter)
+    try:
+        yield counter
+    finally:
+        active.remove(counter)
+
 
 # Helper functions: Create/Drop DBs
 def init_db():
     """Create all tables"""
     Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
     print(f"✓ Database created at: {DATABASE_PATH}")
 
-def get_session():
-    """Get a new database session"""
-    return SessionLocal()
+def ensure_schema():
+    """Create any missing tables and indexes on an existing database"""
+    Base.metadata.create_all(bind=engine)
+    # create_all skips tables that exist, including their new indexes
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    ensure_search_index(engine)
+
+def get_session(**options):
+    """Get a new database session (options override the sessionmaker's)"""
+    return SessionLocal(**options)
 
 def drop_all_tables():
     """Drop all tables (use with caution!)"""
+    drop_search_index(engine)
     Base.metadata.drop_all(bind=engine)
     print("✓ All tables dropped")
\ No newline at end of file
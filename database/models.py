@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, Text, Boolean, ForeignKey, TIMESTAMP
+from sqlalchemy import Column, Integer, BigInteger, String, Numeric, DateTime, Text, Boolean, ForeignKey, Index, TIMESTAMP
 from sqlalchemy.ext.declarative import declarative_base
 # Declare python side relationship b/n models (e.g., User.transactions)
 from sqlalchemy.orm import relationship
@@ -43,7 +43,7 @@ class Transaction(Base):
     __tablename__ = 'Transactions'
     
     transaction_id = Column(Integer, primary_key=True, autoincrement=True)
-    external_ref = Column(String(100), nullable=False)
+    external_ref = Column(String(100), nullable=False, index=True)
     amount = Column(Numeric(15, 2), nullable=False)
     currency = Column(String(10), default='RWF', nullable=False)
     transaction_status = Column(String(30), default='COMPLETED', nullable=False)
@@ -59,6 +59,16 @@ class Transaction(Base):
     category = relationship("TransactionCategory", back_populates="transactions")
     user = relationship("User", back_populates="transactions")
     fees = relationship("TransactionFee", back_populates="transaction", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Keyset pagination order of GET /transactions (api/pagination.py)
+        Index('idx_transaction_date_id', 'transaction_date', 'transaction_id'),
+        # Date-range filters within a status or category, in the same order
+        Index('idx_transaction_status_date_id', 'transaction_status', 'transaction_date', 'transaction_id'),
+        Index('idx_transaction_category_date_id', 'category_id', 'transaction_date', 'transaction_id'),
+        # min_amount / max_amount filters (api/filters.py)
+        Index('idx_transaction_amount', 'amount'),
+    )
 
 class TransactionFee(Base):
     __tablename__ = 'Transaction_fees'
@@ -72,6 +82,11 @@ class TransactionFee(Base):
     
     transaction = relationship("Transaction", back_populates="fees")
     fee_type = relationship("FeeType", back_populates="transaction_fees")
+    
+    __table_args__ = (
+        # Fees of a set of transactions: selectinload and summary fee totals
+        Index('idx_transaction_id', 'transaction_id'),
+    )
 
 class SystemLog(Base):
     __tablename__ = 'System_Logs'
@@ -80,4 +95,14 @@ class SystemLog(Base):
     log_type = Column(String(30), nullable=False)
     raw_sms_body = Column(Text)
     severity = Column(String(30), default='INFO', nullable=False)
-    log_time = Column(DateTime, default=datetime.now)
\ No newline at end of file
+    log_time = Column(DateTime, default=datetime.now)
+
+class EtlWatermark(Base):
+    __tablename__ = 'Etl_Watermarks'
+    
+    # High-watermark of the SMS backup already ingested by incremental ETL runs
+    watermark_id = Column(Integer, primary_key=True, autoincrement=True)
+    source_name = Column(String(100), unique=True, nullable=False)
+    last_sms_date = Column(BigInteger, nullable=False)  # SMS 'date' attribute, epoch ms
+    last_batch_hash = Column(String(64))
+    updated_at = Column(DateTime, default=datetime.now)
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""
+Reference data cache shared by the ETL loader and the API.
+
+The default user, transaction categories and fee types are a handful of
+rows that change only when database/init_db.py seeds them. They are
+read once per process, kept as detached ORM objects, and reused by
+every load and every POST instead of being queried each time.
+
+The API loads them at startup. refresh() reloads them explicitly, and
+any insert, update or delete of these models through the ORM in this
+process drops the cached copy, so the next get() reads them again.
+Changes made by another process, such as init_db.py seeding categories
+while the API runs, are only seen after refresh() or a restart; until
+then an unknown category_code quietly falls back to
+DEFAULT_CATEGORY_CODE.
+"""
+
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from db_config import get_session
+from models import User, TransactionCategory, FeeType
+
+# Category used when a record's category_code is unknown
+DEFAULT_CATEGORY_CODE = 'TRANSFER'
+
+# Fee type of the fee recorded with each transaction
+TRANSACTION_FEE_NAME = 'Transaction Fee'
+
+
+class ReferenceData:
+    """
+    A snapshot of the reference rows. The objects are detached from any
+    session: read their attributes, or attach them to a session with
+    session.merge(obj, load=False), which issues no query.
+    """
+
+    def __init__(self, default_user, categories, fee_types):
+        self.default_user = default_user
+        self.categories = categories
+        self.fee_types = fee_types
+
+    def category(self, category_code):
+        """Category for a code, falling back to DEFAULT_CATEGORY_CODE"""
+        return self.categories.get(category_code, self.categories.get(DEFAULT_CATEGORY_CODE))
+
+    @property
+    def transaction_fee_type(self):
+        return self.fee_types.get(TRANSACTION_FEE_NAME)
+
+
+class ReferenceDataCache:
+    """
+    Thread-safe holder of the current ReferenceData, loaded on first use.
+    A generation counter, bumped on every invalidation, stops a load
+    that read the rows before a change from keeping them after it.
+    """
+
+    def __init__(self):
+        self._data = None
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """The cached ReferenceData, loading it if needed"""
+        data = self._data
+        if data is None:
+            with self._lock:
+                data = self._data
+                if data is None:
+                    data = self._load_and_keep()
+        return data
+
+    def refresh(self):
+        """Reload from the database and return the new ReferenceData"""
+        with self._lock:
+            return self._load_and_keep()
+
+    def invalidate(self):
+        """Drop the cached copy; the next get() reloads it"""
+        self.generation += 1
+        self._data = None
+
+    def _load_and_keep(self):
+        """Load the rows (holding _lock), keeping them unless invalidated meanwhile"""
+        generation = self.generation
+        data = self._load()
+        if generation == self.generation:
+            self._data = data
+        return data
+
+    def _load(self):
+        session = get_session()
+        try:
+            data = ReferenceData(
+                default_user=session.query(User).first(),
+                categories={cat.category_code: cat for cat in session.query(TransactionCategory).all()},
+                fee_types={fee_type.fee_name: fee_type for fee_type in session.query(FeeType).all()},
+            )
+        finally:
+            # Closing detaches the objects with their attributes loaded
+            session.close()
+        return data
+
+
+reference_data = ReferenceDataCache()
+
+
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+@event.listens_for(TransactionCategory, 'after_insert')
+@event.listens_for(TransactionCategory, 'after_update')
+@event.listens_for(TransactionCategory, 'after_delete')
+@event.listens_for(FeeType, 'after_insert')
+@event.listens_for(FeeType, 'after_update')
+@event.listens_for(FeeType, 'after_delete')
+def _reference_row_changed(mapper, connection, target):
+    reference_data.invalidate()
+    session = Session.object_session(target)
+    if session is not None:
+        session.info['reference_data_changed'] = True
+
+
+# The flush-time invalidation above runs before the commit; a get() in
+# between can load the old rows, so invalidate again once committed
+@event.listens_for(Session, 'after_commit')
+def _reference_rows_committed(session):
+    if session.info.pop('reference_data_changed', False):
+        reference_data.invalidate()
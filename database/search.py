@@ -0,0 +1,123 @@
+"""
+Full-text search over transactions with SQLite FTS5.
+
+Transactions_fts is an external-content FTS5 index of each transaction's
+raw_data (the SMS body), counter_party and external_ref. It stores only
+the index, reading the text itself from Transactions. Triggers on
+Transactions keep it in sync with every insert, update and delete,
+whether it comes from the ETL loaders, the API or plain SQL.
+
+There are no prefix indexes (prefix='2 3'): they double the cost of
+indexing every loaded row, while prefix searches of the main index
+are still only a term-range lookup.
+"""
+
+import re
+
+from sqlalchemy import Float, Integer, text
+
+FTS_TABLE = 'Transactions_fts'
+
+# bm25 weights of raw_data, counter_party and external_ref: a name or
+# reference matching the dedicated column ranks above one in the body
+RANK_WEIGHTS = (1.0, 5.0, 10.0)
+
+SEARCH_INDEX_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        raw_data, counter_party, external_ref,
+        content='Transactions', content_rowid='transaction_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON Transactions BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, raw_data, counter_party, external_ref)
+        VALUES (new.transaction_id, new.raw_data, new.counter_party, new.external_ref);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON Transactions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, raw_data, counter_party, external_ref)
+        VALUES ('delete', old.transaction_id, old.raw_data, old.counter_party, old.external_ref);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+    AFTER UPDATE OF raw_data, counter_party, external_ref ON Transactions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, raw_data, counter_party, external_ref)
+        VALUES ('delete', old.transaction_id, old.raw_data, old.counter_party, old.external_ref);
+        INSERT INTO {FTS_TABLE}(rowid, raw_data, counter_party, external_ref)
+        VALUES (new.transaction_id, new.raw_data, new.counter_party, new.external_ref);
+    END
+    """,
+]
+
+# Search terms: words, optionally ending in * for a prefix search
+TOKEN_PATTERN = re.compile(r'(\w+)(\*?)')
+
+
+def ensure_search_index(engine):
+    """
+    Create the FTS5 index and its triggers if missing, indexing the
+    transactions already stored. Returns False, with a warning, when
+    this SQLite build has no FTS5.
+    """
+    with engine.begin() as connection:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': FTS_TABLE}
+        ).first()
+        try:
+            if not exists:
+                connection.execute(text(SEARCH_INDEX_DDL[0]))
+            for statement in SEARCH_INDEX_DDL[1:]:
+                connection.execute(text(statement))
+            if not exists:
+                connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        except Exception as e:
+            if 'fts5' not in str(e):
+                raise
+            print(f"⚠ Full-text search unavailable: {e}")
+            return False
+    return True
+
+
+def drop_search_index(engine):
+    """Drop the FTS5 index (its triggers go with the Transactions table)"""
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+
+
+def match_expression(query_text):
+    """
+    FTS5 MATCH expression for free text: every word must match, each
+    one quoted so FTS5 operators and punctuation in the input are taken
+    literally; a trailing * keeps a prefix search (e.g. 'Jan*')
+
+    Raises:
+        ValueError: if the text has no searchable words
+    """
+    terms = [
+        f'"{word}"{star}' for word, star in TOKEN_PATTERN.findall(query_text)
+    ]
+    if not terms:
+        raise ValueError('q must contain at least one word or number')
+    return ' '.join(terms)
+
+
+def search_matches(query_text):
+    """
+    Subquery of (transaction_id, rank) for transactions matching the
+    text, lower rank first (bm25); join it to Transaction
+    """
+    weights = ', '.join(str(weight) for weight in RANK_WEIGHTS)
+    return (
+        text(
+            f"SELECT rowid AS transaction_id, bm25({FTS_TABLE}, {weights}) AS rank "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+        )
+        .bindparams(match=match_expression(query_text))
+        .columns(transaction_id=Integer, rank=Float)
+        .subquery('search')
+    )
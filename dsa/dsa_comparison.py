@@ -4,18 +4,23 @@ Compares Linear Search vs Dictionary Lookup for transaction searching.
 Demonstrates the efficiency difference between O(n) and O(1) operations.
 """
 
-import json
+import sys
 import time
 import random
+from pathlib import Path
 from typing import List, Dict, Optional
 import matplotlib.pyplot as plt
 
+# Add etl to path
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
 
-def load_transactions(file_path: str = '../data/processed/03_categorized.json') -> List[Dict]:
-    """Load transactions from JSON file."""
+from record_io import read_records
+
+
+def load_transactions(file_path: str = '../data/processed/03_categorized.ndjson.gz') -> List[Dict]:
+    """Load transactions from the categorized NDJSON file."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return list(read_records(file_path))
     except FileNotFoundError:
         print(f"Error: {file_path} not found")
         return []
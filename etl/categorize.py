@@ -1,7 +1,36 @@
-import json
-from pathlib import Path
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 import re
 
+from record_io import read_records, write_records
+from instrumentation import write_stage_stats
+
+# Cleaned records sent to a worker process at a time in parallel mode
+DEFAULT_CHUNK_SIZE = 2000
+
+def workers_arg(value):
+    """argparse type of --workers: 0 (every core) or more"""
+    workers = int(value)
+    if workers < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {workers}")
+    return workers
+
+def chunk_size_arg(value):
+    """argparse type of --chunk-size: 1 or more"""
+    chunk_size = int(value)
+    if chunk_size < 1:
+        raise argparse.ArgumentTypeError(f"must be 1 or more, got {chunk_size}")
+    return chunk_size
+
+# Field order of the tuples returned by worker processes
+DETAIL_FIELDS = (
+    'external_ref', 'amount', 'counter_party', 'fee_amount',
+    'category_code', 'transaction_status'
+)
+
 def extract_transaction_details(body):
     """Extract transaction details from SMS body"""
     details = {}
@@ -57,9 +86,10 @@ def categorize_transaction(body):
     Determine transaction category based on SMS body keywords
     Returns category_code
     """
-    body_lower = body.lower()
-    
-    # Categorization rules
+    return _category_from_lower(body.lower())
+
+def _category_from_lower(body_lower):
+    """Categorization rules, applied to an already lowercased body"""
     if 'received' in body_lower or 'sent' in body_lower:
         return 'TRANSFER'
     elif 'payment' in body_lower or 'paid' in body_lower:
@@ -77,8 +107,10 @@ def categorize_transaction(body):
 
 def determine_status(body):
     """Determine transaction status from SMS body"""
-    body_lower = body.lower()
-    
+    return _status_from_lower(body.lower())
+
+def _status_from_lower(body_lower):
+    """Status rules, applied to an already lowercased body"""
     if 'failed' in body_lower or 'unsuccessful' in body_lower:
         return 'FAILED'
     elif 'pending' in body_lower:
@@ -86,88 +118,233 @@ def determine_status(body):
     else:
         return 'COMPLETED'
 
-def categorize_records(cleaned_records):
-    """Add category and extract transaction details"""
-    categorized_records = []
-    skipped_count = 0
-    
+# Precompiled patterns for extract_transaction. They give exactly the
+# same results as the patterns in extract_transaction_details:
+# 'Financial Transaction Id: N' always contains 'Transaction Id: N', so
+# the third txid pattern can never win and is folded into the second.
+_TXID_RE = re.compile(r'(TxId|Transaction Id):\s*(\d+)', re.IGNORECASE)
+_TXID_ONLY_RE = re.compile(r'TxId:\s*(\d+)', re.IGNORECASE)
+_AMOUNT_RE = re.compile(r'(\d+(?:,\d+)(?:\.\d+)?)\sRWF')
+_NAME_FROM_PAREN_RE = re.compile(r'from\s+([\w\s]+?)\s+\(', re.IGNORECASE)
+_NAME_TO_RE = re.compile(r'to\s+([\w\s]+?)\s+\d', re.IGNORECASE)
+_NAME_FROM_STAR_RE = re.compile(r'from\s+([\w\s]+?)\s+\*', re.IGNORECASE)
+_FEE_RE = re.compile(r'Fee was (\d+(?:\.\d+)?)\s*RWF', re.IGNORECASE)
+
+def extract_transaction(body):
+    """
+    Single-pass extraction engine used by categorize_record.
+    Returns the same txid, amount, counter party, fee, category and
+    status as extract_transaction_details, categorize_transaction and
+    determine_status combined, or None if the body has no transaction ID.
+    """
+    # Transaction ID: a 'TxId' anywhere wins over 'Transaction Id'
+    match = _TXID_RE.search(body)
+    if match is None:
+        return None
+    if len(match.group(1)) == 4:
+        external_ref = match.group(2)
+    else:
+        txid_match = _TXID_ONLY_RE.search(body, match.end())
+        external_ref = txid_match.group(1) if txid_match else match.group(2)
+
+    body_lower = body.lower()
+    # Keyword prefilters are only exact for ASCII bodies, since
+    # IGNORECASE also matches a few non-ASCII characters
+    prefilter = body.isascii()
+
+    match = _AMOUNT_RE.search(body)
+    amount = float(match.group(1).replace(',', '')) if match else 0.0
+
+    counter_party = 'Unknown'
+    has_from = not prefilter or 'from' in body_lower
+    for pattern, possible in (
+        (_NAME_FROM_PAREN_RE, has_from),
+        (_NAME_TO_RE, not prefilter or 'to' in body_lower),
+        (_NAME_FROM_STAR_RE, has_from),
+    ):
+        if possible:
+            match = pattern.search(body)
+            if match:
+                counter_party = match.group(1).strip()
+                break
+
+    fee_amount = 0.0
+    if not prefilter or 'fee was' in body_lower:
+        match = _FEE_RE.search(body)
+        if match:
+            fee_amount = float(match.group(1))
+
+    return {
+        'external_ref': external_ref,
+        'amount': amount,
+        'counter_party': counter_party,
+        'fee_amount': fee_amount,
+        'category_code': _category_from_lower(body_lower),
+        'transaction_status': _status_from_lower(body_lower),
+    }
+
+def _build_categorized(record, details):
+    """Merge extracted details into a cleaned record"""
+    return {
+        **record,  # Keep all cleaned fields
+        **details,
+        'currency': 'RWF'  # Default currency
+    }
+
+def categorize_record(record):
+    """
+    Add category and transaction details to a single cleaned record.
+    Returns None if the SMS is not a transaction.
+    """
+    # Extract transaction details, category and status
+    details = extract_transaction(record.get('body', ''))
+
+    # Skip if no transaction ID found (not a transaction SMS)
+    if details is None:
+        return None
+
+    # Build categorized record
+    return _build_categorized(record, details)
+
+def _extract_chunk(bodies):
+    """
+    Worker process entry point: run the extraction engine over a chunk
+    of SMS bodies. Returns compact tuples (or None) to keep the results
+    cheap to send back to the parent.
+    """
+    results = []
+    for body in bodies:
+        details = extract_transaction(body)
+        results.append(
+            None if details is None
+            else tuple(details[field] for field in DETAIL_FIELDS)
+        )
+    return results
+
+def _iter_categorize_parallel(cleaned_records, stats, workers, chunk_size):
+    """
+    Categorize chunks of records in a process pool, yielding results in
+    the original order. Only the SMS bodies are sent to the workers, and
+    at most two chunks per worker are in flight at once so a streamed
+    input is never fully buffered.
+    """
+    records = iter(cleaned_records)
+    pending = deque()
+
+    def merge(chunk, future):
+        for record, values in zip(chunk, future.result()):
+            if values is None:
+                stats['skipped'] += 1
+                continue
+            yield _build_categorized(record, dict(zip(DETAIL_FIELDS, values)))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            bodies = [record.get('body', '') for record in chunk]
+            pending.append((chunk, executor.submit(_extract_chunk, bodies)))
+            if len(pending) >= workers * 2:
+                yield from merge(*pending.popleft())
+
+        while pending:
+            yield from merge(*pending.popleft())
+
+def iter_categorize_records(cleaned_records, stats=None, workers=1,
+                            chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Generator version of categorize_records.
+    Non-transaction messages are counted in stats['skipped'].
+    workers > 1 spreads the extraction over a process pool in chunks of
+    chunk_size records; workers=0 uses every CPU core.
+
+    Raises:
+        ValueError: if workers < 0 or chunk_size < 1, which would
+            otherwise drop every record without an error
+    """
+    if workers < 0:
+        raise ValueError(f"workers must be 0 or more, got {workers}")
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be 1 or more, got {chunk_size}")
+    if stats is None:
+        stats = {}
+    stats.setdefault('skipped', 0)
+
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if workers > 1:
+        yield from _iter_categorize_parallel(cleaned_records, stats, workers, chunk_size)
+        return
+
     for record in cleaned_records:
-        body = record.get('body', '')
-        
-        # Extract transaction details
-        details = extract_transaction_details(body)
-        
-        # Skip if no transaction ID found (not a transaction SMS)
-        if 'external_ref' not in details:
-            skipped_count += 1
+        categorized = categorize_record(record)
+        if categorized is None:
+            stats['skipped'] += 1
             continue
-        
-        # Add categorization
-        category_code = categorize_transaction(body)
-        status = determine_status(body)
-        
-        # Build categorized record
-        categorized = {
-            **record,  # Keep all cleaned fields
-            'external_ref': details['external_ref'],
-            'amount': details['amount'],
-            'counter_party': details['counter_party'],
-            'fee_amount': details['fee_amount'],
-            'category_code': category_code,
-            'transaction_status': status,
-            'currency': 'RWF'  # Default currency
-        }
-        
-        categorized_records.append(categorized)
-    
+        yield categorized
+
+def categorize_records(cleaned_records, workers=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Add category and extract transaction details"""
+    stats = {}
+    categorized_records = list(iter_categorize_records(
+        cleaned_records, stats, workers=workers, chunk_size=chunk_size
+    ))
+    skipped_count = stats['skipped']
+
     print(f"✓ Categorized {len(categorized_records)} transactions")
     if skipped_count > 0:
         print(f"  Skipped {skipped_count} non-transaction messages")
     
     return categorized_records
 
-def load_from_json(file_path):
-    """Load data from JSON file"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+def count_categories(categorized_records, category_counts):
+    """Pass records through while counting them per category_code"""
+    for record in categorized_records:
+        cat = record.get('category_code', 'UNKNOWN')
+        category_counts[cat] = category_counts.get(cat, 0) + 1
+        yield record
 
-def save_to_json(data, output_path):
-    """Save data to JSON file"""
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    print(f"✓ Saved to {output_path}")
+def parse_args(argv=None):
+    """Command line options for the categorize step"""
+    parser = argparse.ArgumentParser(description="Categorize cleaned transactions")
+    parser.add_argument('--workers', type=workers_arg, default=1,
+                        help="worker processes (0 = all CPU cores, default: 1)")
+    parser.add_argument('--chunk-size', type=chunk_size_arg, default=DEFAULT_CHUNK_SIZE,
+                        help=f"records per worker chunk (default: {DEFAULT_CHUNK_SIZE})")
+    return parser.parse_args(argv)
 
 def main():
     """Categorize cleaned transactions"""
-    input_file = "../data/processed/02_cleaned_normalized.json"
-    output_file = "../data/processed/03_categorized.json"
+    input_file = "../data/processed/02_cleaned_normalized.ndjson.gz"
+    output_file = "../data/processed/03_categorized.ndjson.gz"
+    args = parse_args()
     
     print("="*60)
     print("STEP 3: TRANSFORM - Categorize Transactions")
     print("="*60)
     
     try:
-        # Load cleaned data
-        cleaned_data = load_from_json(input_file)
-        print(f"Loaded {len(cleaned_data)} cleaned records")
-        
-        # Categorize
-        categorized_data = categorize_records(cleaned_data)
-        
-        # Save categorized data
-        save_to_json(categorized_data, output_file)
-        
-        # Show category distribution
+        # Stream cleaned data through categorization into the output file
+        stats = {}
         category_counts = {}
-        for record in categorized_data:
-            cat = record.get('category_code', 'UNKNOWN')
-            category_counts[cat] = category_counts.get(cat, 0) + 1
+        cleaned_data = read_records(input_file)
+        categorized_data = iter_categorize_records(
+            cleaned_data, stats, workers=args.workers, chunk_size=args.chunk_size
+        )
+        total = write_records(count_categories(categorized_data, category_counts), output_file)
+        
+        print(f"✓ Categorized {total} transactions")
+        if stats['skipped'] > 0:
+            print(f"  Skipped {stats['skipped']} non-transaction messages")
+        write_stage_stats(
+            records_in=total + stats['skipped'], records_out=total, skipped=stats['skipped']
+        )
         
         print(f"\nCategorization Summary:")
         print(f"   Input:  {input_file}")
         print(f"   Output: {output_file}")
-        print(f"   Total transactions: {len(categorized_data)}")
+        print(f"   Total transactions: {total}")
         print(f"\n   Category breakdown:")
         for cat, count in sorted(category_counts.items()):
             print(f"     - {cat}: {count}")
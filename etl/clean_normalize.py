@@ -1,7 +1,72 @@
-import json
-from pathlib import Path
 from datetime import datetime
-import re
+
+from record_io import read_records, write_records
+from instrumentation import write_stage_stats
+from dead_letter import DeadLetterWriter
+
+def clean_record(sms):
+    """
+    Clean and normalize a single raw SMS record.
+    Raises ValueError/TypeError for malformed records.
+    """
+    # Convert timestamp (milliseconds to datetime)
+    if not sms.get('date'):
+        raise ValueError("Missing date for SMS")
+    timestamp_ms = int(sms['date'])
+    transaction_date = datetime.fromtimestamp(timestamp_ms / 1000)
+
+    # Convert type fields to integers
+    sms_type = int(sms.get('type', 1))
+    read_status = int(sms.get('read', 0))
+    status = int(sms.get('status', -1))
+
+    # Build cleaned record
+    return {
+        'address': sms.get('address'),
+        'transaction_date': transaction_date.isoformat(),
+        'transaction_date_readable': transaction_date.strftime('%Y-%m-%d %H:%M:%S'),
+        'body': sms.get('body'),
+        'service_center': sms.get('service_center'),
+        'contact_name': sms.get('contact_name', '(Unknown)'),
+        'type': sms_type,
+        'read': read_status,
+        'status': status,
+    }
+
+def reject_reason(sms):
+    """Reason code for a record clean_record rejected"""
+    date = sms.get('date')
+    if not date:
+        return 'missing_date'
+    if not str(date).lstrip('-').isdigit():
+        return 'bad_date'
+    return 'bad_field'
+
+def iter_clean_normalize(sms_records, stats=None, dead_letter=None):
+    """
+    Generator version of clean_normalize.
+    Yields cleaned records one at a time; invalid records are counted
+    in stats['skipped'] when a stats dict is given, and written to the
+    dead_letter writer (a new one for this stage if not given).
+    """
+    if stats is None:
+        stats = {}
+    stats.setdefault('skipped', 0)
+
+    own_writer = dead_letter is None
+    if own_writer:
+        dead_letter = DeadLetterWriter('clean')
+
+    try:
+        for sms in sms_records:
+            try:
+                yield clean_record(sms)
+            except (ValueError, TypeError) as e:
+                dead_letter.write(sms, reject_reason(sms), e)
+                stats['skipped'] += 1
+    finally:
+        if own_writer:
+            dead_letter.close()
 
 def clean_normalize(sms_records):
     """
@@ -10,87 +75,43 @@ def clean_normalize(sms_records):
     - Normalize data types
     - Remove invalid records
     """
-    cleaned_records = []
-    skipped_count = 0
-    
-    for sms in sms_records:
-        try:
-            # Convert timestamp (milliseconds to datetime)
-            if sms.get('date'):
-                timestamp_ms = int(sms['date'])
-                transaction_date = datetime.fromtimestamp(timestamp_ms / 1000)
-            else:
-                print(f"Warning: Missing date for SMS, skipping")
-                skipped_count += 1
-                continue
-            
-            # Convert type fields to integers
-            sms_type = int(sms.get('type', 1))
-            read_status = int(sms.get('read', 0))
-            status = int(sms.get('status', -1))
-            
-            # Build cleaned record
-            cleaned = {
-                'address': sms.get('address'),
-                'transaction_date': transaction_date.isoformat(),
-                'transaction_date_readable': transaction_date.strftime('%Y-%m-%d %H:%M:%S'),
-                'body': sms.get('body'),
-                'service_center': sms.get('service_center'),
-                'contact_name': sms.get('contact_name', '(Unknown)'),
-                'type': sms_type,
-                'read': read_status,
-                'status': status,
-            }
-            
-            cleaned_records.append(cleaned)
-            
-        except (ValueError, TypeError) as e:
-            print(f"Warning: Skipping malformed record - {e}")
-            skipped_count += 1
-            continue
+    with DeadLetterWriter('clean') as dead_letter:
+        cleaned_records = list(iter_clean_normalize(sms_records, dead_letter=dead_letter))
     
     print(f"✓ Cleaned {len(cleaned_records)} records")
-    if skipped_count > 0:
-        print(f"  Skipped {skipped_count} invalid records")
+    dead_letter.print_summary("invalid records")
     
     return cleaned_records
 
-def load_from_json(file_path):
-    """Load data from JSON file"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def save_to_json(data, output_path):
-    """Save data to JSON file"""
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    print(f"✓ Saved to {output_path}")
-
 def main():
     """Clean and normalize extracted data"""
-    input_file = "../data/processed/01_extracted_raw.json"
-    output_file = "../data/processed/02_cleaned_normalized.json"
+    input_file = "../data/processed/01_extracted_raw.ndjson.gz"
+    output_file = "../data/processed/02_cleaned_normalized.ndjson.gz"
     
     print("="*60)
     print("STEP 2: TRANSFORM - Clean & Normalize")
     print("="*60)
     
     try:
-        # Load extracted data
-        raw_data = load_from_json(input_file)
-        print(f"Loaded {len(raw_data)} raw records")
-        
-        # Clean and normalize
-        cleaned_data = clean_normalize(raw_data)
+        # Stream extracted data through cleaning into the output file
+        stats = {}
+        raw_data = read_records(input_file)
+        with DeadLetterWriter('clean') as dead_letter:
+            cleaned_count = write_records(
+                iter_clean_normalize(raw_data, stats, dead_letter), output_file
+            )
         
-        # Save cleaned data
-        save_to_json(cleaned_data, output_file)
+        print(f"✓ Cleaned {cleaned_count} records")
+        dead_letter.print_summary("invalid records")
+        write_stage_stats(
+            records_in=cleaned_count + stats['skipped'], records_out=cleaned_count,
+            skipped=stats['skipped']
+        )
         
         print(f"\nCleaning Summary:")
         print(f"   Input:  {input_file}")
         print(f"   Output: {output_file}")
-        print(f"   Records: {len(cleaned_data)}")
+        print(f"   Records: {cleaned_count}")
         
     except Exception as e:
         print(f"✗ Cleaning failed: {e}")
@@ -0,0 +1,81 @@
+"""
+Dead-letter sink for records an ETL stage rejects.
+
+Instead of printing a warning per malformed or duplicate record, stages
+hand rejected records to a DeadLetterWriter with a reason code. They are
+buffered and appended to data/logs/dead_letter/<stage>_<timestamp>.ndjson
+in batches, so nothing is lost and the console only shows the
+aggregate counts. No file is created for a run without rejections.
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+DEAD_LETTER_DIR = Path(__file__).parent.parent / 'data' / 'logs' / 'dead_letter'
+
+# Rejected records buffered before they are appended to the file
+DEFAULT_BUFFER_SIZE = 500
+
+class DeadLetterWriter:
+    """Buffered NDJSON writer of rejected records for one stage"""
+
+    def __init__(self, stage, directory=DEAD_LETTER_DIR, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.stage = stage
+        self.path = Path(directory) / f"{stage}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson"
+        self.buffer_size = buffer_size
+        self.counts = {}
+        self._buffer = []
+        self._dumps = json.JSONEncoder(
+            ensure_ascii=False, separators=(',', ':'), default=str
+        ).encode
+
+    @property
+    def total(self):
+        """Number of records rejected so far"""
+        return sum(self.counts.values())
+
+    def write(self, record, reason, error=None):
+        """Reject a record with a reason code and optional error detail"""
+        self.counts[reason] = self.counts.get(reason, 0) + 1
+        self._buffer.append((reason, None if error is None else str(error), record))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Append the buffered records to the dead-letter file"""
+        if not self._buffer:
+            return
+        rejected_at = datetime.now().isoformat()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.writelines(
+                self._dumps({
+                    'stage': self.stage,
+                    'reason': reason,
+                    'error': error,
+                    'rejected_at': rejected_at,
+                    'record': record,
+                }) + '\n'
+                for reason, error, record in self._buffer
+            )
+        self._buffer.clear()
+
+    def close(self):
+        self.flush()
+
+    def summary(self):
+        """Reason counts as text, e.g. 'bad_date: 9, missing_date: 3'"""
+        return ', '.join(f"{reason}: {count}" for reason, count in sorted(self.counts.items()))
+
+    def print_summary(self, label):
+        """Print one aggregate line for the rejected records, if any"""
+        if self.total:
+            print(f"  Skipped {self.total} {label} ({self.summary()})")
+            print(f"  Dead letters: {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,303 @@
+"""
+Per-stage performance instrumentation for the ETL pipeline.
+
+run.py records wall time, CPU time, records in/out, records/sec, skip
+counts and peak RSS for every stage and writes them to a JSON run
+report under data/logs/, so ingest performance can be compared between
+runs and regressions spotted after parser changes.
+
+In-process, each stage generator is wrapped in a meter that pulls
+records from it in small chunks and times those pulls; a stage's own
+cost is its time minus the time of the stage it pulls from. In
+subprocess mode each stage reports its counts and its own peak RSS
+through a small stats file named by the ETL_STAGE_STATS environment
+variable.
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+LOG_DIR = Path(__file__).parent.parent / 'data' / 'logs'
+
+# Environment variable naming the file a stage script writes its stats to
+STAGE_STATS_ENV = 'ETL_STAGE_STATS'
+
+# Records pulled per timed chunk; keeps timer overhead per record tiny
+METER_CHUNK_SIZE = 256
+
+# With tracemalloc enabled, snapshot every this many chunks and keep the
+# largest snapshot, which is the closest to the run's memory peak
+SNAPSHOT_EVERY = 100
+
+# Source files whose allocations are attributed to each stage
+STAGE_FILES = {
+    'extract': ('parse_xml.py', 'ElementTree.py'),
+    'clean': ('clean_normalize.py',),
+    'categorize': ('categorize.py', 'concurrent', 'multiprocessing'),
+    'load': ('load_db.py', 'bulk.py', 'sqlalchemy', 'sqlite3'),
+}
+
+def maxrss_to_mb(maxrss):
+    """Convert ru_maxrss (bytes on macOS, kilobytes elsewhere) to MB"""
+    if sys.platform == 'darwin':
+        return maxrss / (1024 * 1024)
+    return maxrss / 1024
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    if resource is None:
+        return None
+    return maxrss_to_mb(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+def own_peak_rss_mb():
+    """
+    Peak RSS of this process's own address space in MB. On Linux this is
+    VmHWM, which starts afresh at exec; ru_maxrss (self or as seen by
+    the parent's wait4) also keeps the forking parent's peak, so every
+    stage script would report at least run.py's size.
+    """
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+def stage_for_file(filename):
+    """Name of the stage a source file belongs to, or 'other'"""
+    for stage, markers in STAGE_FILES.items():
+        if any(marker in filename for marker in markers):
+            return stage
+    return 'other'
+
+def top_allocations(snapshot, limit=10):
+    """Largest allocation sites of a tracemalloc snapshot"""
+    return [
+        {
+            'site': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            'stage': stage_for_file(stat.traceback[0].filename),
+            'size_kb': round(stat.size / 1024, 1),
+            'count': stat.count,
+        }
+        for stat in snapshot.statistics('lineno')[:limit]
+    ]
+
+def write_stage_stats(records_in=None, records_out=None, skipped=None):
+    """
+    Called by a stage script at the end of main(). Writes its counts,
+    its peak RSS (and tracemalloc peak, when tracing) for run.py; does
+    nothing when the script is run on its own.
+    """
+    stats_path = os.environ.get(STAGE_STATS_ENV)
+    if not stats_path:
+        return
+    peak_rss = own_peak_rss_mb()
+    stats = {'records_in': records_in, 'records_out': records_out, 'skipped': skipped,
+             'peak_rss_mb': None if peak_rss is None else round(peak_rss, 1)}
+    if tracemalloc.is_tracing():
+        stats['traced_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        stats['top_allocations'] = top_allocations(tracemalloc.take_snapshot())
+    with open(stats_path, 'w', encoding='utf-8') as f:
+        json.dump(stats, f)
+
+class StageMetrics:
+    """Measurements for one pipeline stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.records_in = None
+        self.records_out = 0
+        self.skipped = None
+        self.peak_rss_mb = None
+        self.extra = {}
+
+    def as_dict(self):
+        records_per_sec = None
+        if self.wall_time > 0 and self.records_in is not None:
+            records_per_sec = round(self.records_in / self.wall_time, 1)
+        return {
+            'stage': self.name,
+            'wall_time_s': round(self.wall_time, 4),
+            'cpu_time_s': round(self.cpu_time, 4),
+            'records_in': self.records_in,
+            'records_out': self.records_out,
+            'records_per_sec': records_per_sec,
+            'skipped': self.skipped,
+            'peak_rss_mb': None if self.peak_rss_mb is None else round(self.peak_rss_mb, 1),
+            **self.extra,
+        }
+
+class RunReport:
+    """Collects stage metrics for one pipeline run and writes the report"""
+
+    def __init__(self, mode, options=None, trace_memory=False):
+        self.mode = mode
+        self.options = options or {}
+        self.trace_memory = trace_memory
+        self.started_at = datetime.now()
+        self.stages = {}
+        self._meters = []
+        self._chunks = 0
+        self._snapshot = None
+        self._snapshot_size = -1
+        self._traced_peak = 0
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self.wall_time = None
+        self.cpu_time = None
+        if trace_memory and mode == 'in-process':
+            tracemalloc.start()
+
+    def add_stage(self, name):
+        metrics = StageMetrics(name)
+        self.stages[name] = metrics
+        return metrics
+
+    def meter(self, name, records):
+        """
+        Wrap a stage generator. Records are pulled in chunks, and the time
+        spent producing each chunk (including upstream stages) is added
+        to the stage; finish() later subtracts the upstream share.
+        """
+        metrics = self.add_stage(name)
+        self._meters.append(metrics)
+        return self._metered(metrics, records)
+
+    def _metered(self, metrics, records):
+        iterator = iter(records)
+        perf_counter, process_time = time.perf_counter, time.process_time
+        while True:
+            wall_start, cpu_start = perf_counter(), process_time()
+            chunk = list(islice(iterator, METER_CHUNK_SIZE))
+            metrics.wall_time += perf_counter() - wall_start
+            metrics.cpu_time += process_time() - cpu_start
+            if not chunk:
+                return
+            metrics.records_out += len(chunk)
+            if self.trace_memory:
+                self._maybe_snapshot()
+            yield from chunk
+
+    def _maybe_snapshot(self):
+        self._chunks += 1
+        if self._chunks % SNAPSHOT_EVERY:
+            return
+        current = tracemalloc.get_traced_memory()[0]
+        if current > self._snapshot_size:
+            self._snapshot = tracemalloc.take_snapshot()
+            self._snapshot_size = current
+
+    def consume(self, name, consumer, records):
+        """
+        Run the final (non-generator) stage, e.g. the loader, over the
+        metered records and return its result.
+        """
+        metrics = self.add_stage(name)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        result = consumer(records)
+        metrics.wall_time = time.perf_counter() - wall_start
+        metrics.cpu_time = time.process_time() - cpu_start
+        self._meters.append(metrics)
+        return result
+
+    def finish(self):
+        """Turn inclusive in-process timings into per-stage timings"""
+        self.wall_time = time.perf_counter() - self._wall_start
+        self.cpu_time = time.process_time() - self._cpu_start
+
+        # Each stage's time includes the stage it pulls from
+        upstream_wall = upstream_cpu = 0.0
+        for metrics in self._meters:
+            inclusive_wall, inclusive_cpu = metrics.wall_time, metrics.cpu_time
+            metrics.wall_time = max(inclusive_wall - upstream_wall, 0.0)
+            metrics.cpu_time = max(inclusive_cpu - upstream_cpu, 0.0)
+            upstream_wall, upstream_cpu = inclusive_wall, inclusive_cpu
+
+        if self.trace_memory and tracemalloc.is_tracing():
+            if self._snapshot is None:
+                self._snapshot = tracemalloc.take_snapshot()
+            self._traced_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def _memory_section(self):
+        if self._snapshot is None:
+            return None
+        by_stage = {}
+        for stat in self._snapshot.statistics('filename'):
+            stage = stage_for_file(stat.traceback[0].filename)
+            by_stage[stage] = by_stage.get(stage, 0) + stat.size
+        return {
+            'traced_peak_mb': round(self._traced_peak / (1024 * 1024), 2),
+            'snapshot_size_mb': round(self._snapshot_size / (1024 * 1024), 2),
+            'by_stage_kb': {
+                stage: round(size / 1024, 1)
+                for stage, size in sorted(by_stage.items(), key=lambda item: -item[1])
+            },
+            'top_allocations': top_allocations(self._snapshot),
+        }
+
+    def peak_rss_mb(self):
+        """
+        Peak RSS of the run in MB: this process in-process, the largest
+        stage script in subprocess mode
+        """
+        if self.mode != 'subprocess':
+            return peak_rss_mb()
+        peaks = [m.peak_rss_mb for m in self.stages.values() if m.peak_rss_mb is not None]
+        return max(peaks) if peaks else None
+
+    def as_dict(self):
+        peak_rss = self.peak_rss_mb()
+        return {
+            'mode': self.mode,
+            'started_at': self.started_at.isoformat(),
+            'options': self.options,
+            'wall_time_s': round(self.wall_time or 0.0, 4),
+            'cpu_time_s': round(self.cpu_time or 0.0, 4),
+            'peak_rss_mb': None if peak_rss is None else round(peak_rss, 1),
+            'stages': [metrics.as_dict() for metrics in self.stages.values()],
+            'tracemalloc': self._memory_section(),
+        }
+
+    def write(self, log_dir=LOG_DIR):
+        """Write the report as JSON and return its path"""
+        report = self.as_dict()
+        log_dir = Path(log_dir)
+        log_dir.mkdir(parents=True, exist_ok=True)
+        path = log_dir / f"etl_run_{self.started_at.strftime('%Y%m%d_%H%M%S')}.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        return path
+
+    def print_summary(self):
+        """Print the per-stage table"""
+        print(f"\n{'Stage':<12} {'Wall s':>9} {'CPU s':>9} {'In':>10} {'Out':>10} "
+              f"{'Rec/s':>11} {'Skipped':>8} {'RSS MB':>8}")
+        for stage in self.as_dict()['stages']:
+            print(f"{stage['stage']:<12} {stage['wall_time_s']:>9.3f} {stage['cpu_time_s']:>9.3f} "
+                  f"{_fmt(stage['records_in']):>10} {_fmt(stage['records_out']):>10} "
+                  f"{_fmt(stage['records_per_sec']):>11} {_fmt(stage['skipped']):>8} "
+                  f"{_fmt(stage['peak_rss_mb']):>8}")
+
+def _fmt(value):
+    """Format an optional number for the summary table"""
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f"{value:,.1f}"
+    return f"{value:,}"
@@ -1,43 +1,88 @@
 import sys
-import json
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
 
 # Add database to path
 sys.path.append(str(Path(__file__).parent.parent / 'database'))
 
+from sqlalchemy import select
+
 from db_config import get_session
-from models import Transaction, User, TransactionCategory, FeeType, TransactionFee, SystemLog
+from models import Transaction, TransactionFee, SystemLog
+from bulk import insert_transactions
+from reference_data import reference_data
+from record_io import read_records
+from instrumentation import write_stage_stats
+from dead_letter import DeadLetterWriter
+
+# Records committed per batch when loading from a stream
+DEFAULT_BATCH_SIZE = 1000
+
+# Records inserted per executemany batch by the bulk loader
+DEFAULT_BULK_BATCH_SIZE = 5000
+
+# Loaded records between progress lines of the per-record loader
+PROGRESS_EVERY = 1000
 
-def load_transactions_to_db(json_file_path):
+def load_transactions_to_db(records_file_path, bulk=False, stats=None, dead_letter=None):
     """Load categorized transactions into database"""
     
-    # Read JSON file
-    with open(json_file_path, 'r', encoding='utf-8') as f:
-        transactions_data = json.load(f)
+    # Stream the NDJSON file, committing batch by batch
+    transactions_data = read_records(records_file_path)
+    
+    if bulk:
+        return bulk_load_records(transactions_data, stats=stats, dead_letter=dead_letter)
+    return load_records_to_db(
+        transactions_data, batch_size=DEFAULT_BATCH_SIZE, stats=stats, dead_letter=dead_letter
+    )
+
+def get_reference_data():
+    """
+    The default user, category mappings and transaction fee type, from
+    the shared reference data cache (database/reference_data.py)
+    """
+    refs = reference_data.get()
+    
+    # Get default user
+    default_user = refs.default_user
+    if not default_user:
+        raise ValueError("No users found. Run database/init_db.py first!")
+    
+    # Get category mappings
+    categories = refs.categories
+    if not categories:
+        raise ValueError("No categories found. Run database/init_db.py first!")
     
+    # Get fee type
+    transaction_fee_type = refs.transaction_fee_type
+    if not transaction_fee_type:
+        raise ValueError("Fee types not found. Run database/init_db.py first!")
+    
+    return default_user, categories, transaction_fee_type
+
+def load_records_to_db(records, batch_size=None, stats=None, dead_letter=None):
+    """
+    Load categorized transaction records from any iterable.
+    With batch_size set, the session is committed every batch_size
+    records so a streamed input never accumulates in memory.
+    Duplicate and invalid records are counted in stats['skipped'] and
+    written to the dead_letter writer (a new one if not given).
+    """
+    if stats is None:
+        stats = {}
+    own_writer = dead_letter is None
+    if own_writer:
+        dead_letter = DeadLetterWriter('load')
     session = get_session()
     
     try:
-        # Get default user
-        default_user = session.query(User).first()
-        if not default_user:
-            raise ValueError("No users found. Run database/init_db.py first!")
-        
-        # Get category mappings
-        categories = {cat.category_code: cat for cat in session.query(TransactionCategory).all()}
-        if not categories:
-            raise ValueError("No categories found. Run database/init_db.py first!")
-        
-        # Get fee type
-        transaction_fee_type = session.query(FeeType).filter_by(fee_name='Transaction Fee').first()
-        if not transaction_fee_type:
-            raise ValueError("Fee types not found. Run database/init_db.py first!")
+        default_user, categories, transaction_fee_type = get_reference_data()
         
         loaded_count = 0
         skipped_count = 0
         
-        for trans_data in transactions_data:
+        for trans_data in records:
             try:
                 # Check if transaction already exists
                 existing = session.query(Transaction).filter_by(
@@ -45,7 +90,7 @@ def load_transactions_to_db(json_file_path):
                 ).first()
                 
                 if existing:
-                    print(f"  Skipping duplicate: {trans_data['external_ref']}")
+                    dead_letter.write(trans_data, 'duplicate')
                     skipped_count += 1
                     continue
                 
@@ -86,11 +131,14 @@ def load_transactions_to_db(json_file_path):
                 
                 loaded_count += 1
                 
-                if loaded_count % 10 == 0:
+                if loaded_count % PROGRESS_EVERY == 0:
                     print(f"  Loaded {loaded_count} transactions...")
                 
+                if batch_size and loaded_count % batch_size == 0:
+                    session.commit()
+                
             except Exception as e:
-                print(f"Warning: Skipping transaction {trans_data.get('external_ref')}: {e}")
+                dead_letter.write(trans_data, 'invalid_record', e)
                 skipped_count += 1
                 continue
         
@@ -107,8 +155,10 @@ def load_transactions_to_db(json_file_path):
         session.add(log)
         session.commit()
         
+        dead_letter.flush()
         print(f"\n✓ Successfully loaded {loaded_count} transactions to database")
-        print(f"  Skipped {skipped_count} duplicate/invalid records")
+        dead_letter.print_summary("duplicate/invalid records")
+        stats['skipped'] = skipped_count
         
         return loaded_count
         
@@ -130,10 +180,143 @@ def load_transactions_to_db(json_file_path):
         
     finally:
         session.close()
+        if own_writer:
+            dead_letter.close()
+
+def bulk_load_records(records, batch_size=DEFAULT_BULK_BATCH_SIZE, preload_refs=True,
+                      stats=None, dead_letter=None):
+    """
+    Bulk load categorized transaction records from any iterable.
+    Existing external_ref values are read once up front, and each batch
+    of transactions and fees is written with executemany INSERTs through
+    SQLAlchemy Core and committed, instead of one query and flush per
+    record as in load_records_to_db.
+    With preload_refs=False, duplicates are instead looked up per batch
+    with an indexed IN query, so a small incremental load does not read
+    every external_ref in the table.
+    Duplicate and invalid records are counted in stats['skipped'] and
+    written to the dead_letter writer (a new one if not given).
+    """
+    if stats is None:
+        stats = {}
+    own_writer = dead_letter is None
+    if own_writer:
+        dead_letter = DeadLetterWriter('load')
+    session = get_session()
+    
+    try:
+        default_user, categories, transaction_fee_type = get_reference_data()
+        user_id = default_user.user_id
+        fee_type_id = transaction_fee_type.fee_type_id
+        category_ids = {code: cat.category_id for code, cat in categories.items()}
+        default_category_id = category_ids.get('TRANSFER')
+        
+        # Preload every external_ref already in the database
+        seen_refs = set()
+        if preload_refs:
+            seen_refs.update(session.execute(select(Transaction.external_ref)).scalars())
+        
+        loaded_count = 0
+        skipped_count = 0
+        iterator = iter(records)
+        
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            
+            if not preload_refs:
+                batch_refs = {trans_data.get('external_ref') for trans_data in batch}
+                seen_refs.update(session.execute(
+                    select(Transaction.external_ref).where(Transaction.external_ref.in_(batch_refs))
+                ).scalars())
+            
+            now = datetime.now()
+            transaction_rows = []
+            fee_rows = []
+            
+            for trans_data in batch:
+                try:
+                    external_ref = trans_data['external_ref']
+                    if external_ref in seen_refs:
+                        dead_letter.write(trans_data, 'duplicate')
+                        skipped_count += 1
+                        continue
+                    
+                    category_code = trans_data.get('category_code', 'TRANSFER')
+                    transaction_rows.append({
+                        'external_ref': external_ref,
+                        'amount': trans_data.get('amount', 0.0),
+                        'currency': trans_data.get('currency', 'RWF'),
+                        'transaction_status': trans_data.get('transaction_status', 'COMPLETED'),
+                        'sender_notes': trans_data.get('subject'),
+                        'raw_data': trans_data['body'],
+                        'transaction_date': datetime.fromisoformat(trans_data['transaction_date']),
+                        'counter_party': trans_data.get('counter_party', 'Unknown'),
+                        'created_at': now,
+                        'category_id': category_ids.get(category_code, default_category_id),
+                        'user_id': user_id,
+                    })
+                    fee_rows.append({
+                        'transaction_fee_amount': trans_data.get('fee_amount', 0.0),
+                        'created_at': now,
+                        'fee_type_id': fee_type_id,
+                    })
+                    seen_refs.add(external_ref)
+                
+                except Exception as e:
+                    dead_letter.write(trans_data, 'invalid_record', e)
+                    skipped_count += 1
+            
+            insert_transactions(session, transaction_rows, fee_rows)
+            session.commit()
+            
+            loaded_count += len(transaction_rows)
+            print(f"  Loaded {loaded_count} transactions...")
+        
+        # Log success
+        log = SystemLog(
+            log_type='BATCH_COMPLETE',
+            severity='INFO',
+            raw_sms_body=f'Bulk loaded {loaded_count} transactions, skipped {skipped_count}',
+            log_time=datetime.now()
+        )
+        session.add(log)
+        session.commit()
+        
+        dead_letter.flush()
+        print(f"\n✓ Successfully loaded {loaded_count} transactions to database")
+        dead_letter.print_summary("duplicate/invalid records")
+        stats['skipped'] = skipped_count
+        
+        return loaded_count
+        
+    except Exception as e:
+        session.rollback()
+        
+        # Log error
+        log = SystemLog(
+            log_type='DB_ERROR',
+            severity='ERROR',
+            raw_sms_body=str(e),
+            log_time=datetime.now()
+        )
+        session.add(log)
+        session.commit()
+        
+        print(f"✗ Error loading transactions: {e}")
+        raise
+        
+    finally:
+        session.close()
+        if own_writer:
+            dead_letter.close()
 
 def main():
     """Load categorized transactions into database"""
-    input_file = "../data/processed/03_categorized.json"
+    input_file = "../data/processed/03_categorized.ndjson.gz"
+    # --bulk: executemany batches instead of one flush per record
+    bulk = '--bulk' in sys.argv
     
     print("="*60)
     print("STEP 4: LOAD - Save to Database")
@@ -145,7 +328,12 @@ def main():
         sys.exit(1)
     
     try:
-        loaded_count = load_transactions_to_db(input_file)
+        stats = {}
+        loaded_count = load_transactions_to_db(input_file, bulk=bulk, stats=stats)
+        write_stage_stats(
+            records_in=loaded_count + stats['skipped'], records_out=loaded_count,
+            skipped=stats['skipped']
+        )
         
         print(f"\nLoad Summary:")
         print(f"   Input: {input_file}")
@@ -1,83 +1,107 @@
 import xml.etree.ElementTree as ET
 from datetime import datetime
-import json
+import sys
 from pathlib import Path
 
-def parse_xml(file_path):
+from record_io import write_records
+from instrumentation import write_stage_stats
+
+# Raw SMS attributes kept for every extracted record
+SMS_ATTRIBUTES = (
+    'protocol', 'address', 'date', 'type', 'subject', 'body', 'toa',
+    'sc_toa', 'service_center', 'read', 'status', 'locked', 'date_sent',
+    'sub_id', 'readable_date', 'contact_name'
+)
+
+def _sms_to_dict(sms_element):
+    """Copy the raw attributes of an <sms> element - NO PROCESSING"""
+    get = sms_element.get
+    return {name: get(name) for name in SMS_ATTRIBUTES}
+
+def iter_sms(file_path, since=None, stats=None):
     """
-    Extract raw SMS data from XML file.
-    NO transformation - just extraction.
+    Stream M-Money SMS records from an XML backup one at a time.
+    Uses incremental parsing and clears every element once it has been
+    read, so peak memory stays flat regardless of the file size.
+    With since (epoch ms), messages dated before it are skipped without
+    building a record; they are counted in stats['skipped_old']. Messages
+    dated exactly since are kept, since a new one can share the last
+    loaded message's millisecond; the loader drops the ones already
+    stored as duplicates of their external_ref.
+    Every <sms> element read is counted in stats['sms_read'].
     """
     if not Path(file_path).exists():
         raise FileNotFoundError(f"XML file not found: {file_path}")
-    
+
+    if stats is None:
+        stats = {}
+    stats.setdefault('skipped_old', 0)
+    stats.setdefault('sms_read', 0)
+
+    root = None
     try:
-        tree = ET.parse(file_path)
-        root = tree.getroot()
+        for event, element in ET.iterparse(file_path, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = element
+                continue
+
+            if element.tag != 'sms':
+                continue
+            stats['sms_read'] += 1
+
+            # Only include if it's an M-Money message
+            if element.get('address') == 'M-Money' and element.get('body'):
+                date_raw = element.get('date')
+                # Malformed dates pass through for the clean step to reject
+                if since is not None and date_raw and date_raw.isdigit() and int(date_raw) < since:
+                    stats['skipped_old'] += 1
+                else:
+                    yield _sms_to_dict(element)
+
+            # Drop the element and its reference from the root
+            element.clear()
+            root.clear()
     except ET.ParseError as e:
         raise ET.ParseError(f"Invalid XML format: {e}")
-    
-    sms_list = []
-    
-    for sms_element in root.findall('sms'):
-        # Extract raw attributes - NO PROCESSING
-        date_raw = sms_element.get('date')
-        
-        sms_dict = {
-            'protocol': sms_element.get('protocol'),
-            'address': sms_element.get('address'),
-            'date': date_raw,  # Keep as string
-            'type': sms_element.get('type'),
-            'subject': sms_element.get('subject'),
-            'body': sms_element.get('body'),
-            'toa': sms_element.get('toa'),
-            'sc_toa': sms_element.get('sc_toa'),
-            'service_center': sms_element.get('service_center'),
-            'read': sms_element.get('read'),
-            'status': sms_element.get('status'),
-            'locked': sms_element.get('locked'),
-            'date_sent': sms_element.get('date_sent'),
-            'sub_id': sms_element.get('sub_id'),
-            'readable_date': sms_element.get('readable_date'),
-            'contact_name': sms_element.get('contact_name')
-        }
-        
-        # Only include if it's an M-Money message
-        if sms_dict.get('address') == 'M-Money' and sms_dict.get('body'):
-            sms_list.append(sms_dict)
-    
+
+def parse_xml(file_path):
+    """
+    Extract raw SMS data from XML file.
+    NO transformation - just extraction.
+    """
+    sms_list = list(iter_sms(file_path))
+
     print(f"✓ Extracted {len(sms_list)} M-Money SMS records")
     return sms_list
 
-def save_to_json(data, output_path):
-    """Save extracted data to JSON"""
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    print(f"✓ Saved to {output_path}")
-
 def main():
     """Extract raw SMS data from XML"""
     input_file = "../data/raw/modified_sms_v2.xml"
-    output_file = "../data/processed/01_extracted_raw.json"
-    
+    output_file = "../data/processed/01_extracted_raw.ndjson.gz"
+
     print("="*60)
     print("STEP 1: EXTRACT - Parsing XML")
     print("="*60)
-    
+
     try:
-        sms_records = parse_xml(input_file)
-        save_to_json(sms_records, output_file)
-        
+        # Stream straight from the XML into the output file
+        stats = {}
+        record_count = write_records(iter_sms(input_file, stats=stats), output_file)
+        print(f"✓ Extracted {record_count} M-Money SMS records")
+        write_stage_stats(
+            records_in=stats['sms_read'], records_out=record_count,
+            skipped=stats['sms_read'] - record_count
+        )
+
         print(f"\n📊 Extraction Summary:")
         print(f"   Input:  {input_file}")
         print(f"   Output: {output_file}")
-        print(f"   Records: {len(sms_records)}")
-        
+        print(f"   Records: {record_count}")
+
     except Exception as e:
         print(f"✗ Extraction failed: {e}")
-        import sys
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
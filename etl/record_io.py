@@ -0,0 +1,76 @@
+"""
+Line-delimited JSON (NDJSON) record files for ETL stage outputs.
+
+Every record is one compact JSON object per line, so a stage can read
+and write its input/output one batch at a time instead of loading a
+whole JSON array into memory. Files ending in .gz, .bz2 or .xz are
+compressed with the matching standard library module.
+"""
+
+import bz2
+import gzip
+import json
+import lzma
+from itertools import islice
+from pathlib import Path
+
+# Records written per writelines() call
+DEFAULT_BATCH_SIZE = 1000
+
+# Compression picked from the file suffix. Intermediate files are
+# short-lived, so favour speed over ratio.
+OPENERS = {
+    '.gz': lambda path, mode: gzip.open(path, mode, compresslevel=1, encoding='utf-8'),
+    '.bz2': lambda path, mode: bz2.open(path, mode, compresslevel=1, encoding='utf-8'),
+    '.xz': lambda path, mode: lzma.open(path, mode, preset=1, encoding='utf-8'),
+}
+
+def open_record_file(path, mode='rt'):
+    """Open an NDJSON file, transparently (de)compressing by suffix"""
+    opener = OPENERS.get(Path(path).suffix)
+    if opener is None:
+        return open(path, mode, encoding='utf-8')
+    return opener(path, mode)
+
+def write_records(records, output_path, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Write records from any iterable as NDJSON, one batch at a time.
+    Returns the number of records written.
+    """
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    count = 0
+    iterator = iter(records)
+    with open_record_file(output_path, 'wt') as f:
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            f.writelines(dumps(record) + '\n' for record in batch)
+            count += len(batch)
+    print(f"✓ Saved {count} records to {output_path}")
+    return count
+
+def read_records(input_path):
+    """Yield records from an NDJSON file one at a time"""
+    with open_record_file(input_path, 'rt') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def tap_records(records, output_path, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Pass records through unchanged while writing them to an NDJSON file.
+    Used to inspect intermediate stages of the in-process pipeline.
+    """
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    buffer = []
+    with open_record_file(output_path, 'wt') as f:
+        for record in records:
+            buffer.append(dumps(record) + '\n')
+            if len(buffer) >= batch_size:
+                f.writelines(buffer)
+                buffer.clear()
+            yield record
+        f.writelines(buffer)
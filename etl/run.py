@@ -1,32 +1,283 @@
+import argparse
+import json
+import os
 import subprocess
 import sys
+import tempfile
+import time
 from pathlib import Path
 
-def run_command(script_name, description):
-    """Run a Python script and handle errors"""
+from parse_xml import iter_sms
+from clean_normalize import iter_clean_normalize
+from categorize import iter_categorize_records, chunk_size_arg, workers_arg, DEFAULT_CHUNK_SIZE
+from load_db import load_records_to_db, bulk_load_records, DEFAULT_BATCH_SIZE
+from watermark import get_watermark, save_watermark, track_batch
+from db_config import ensure_schema
+from record_io import tap_records
+from dead_letter import DeadLetterWriter, DEAD_LETTER_DIR
+from instrumentation import (
+    RunReport, STAGE_STATS_ENV
+)
+
+PROJECT_DIR = Path(__file__).parent.parent
+INPUT_FILE = PROJECT_DIR / 'data' / 'raw' / 'modified_sms_v2.xml'
+PROCESSED_DIR = PROJECT_DIR / 'data' / 'processed'
+
+def wait_with_usage(process):
+    """
+    Wait for a child process and return (returncode, rusage), using
+    os.wait4 so the CPU time is that of this child alone. rusage is None
+    where wait4 is not available.
+    """
+    if not hasattr(os, 'wait4'):
+        return process.wait(), None
+    _, status, usage = os.wait4(process.pid, 0)
+    if os.WIFSIGNALED(status):
+        process.returncode = -os.WTERMSIG(status)
+    else:
+        process.returncode = os.WEXITSTATUS(status)
+    return process.returncode, usage
+
+def run_command(script_name, description, args=(), metrics=None, env=None):
+    """
+    Run a Python script and handle errors.
+    With metrics (a StageMetrics), the child's wall time and CPU time are
+    recorded on it. Its ru_maxrss is not used: it includes this process's
+    RSS at fork time, so stage scripts report their own peak instead
+    (see instrumentation.write_stage_stats).
+    """
     print(f"\n{'='*60}")
     print(f"Running: {description}")
     print(f"{'='*60}")
     
-    try:
-        result = subprocess.run(
-            [sys.executable, script_name],
-            check=True,
-            capture_output=False
-        )
-        print(f"✓ {description} completed successfully\n")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"✗ {description} failed with error code {e.returncode}\n")
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, script_name, *args], env=env)
+    returncode, usage = wait_with_usage(process)
+    
+    if metrics is not None:
+        metrics.wall_time = time.perf_counter() - start
+        if usage is not None:
+            metrics.cpu_time = usage.ru_utime + usage.ru_stime
+    
+    if returncode != 0:
+        print(f"✗ {description} failed with error code {returncode}\n")
         return False
+    print(f"✓ {description} completed successfully\n")
+    return True
+
+def read_stage_stats(stats_path, metrics):
+    """Copy the counts and peak RSS a stage script wrote with write_stage_stats"""
+    if not stats_path.exists() or stats_path.stat().st_size == 0:
+        return
+    with open(stats_path, encoding='utf-8') as f:
+        stats = json.load(f)
+    metrics.records_in = stats.pop('records_in')
+    metrics.records_out = stats.pop('records_out')
+    metrics.skipped = stats.pop('skipped')
+    metrics.peak_rss_mb = stats.pop('peak_rss_mb', None)
+    metrics.extra.update(stats)
+
+def run_subprocess_pipeline(workers=1, chunk_size=DEFAULT_CHUNK_SIZE, bulk=False,
+                            report=None):
+    """
+    Run every stage in its own interpreter, handing off NDJSON files.
+    With report (a RunReport), per-stage metrics are added to it; with
+    report.trace_memory, each stage runs under tracemalloc.
+    """
+    # Get the etl directory
+    etl_dir = Path(__file__).parent
+    
+    # Define pipeline steps
+    categorize_args = ['--workers', str(workers), '--chunk-size', str(chunk_size)]
+    load_args = ['--bulk'] if bulk else []
+    steps = [
+        ('extract', etl_dir / 'parse_xml.py', 'Step 1: Extract (Parse XML)', []),
+        ('clean', etl_dir / 'clean_normalize.py', 'Step 2: Transform (Clean & Normalize)', []),
+        ('categorize', etl_dir / 'categorize.py', 'Step 3: Transform (Categorize)', categorize_args),
+        ('load', etl_dir / 'load_db.py', 'Step 4: Load (Save to Database)', load_args),
+    ]
+    
+    stats_dir = tempfile.TemporaryDirectory()
+    env = dict(os.environ)
+    if report is not None and report.trace_memory:
+        env['PYTHONTRACEMALLOC'] = '1'
+    
+    # Run each step
+    for i, (stage, script, description, args) in enumerate(steps, 1):
+        if not script.exists():
+            print(f"✗ Error: Script not found: {script}")
+            sys.exit(1)
+        
+        metrics = None
+        stats_path = Path(stats_dir.name) / f"{stage}.json"
+        if report is not None:
+            metrics = report.add_stage(stage)
+            env[STAGE_STATS_ENV] = str(stats_path)
+        
+        success = run_command(str(script), description, args, metrics=metrics, env=env)
+        
+        if metrics is not None:
+            read_stage_stats(stats_path, metrics)
+        
+        if not success:
+            print(f"\n✗ Pipeline failed at step {i}")
+            print("Fix the errors and run again.")
+            sys.exit(1)
+    
+    stats_dir.cleanup()
+
+def run_in_process_pipeline(input_file=INPUT_FILE, debug_tap=False,
+                            batch_size=DEFAULT_BATCH_SIZE, workers=1,
+                            chunk_size=DEFAULT_CHUNK_SIZE, bulk=False,
+                            incremental=False, report=None, dead_letter_dir=DEAD_LETTER_DIR):
+    """
+    Run all stages in this interpreter as a chain of generators.
+    Records flow one at a time from the XML parser to the loader, which
+    commits every batch_size records; intermediate NDJSON files are only
+    written when debug_tap is set. workers > 1 categorizes in a process
+    pool (see categorize.iter_categorize_records); bulk switches to the
+    executemany loader. incremental skips every message dated before
+    the stored high-watermark and moves it forward after the load, to
+    the newest message extracted: records the clean or load step
+    rejected are not retried by later incremental runs, and have to be
+    replayed by hand from their dead-letter files.
+    With report (a RunReport), every stage is metered and added to it.
+    Rejected records go to dead-letter files in dead_letter_dir.
+    """
+    if report is None:
+        report = RunReport('in-process')
+    
+    print(f"\n{'='*60}")
+    print("Running: Extract -> Clean -> Categorize -> Load (in-process)")
+    print(f"{'='*60}")
+    
+    extract_stats = {}
+    clean_stats = {}
+    categorize_stats = {}
+    batch_state = {}
+    load_stats = {}
+    clean_dead_letter = DeadLetterWriter('clean', dead_letter_dir)
+    load_dead_letter = DeadLetterWriter('load', dead_letter_dir)
+    
+    since = None
+    if incremental:
+        ensure_schema()
+        since, last_hash = get_watermark()
+        if since is None:
+            print("No watermark yet - ingesting the full backup")
+        else:
+            print(f"Resuming from SMS date {since} (last batch {last_hash[:12]})")
+    
+    # Taps and batch tracking sit inside each meter so their cost is
+    # counted against the stage they belong to
+    records = iter_sms(input_file, since=since, stats=extract_stats)
+    if incremental:
+        records = track_batch(records, batch_state)
+    if debug_tap:
+        records = tap_records(records, PROCESSED_DIR / '01_extracted_raw.ndjson.gz')
+    records = report.meter('extract', records)
+    
+    records = iter_clean_normalize(records, clean_stats, clean_dead_letter)
+    if debug_tap:
+        records = tap_records(records, PROCESSED_DIR / '02_cleaned_normalized.ndjson.gz')
+    records = report.meter('clean', records)
+    
+    records = iter_categorize_records(
+        records, categorize_stats, workers=workers, chunk_size=chunk_size
+    )
+    if debug_tap:
+        records = tap_records(records, PROCESSED_DIR / '03_categorized.ndjson.gz')
+    records = report.meter('categorize', records)
+    
+    if bulk:
+        def loader(records):
+            return bulk_load_records(records, preload_refs=not incremental,
+                                     stats=load_stats, dead_letter=load_dead_letter)
+    else:
+        def loader(records):
+            return load_records_to_db(records, batch_size=batch_size,
+                                      stats=load_stats, dead_letter=load_dead_letter)
+    
+    try:
+        loaded_count = report.consume('load', loader, records)
+        
+        if incremental and batch_state['max_date'] is not None:
+            save_watermark(batch_state['max_date'], batch_state['hash'])
+    except Exception as e:
+        print(f"\n✗ Pipeline failed: {e}")
+        sys.exit(1)
+    finally:
+        clean_dead_letter.close()
+        load_dead_letter.close()
+    
+    report.finish()
+    stages = report.stages
+    stages['extract'].records_in = extract_stats['sms_read']
+    stages['extract'].skipped = extract_stats['sms_read'] - stages['extract'].records_out
+    stages['clean'].records_in = stages['extract'].records_out
+    stages['clean'].skipped = clean_stats['skipped']
+    stages['categorize'].records_in = stages['clean'].records_out
+    stages['categorize'].skipped = categorize_stats['skipped']
+    stages['load'].records_in = stages['categorize'].records_out
+    stages['load'].records_out = loaded_count
+    stages['load'].skipped = load_stats['skipped']
+    stages['clean'].extra['rejected'] = dict(clean_dead_letter.counts)
+    stages['load'].extra['rejected'] = dict(load_dead_letter.counts)
+    
+    print(f"\nPipeline Summary:")
+    print(f"   Input: {input_file}")
+    if incremental:
+        print(f"   Already ingested (skipped): {extract_stats['skipped_old']}")
+        print(f"   New messages: {batch_state['count']}")
+        if batch_state['max_date'] is not None:
+            print(f"   Watermark: {batch_state['max_date']} (batch {batch_state['hash'][:12]})")
+    print(f"   Invalid records skipped: {clean_stats.get('skipped', 0)}")
+    if clean_dead_letter.total:
+        print(f"     ({clean_dead_letter.summary()}) -> {clean_dead_letter.path}")
+        if incremental:
+            print("     Not retried by later incremental runs - replay them by hand")
+    print(f"   Non-transaction messages skipped: {categorize_stats.get('skipped', 0)}")
+    print(f"   Loaded: {loaded_count} transactions")
+    if load_dead_letter.total:
+        print(f"   Duplicate/invalid records skipped: {load_dead_letter.total}")
+        print(f"     ({load_dead_letter.summary()}) -> {load_dead_letter.path}")
+        # Duplicates are already loaded; anything else is lost to incremental runs
+        if incremental and load_dead_letter.total > load_dead_letter.counts.get('duplicate', 0):
+            print("     Not retried by later incremental runs - replay them by hand")
+    if debug_tap:
+        print(f"   Intermediate files: {PROCESSED_DIR}")
+
+def parse_args(argv=None):
+    """Command line options for the ETL pipeline"""
+    parser = argparse.ArgumentParser(description="MoMo SMS ETL Pipeline")
+    parser.add_argument('--in-process', action='store_true',
+                        help="chain the stages as generators in one interpreter")
+    parser.add_argument('--debug-tap', action='store_true',
+                        help="also write the intermediate NDJSON files (in-process only)")
+    parser.add_argument('--workers', type=workers_arg, default=1,
+                        help="categorize worker processes (0 = all CPU cores, default: 1)")
+    parser.add_argument('--chunk-size', type=chunk_size_arg, default=DEFAULT_CHUNK_SIZE,
+                        help=f"records per categorize chunk (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument('--bulk', action='store_true',
+                        help="load with executemany batches instead of one flush per record")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only ingest messages from the stored watermark on "
+                             "(implies --in-process); rejected records are not "
+                             "retried, replay them from data/logs/dead_letter/")
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help="trace Python allocations and report the largest per stage "
+                             "(slows the run down)")
+    return parser.parse_args(argv)
 
 def main():
     """Run the complete ETL pipeline"""
+    args = parse_args()
+    
     print("="*60)
     print("MoMo SMS ETL Pipeline")
     print("="*60)
     print("This will run the complete Extract-Transform-Load process:")
-    print("  1. Extract: Parse XML to raw JSON")
+    print("  1. Extract: Parse XML to raw records")
     print("  2. Transform: Clean & normalize data")
     print("  3. Transform: Categorize transactions")
     print("  4. Load: Save to SQLite database")
@@ -42,34 +293,38 @@ def main():
             print("Exiting...")
             sys.exit(0)
     
-    # Get the etl directory
-    etl_dir = Path(__file__).parent
+    in_process = args.in_process or args.incremental
+    report = RunReport(
+        'in-process' if in_process else 'subprocess',
+        options=vars(args), trace_memory=args.tracemalloc
+    )
     
-    # Define pipeline steps
-    steps = [
-        (etl_dir / 'parse_xml.py', 'Step 1: Extract (Parse XML)'),
-        (etl_dir / 'clean_normalize.py', 'Step 2: Transform (Clean & Normalize)'),
-        (etl_dir / 'categorize.py', 'Step 3: Transform (Categorize)'),
-        (etl_dir / 'load_db.py', 'Step 4: Load (Save to Database)'),
-    ]
+    if in_process:
+        run_in_process_pipeline(
+            debug_tap=args.debug_tap, workers=args.workers, chunk_size=args.chunk_size,
+            bulk=args.bulk, incremental=args.incremental, report=report
+        )
+    else:
+        run_subprocess_pipeline(
+            workers=args.workers, chunk_size=args.chunk_size, bulk=args.bulk,
+            report=report
+        )
+        report.finish()
     
-    # Run each step
-    for i, (script, description) in enumerate(steps, 1):
-        if not script.exists():
-            print(f"✗ Error: Script not found: {script}")
-            sys.exit(1)
-        
-        success = run_command(str(script), description)
-        
-        if not success:
-            print(f"\n✗ Pipeline failed at step {i}")
-            print("Fix the errors and run again.")
-            sys.exit(1)
+    # In subprocess mode, the largest of the stage scripts
+    peak_rss = report.peak_rss_mb()
+    report.print_summary()
+    report_path = report.write()
     
     # Success!
     print("="*60)
     print("✓ ETL PIPELINE COMPLETED SUCCESSFULLY!")
     print("="*60)
+    print(f"  Mode:      {report.mode}")
+    print(f"  Wall time: {report.wall_time:.2f}s")
+    if peak_rss is not None:
+        print(f"  Peak RSS:  {peak_rss:.1f} MB")
+    print(f"  Report:    {report_path}")
     print("\nNext steps:")
     print("  1. Start API server: python api/app.py")
     print("  2. Run DSA comparison: python dsa/search_comparison.py")
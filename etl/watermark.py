@@ -0,0 +1,78 @@
+"""
+High-watermark helpers for incremental ETL runs.
+
+The highest SMS 'date' already ingested is stored per source in the
+Etl_Watermarks table. An incremental run passes it to
+parse_xml.iter_sms(since=...) so older messages are dropped inside the
+extractor, and only the rest are cleaned, categorized and loaded.
+Messages dated exactly at the watermark are read again, and those
+already loaded are rejected by the loader's external_ref check; the
+batch hash is kept for the run log only.
+"""
+
+import hashlib
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add database to path
+sys.path.append(str(Path(__file__).parent.parent / 'database'))
+
+from db_config import get_session
+from models import EtlWatermark
+
+# Watermark key used for the phone SMS backup
+DEFAULT_SOURCE = 'sms_backup'
+
+def get_watermark(source_name=DEFAULT_SOURCE):
+    """
+    Return (last_sms_date, last_batch_hash) for a source,
+    or (None, None) if it has never been ingested.
+    """
+    session = get_session()
+    try:
+        watermark = session.query(EtlWatermark).filter_by(source_name=source_name).first()
+        if not watermark:
+            return None, None
+        return watermark.last_sms_date, watermark.last_batch_hash
+    finally:
+        session.close()
+
+def save_watermark(last_sms_date, batch_hash, source_name=DEFAULT_SOURCE):
+    """Move the watermark of a source forward after a successful load"""
+    session = get_session()
+    try:
+        watermark = session.query(EtlWatermark).filter_by(source_name=source_name).first()
+        if not watermark:
+            watermark = EtlWatermark(source_name=source_name, last_sms_date=last_sms_date)
+            session.add(watermark)
+        watermark.last_sms_date = max(watermark.last_sms_date, last_sms_date)
+        watermark.last_batch_hash = batch_hash
+        watermark.updated_at = datetime.now()
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+def track_batch(sms_records, state):
+    """
+    Pass raw SMS records through unchanged while recording the batch
+    size, the highest numeric 'date' and a SHA-256 over every record's
+    date and body in state ('count', 'max_date', 'hash').
+    """
+    digest = hashlib.sha256()
+    state.update(count=0, max_date=None, hash=None)
+
+    for sms in sms_records:
+        date_raw = sms.get('date') or ''
+        digest.update(f"{date_raw}\x1f{sms.get('body')}\x1e".encode('utf-8'))
+        state['count'] += 1
+        if date_raw.isdigit():
+            date_ms = int(date_raw)
+            if state['max_date'] is None or date_ms > state['max_date']:
+                state['max_date'] = date_ms
+        yield sms
+
+    state['hash'] = digest.hexdigest()
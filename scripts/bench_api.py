@@ -0,0 +1,209 @@
+"""
+API Concurrency Benchmark
+Seeds a temporary SQLite database with synthetic transactions, starts
+the API server in a child process (single-threaded HTTPServer, the
+pooled server or the asyncio server, for each entry of --workers) and
+hits it from concurrent client threads with a mix of single-transaction
+GETs, filtered list GETs and PUT updates. Each client reuses one
+connection, so the asyncio server keeps it alive while the threaded
+servers close it after each response and the client reconnects. Reports throughput and p50/p99
+latency, overall and for the fast single-transaction GETs that a slow
+list request holds up.
+
+Usage: python scripts/bench_api.py [--transactions 2000] [--clients 16]
+       [--requests 50] [--workers 1,8,async8]
+"""
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import http.client
+import io
+import json
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add etl, database and api to path
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent.parent / 'database'))
+sys.path.append(str(Path(__file__).parent.parent / 'api'))
+
+import db_config
+from bench_load import synthetic_transactions, use_temporary_database
+
+AUTH_HEADER = 'Basic ' + base64.b64encode(b'admin:password123').decode()
+
+# Share of each request kind in the load mix
+REQUEST_MIX = (('item', 0.85), ('list', 0.10), ('update', 0.05))
+
+def parse_server(spec):
+    """'8' -> (False, 8) threaded; 'async8' -> (True, 8) asyncio"""
+    if spec.startswith('async'):
+        return True, int(spec[len('async'):] or 8)
+    return False, int(spec)
+
+def serve(db_path, port, spec):
+    """Child mode: run the API against the benchmark database"""
+    from app import TransactionHandler, create_server
+    from async_server import AsyncAPIServer
+
+    engine = db_config.create_db_engine(f"sqlite:///{db_path}")
+    db_config.SessionLocal.configure(bind=engine)
+    # Keep per-request access logs off the timings
+    TransactionHandler.log_message = lambda *args: None
+
+    use_async, workers = parse_server(spec)
+    if use_async:
+        asyncio.run(AsyncAPIServer(port=port, workers=workers).serve_forever())
+    else:
+        create_server(port, workers).serve_forever()
+
+def seed_database(directory, count):
+    """Create and fill the benchmark database, return its path"""
+    from load_db import bulk_load_records
+
+    engine = use_temporary_database(directory, 'bench_api.sqlite3')
+    with contextlib.redirect_stdout(io.StringIO()):
+        bulk_load_records(synthetic_transactions(count))
+    engine.dispose()
+    return Path(directory) / 'bench_api.sqlite3'
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+def wait_for_port(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('localhost', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"server on port {port} did not start")
+
+def send(connection, kind, transaction_count, rng):
+    """Send one request of the given kind, return its latency in seconds"""
+    transaction_id = rng.randint(1, transaction_count)
+    body = None
+    if kind == 'item':
+        method, path = 'GET', f'/transactions/{transaction_id}'
+    elif kind == 'list':
+        method, path = 'GET', '/transactions?status=PENDING'
+    else:
+        method, path = 'PUT', f'/transactions/{transaction_id}'
+        body = json.dumps({'amount': rng.randint(100, 50000)})
+
+    headers = {'Authorization': AUTH_HEADER, 'Content-Type': 'application/json'}
+    start = time.perf_counter()
+    # Reconnects by itself after a response that closed the connection
+    connection.request(method, path, body=body, headers=headers)
+    response = connection.getresponse()
+    response.read()
+    elapsed = time.perf_counter() - start
+    if response.status != 200:
+        raise RuntimeError(f"{method} {path} returned {response.status}")
+    return elapsed
+
+def run_load(port, clients, requests_per_client, transaction_count):
+    """Run the client threads, return (elapsed, {kind: [latencies]})"""
+    latencies = {kind: [] for kind, _ in REQUEST_MIX}
+    errors = []
+    lock = threading.Lock()
+
+    def client(seed):
+        rng = random.Random(seed)
+        kinds, weights = zip(*REQUEST_MIX)
+        connection = http.client.HTTPConnection('localhost', port, timeout=120)
+        for _ in range(requests_per_client):
+            kind = rng.choices(kinds, weights)[0]
+            try:
+                elapsed = send(connection, kind, transaction_count, rng)
+            except Exception as e:
+                connection.close()
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                latencies[kind].append(elapsed)
+        connection.close()
+
+    threads = [threading.Thread(target=client, args=(seed,)) for seed in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if errors:
+        raise RuntimeError(f"{len(errors)} failed requests, e.g. {errors[0]}")
+    return elapsed, latencies
+
+def percentile(values, pct):
+    return statistics.quantiles(values, n=100)[pct - 1] * 1000 if len(values) > 1 else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description="API concurrency benchmark")
+    parser.add_argument('--transactions', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=50, help="requests per client")
+    parser.add_argument('--workers', default='1,8,async8',
+                        help="comma separated servers: worker counts (1 = single-threaded) "
+                             "or asyncN for the asyncio server with N threads")
+    parser.add_argument('--serve', nargs=3, metavar=('DB', 'PORT', 'WORKERS'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve[0], int(args.serve[1]), args.serve[2])
+        return
+
+    print("=" * 60)
+    print("API CONCURRENCY BENCHMARK")
+    print("=" * 60)
+    print(f"Transactions: {args.transactions}  Clients: {args.clients}  "
+          f"Requests: {args.clients * args.requests}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = seed_database(directory, args.transactions)
+        for spec in args.workers.split(','):
+            port = free_port()
+            server = subprocess.Popen(
+                [sys.executable, __file__, '--serve', str(db_path), str(port), spec]
+            )
+            try:
+                wait_for_port(port)
+                elapsed, latencies = run_load(
+                    port, args.clients, args.requests, args.transactions
+                )
+            finally:
+                server.terminate()
+                server.wait()
+            results.append((spec, elapsed, latencies))
+
+    print(f"\n{'Server':<16} {'req/sec':>9} {'p50 ms':>9} {'p99 ms':>9} "
+          f"{'item p50':>9} {'item p99':>9}")
+    for spec, elapsed, latencies in results:
+        all_latencies = [value for values in latencies.values() for value in values]
+        use_async, workers = parse_server(spec)
+        if use_async:
+            name = f'asyncio x{workers}'
+        else:
+            name = 'HTTPServer' if workers <= 1 else f'pooled x{workers}'
+        print(f"{name:<16} {len(all_latencies) / elapsed:>9.1f} "
+              f"{percentile(all_latencies, 50):>9.1f} {percentile(all_latencies, 99):>9.1f} "
+              f"{percentile(latencies['item'], 50):>9.1f} {percentile(latencies['item'], 99):>9.1f}")
+
+if __name__ == '__main__':
+    main()
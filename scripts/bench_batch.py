@@ -0,0 +1,156 @@
+"""
+Batch Endpoint Benchmark
+Starts the API against a temporary seeded database and creates, then
+deletes, the same number of transactions twice: one POST / DELETE
+request per item, and through POST / DELETE /transactions/batch in
+batches. Each run reuses one HTTP connection. Reports items per second
+and checks per-item results, including a batch mixing valid and
+invalid items.
+
+Usage: python scripts/bench_batch.py [--items 2000] [--batch-size 500]
+       [--server async8]
+"""
+
+import argparse
+import http.client
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add etl, database and api to path
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent.parent / 'database'))
+sys.path.append(str(Path(__file__).parent.parent / 'api'))
+
+from bench_api import AUTH_HEADER, free_port, wait_for_port, seed_database
+
+BENCH_API = Path(__file__).parent / 'bench_api.py'
+
+def make_item(prefix, index):
+    return {
+        'external_ref': f'{prefix}-{index}',
+        'amount': 1000 + index,
+        'raw_data': f'Batch benchmark transaction {index}',
+        'transaction_date': f'2024-06-{index % 28 + 1:02d}T12:00:00',
+        'category_code': 'PAYMENT',
+        'fee_amount': 25,
+    }
+
+def call(connection, method, path, body=None):
+    """Send one request, return (status, parsed body)"""
+    connection.request(method, path, body=json.dumps(body) if body is not None else None, headers={
+        'Authorization': AUTH_HEADER, 'Content-Type': 'application/json',
+    })
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+def single_requests(connection, items):
+    """Create then delete each item with its own request, return (ids, create s, delete s)"""
+    start = time.perf_counter()
+    ids = []
+    for item in items:
+        status, result = call(connection, 'POST', '/transactions', item)
+        assert status == 201, result
+        ids.append(result['data']['transaction_id'])
+    created = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for transaction_id in ids:
+        status, result = call(connection, 'DELETE', f'/transactions/{transaction_id}')
+        assert status == 200, result
+    return ids, created, time.perf_counter() - start
+
+def batch_requests(connection, items, batch_size):
+    """Create then delete the items in batches, return (ids, create s, delete s)"""
+    start = time.perf_counter()
+    ids = []
+    for offset in range(0, len(items), batch_size):
+        status, result = call(connection, 'POST', '/transactions/batch', items[offset:offset + batch_size])
+        assert status == 201, result
+        ids.extend(item['transaction_id'] for item in result['results'])
+    created = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for offset in range(0, len(ids), batch_size):
+        status, result = call(connection, 'DELETE', '/transactions/batch', ids[offset:offset + batch_size])
+        assert status == 200 and result['succeeded'] == len(ids[offset:offset + batch_size]), result
+    return ids, created, time.perf_counter() - start
+
+def check_mixed_batch(connection):
+    """Invalid items are reported per item while the valid ones are written"""
+    items = [
+        make_item('MIXED', 0),
+        {'external_ref': 'MIXED-1', 'amount': 10},
+        {**make_item('MIXED', 2), 'transaction_date': 'yesterday'},
+        {**make_item('MIXED', 3), 'amount': 'lots'},
+        make_item('MIXED', 4),
+        {**make_item('MIXED', 5), 'raw_data': None},
+        {**make_item('MIXED', 6), 'external_ref': ['MIXED-6']},
+        {**make_item('MIXED', 7), 'amount': float('inf')},
+    ]
+    status, result = call(connection, 'POST', '/transactions/batch', items)
+    statuses = [item['status'] for item in result['results']]
+    created = [item['transaction_id'] for item in result['results'] if item['status'] == 201]
+    ok = status == 207 and statuses == [201, 400, 400, 400, 201, 400, 400, 400]
+
+    status_get, stored = call(connection, 'GET', f'/transactions/{created[0]}')
+    ok = ok and status_get == 200 and stored['data']['external_ref'] == 'MIXED-0'
+
+    status, result = call(connection, 'DELETE', '/transactions/batch', created + [999999999, 'x'])
+    statuses = [item['status'] for item in result['results']]
+    ok = ok and status == 207 and statuses == [200, 200, 404, 400]
+
+    status, _ = call(connection, 'GET', f'/transactions/{created[0]}')
+    ok = ok and status == 404
+    status, _ = call(connection, 'POST', '/transactions/batch', {'not': 'an array'})
+    return ok and status == 400
+
+def main():
+    parser = argparse.ArgumentParser(description="Single vs batch write endpoint benchmark")
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--server', default='async8',
+                        help="server as in bench_api.py --workers (default: async8)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BATCH ENDPOINT BENCHMARK")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = seed_database(directory, 1000)
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, str(BENCH_API), '--serve', str(db_path), str(port), args.server]
+        )
+        try:
+            wait_for_port(port)
+            connection = http.client.HTTPConnection('localhost', port, timeout=600)
+            _, single_create, single_delete = single_requests(
+                connection, [make_item('SINGLE', i) for i in range(args.items)]
+            )
+            _, batch_create, batch_delete = batch_requests(
+                connection, [make_item('BATCH', i) for i in range(args.items)], args.batch_size
+            )
+            mixed_ok = check_mixed_batch(connection)
+            connection.close()
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"Items: {args.items}  Batch size: {args.batch_size}  Server: {args.server}\n")
+    print(f"{'Operation':<10} {'single items/s':>15} {'batch items/s':>14} {'speedup':>8}")
+    for name, single, batch in (('create', single_create, batch_create),
+                                 ('delete', single_delete, batch_delete)):
+        print(f"{name:<10} {args.items / single:>15.0f} {args.items / batch:>14.0f} "
+              f"{single / batch:>7.1f}x")
+    print(f"\nMixed valid/invalid batch reported per item: {mixed_ok}")
+
+    if not mixed_ok:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
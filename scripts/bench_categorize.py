@@ -0,0 +1,101 @@
+"""
+Categorization Benchmark
+Compares the original regex helpers in etl/categorize.py with the
+precompiled extract_transaction engine on a synthetic SMS corpus, and
+reports any message on which they differ (the equivalence itself is
+tested in tests/test_categorize.py).
+With --workers, also measures how categorize_records scales over a
+process pool and checks the parallel output matches the serial one.
+
+Usage: python scripts/bench_categorize.py [num_messages] [--workers 1,2,4,8,16]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add etl to path
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+
+from categorize import (
+    extract_transaction_details, categorize_transaction, determine_status,
+    extract_transaction, iter_categorize_records, chunk_size_arg, DEFAULT_CHUNK_SIZE
+)
+from sms_corpus import synthetic_bodies
+
+def legacy_extract(body):
+    """Original three-function path, as used by categorize_record before"""
+    details = extract_transaction_details(body)
+    if 'external_ref' not in details:
+        return None
+    details['category_code'] = categorize_transaction(body)
+    details['transaction_status'] = determine_status(body)
+    return details
+
+def measure(extract_func, bodies):
+    """Return messages/sec and results for one extraction function"""
+    start = time.perf_counter()
+    results = [extract_func(body) for body in bodies]
+    elapsed = time.perf_counter() - start
+    return len(bodies) / elapsed, results
+
+def measure_scaling(bodies, worker_counts, chunk_size):
+    """Time iter_categorize_records for each worker count"""
+    records = [{'body': body} for body in bodies]
+    serial = list(iter_categorize_records(records))
+
+    print(f"\n{'Workers':>8} {'messages/sec':>14} {'speedup':>9}  identical")
+    baseline = None
+    all_identical = True
+    for workers in worker_counts:
+        start = time.perf_counter()
+        result = list(iter_categorize_records(records, workers=workers, chunk_size=chunk_size))
+        rate = len(records) / (time.perf_counter() - start)
+        baseline = baseline or rate
+        identical = result == serial
+        all_identical = all_identical and identical
+        print(f"{workers:>8} {rate:>14,.0f} {rate / baseline:>8.2f}x  {identical}")
+    return all_identical
+
+def main():
+    parser = argparse.ArgumentParser(description="Categorization benchmark")
+    parser.add_argument('count', type=int, nargs='?', default=100000,
+                        help="number of synthetic messages (default: 100000)")
+    parser.add_argument('--workers', default=None,
+                        help="comma separated worker counts to measure, e.g. 1,2,4,8,16")
+    parser.add_argument('--chunk-size', type=chunk_size_arg, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+    count = args.count
+
+    print("=" * 60)
+    print("CATEGORIZATION BENCHMARK")
+    print("=" * 60)
+    print(f"Generating {count} synthetic messages...")
+    bodies = synthetic_bodies(count)
+
+    legacy_rate, legacy_results = measure(legacy_extract, bodies)
+    engine_rate, engine_results = measure(extract_transaction, bodies)
+
+    mismatches = [
+        body for body, old, new in zip(bodies, legacy_results, engine_results)
+        if old != new
+    ]
+
+    print(f"\nLegacy helpers:     {legacy_rate:12,.0f} messages/sec")
+    print(f"Compiled engine:    {engine_rate:12,.0f} messages/sec")
+    print(f"Speedup:            {engine_rate / legacy_rate:12.2f}x")
+    print(f"\nResults identical:  {not mismatches}")
+    for body in mismatches[:5]:
+        print(f"  Mismatch: {body}")
+
+    scaling_ok = True
+    if args.workers:
+        worker_counts = [int(w) for w in args.workers.split(',')]
+        scaling_ok = measure_scaling(bodies, worker_counts, args.chunk_size)
+
+    if mismatches or not scaling_ok:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
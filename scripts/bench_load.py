@@ -0,0 +1,92 @@
+"""
+Loader Benchmark
+Compares load_records_to_db (one query and flush per record) with
+bulk_load_records (executemany batches) by loading the same synthetic
+transactions into a fresh temporary SQLite database for each loader.
+
+Usage: python scripts/bench_load.py [num_transactions]
+"""
+
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add etl and database to path
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent.parent / 'database'))
+
+import db_config
+from models import Base
+from search import ensure_search_index
+from init_db import seed_data
+from categorize import categorize_record
+from load_db import load_records_to_db, bulk_load_records
+from sms_corpus import synthetic_bodies
+
+def synthetic_transactions(count):
+    """Build count categorized records with unique external refs"""
+    start_date = datetime(2024, 5, 1)
+    records = []
+    for i, body in enumerate(synthetic_bodies(count * 2)):
+        record = categorize_record({
+            'body': body,
+            'transaction_date': (start_date + timedelta(minutes=i)).isoformat(),
+        })
+        if record is None:
+            continue
+        record['external_ref'] = str(10**10 + len(records))
+        records.append(record)
+        if len(records) == count:
+            break
+    return records
+
+def use_temporary_database(directory, name):
+    """Point db_config sessions at a fresh, seeded SQLite file"""
+    engine = db_config.create_db_engine(f"sqlite:///{Path(directory) / name}")
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    db_config.SessionLocal.configure(bind=engine)
+    with contextlib.redirect_stdout(io.StringIO()):
+        seed_data()
+    return engine
+
+def time_loader(load_func, records):
+    """Run a loader with its progress output suppressed, return seconds"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        loaded = load_func(records)
+    elapsed = time.perf_counter() - start
+    assert loaded == len(records), f"loaded {loaded} of {len(records)}"
+    return elapsed
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    print("=" * 60)
+    print("LOADER BENCHMARK")
+    print("=" * 60)
+    records = synthetic_transactions(count)
+    print(f"Transactions: {len(records)}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name, load_func in [
+            ('Per-record ORM (load_records_to_db)', load_records_to_db),
+            ('Bulk executemany (bulk_load_records)', bulk_load_records),
+        ]:
+            engine = use_temporary_database(directory, f"{load_func.__name__}.sqlite3")
+            elapsed = time_loader(load_func, records)
+            engine.dispose()
+            results.append((name, elapsed))
+
+    print()
+    for name, elapsed in results:
+        print(f"{name:<40} {elapsed:8.2f}s {len(records) / elapsed:12,.0f} rows/sec")
+    print(f"\nSpeedup: {results[0][1] / results[1][1]:.1f}x")
+
+if __name__ == '__main__':
+    main()
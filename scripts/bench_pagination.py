@@ -0,0 +1,104 @@
+"""
+Pagination Benchmark
+Loads synthetic transactions into a temporary SQLite database, then
+compares fetching a page at increasing depths with keyset pagination
+(api/pagination.py) and with LIMIT/OFFSET. Also walks every keyset page
+to check each transaction is returned exactly once, and prints the
+query plan to confirm the composite index is used.
+
+Usage: python scripts/bench_pagination.py [num_transactions] [--limit 100]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add etl, database and api to path
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent.parent / 'database'))
+sys.path.append(str(Path(__file__).parent.parent / 'api'))
+
+from sqlalchemy import text
+
+import db_config
+from models import Transaction
+from load_db import bulk_load_records
+from pagination import paginate, order_by_key, encode_cursor
+from bench_load import synthetic_transactions, use_temporary_database
+
+def time_page(fetch, repeat=5):
+    """Best-of-repeat milliseconds for one page fetch"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fetch()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyset vs OFFSET pagination benchmark")
+    parser.add_argument('count', type=int, nargs='?', default=100000)
+    parser.add_argument('--limit', type=int, default=100)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("PAGINATION BENCHMARK")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = use_temporary_database(directory, 'bench_pagination.sqlite3')
+        with contextlib.redirect_stdout(io.StringIO()):
+            bulk_load_records(synthetic_transactions(args.count))
+        session = db_config.get_session()
+        total = session.query(Transaction).count()
+        print(f"Transactions: {total}  Page size: {args.limit}")
+
+        # Walk every page and check nothing is skipped or repeated
+        seen = []
+        cursor = None
+        start = time.perf_counter()
+        while True:
+            page, cursor = paginate(session.query(Transaction), args.limit, cursor)
+            seen.extend(t.transaction_id for t in page)
+            session.expunge_all()
+            if cursor is None:
+                break
+        walk_time = time.perf_counter() - start
+        complete = len(seen) == total and len(set(seen)) == total
+        print(f"Full keyset walk: {walk_time:.2f}s, every row exactly once: {complete}")
+
+        ordered = order_by_key(session.query(Transaction))
+        print(f"\n{'Depth':>10} {'keyset ms':>10} {'offset ms':>10}")
+        for fraction in (0, 0.1, 0.5, 0.9, 0.99):
+            depth = int(total * fraction)
+            cursor = None
+            if depth:
+                row = ordered.offset(depth - 1).limit(1).one()
+                cursor = encode_cursor(row)
+            keyset_ms = time_page(lambda: paginate(session.query(Transaction), args.limit, cursor))
+            offset_ms = time_page(lambda: ordered.offset(depth).limit(args.limit).all())
+            session.expunge_all()
+            print(f"{depth:>10} {keyset_ms:>10.2f} {offset_ms:>10.2f}")
+
+        plan = session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT transaction_id FROM Transactions "
+            "WHERE (transaction_date, transaction_id) < ('2030-01-01', 1) "
+            "ORDER BY transaction_date DESC, transaction_id DESC LIMIT 101"
+        )).all()
+        print("\nQuery plan:")
+        for row in plan:
+            print(f"  {row[-1]}")
+
+        session.close()
+        engine.dispose()
+
+    if not complete:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Response Payload Benchmark
+Loads synthetic transactions into a temporary database and fetches the
+full GET /transactions listing from a fresh server process per format:
+indented JSON (the format before compact serialization, now ?pretty=1),
+compact JSON, compact JSON with gzip, and the gzip-compressed stream
+(?stream=1). Each format is fetched twice on one connection, cold and
+then from the response cache. Reports bytes on the wire, time to first
+byte and total time, and checks every body decodes to the same rows.
+
+Usage: python scripts/bench_payload.py [num_transactions] [--server async8]
+"""
+
+import argparse
+import contextlib
+import gzip
+import http.client
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add etl, database and api to path
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent.parent / 'database'))
+sys.path.append(str(Path(__file__).parent.parent / 'api'))
+
+from load_db import bulk_load_records
+from bench_load import synthetic_transactions, use_temporary_database
+from bench_api import AUTH_HEADER, free_port, wait_for_port
+
+BENCH_API = Path(__file__).parent / 'bench_api.py'
+
+# (label, path, Accept-Encoding)
+FORMATS = [
+    ('pretty', '/transactions?pretty=1', 'identity'),
+    ('compact', '/transactions', 'identity'),
+    ('compact+gzip', '/transactions', 'gzip'),
+    ('stream+gzip', '/transactions?stream=1', 'gzip'),
+]
+
+def fetch(connection, path, accept_encoding):
+    """Return (wire bytes, ttfb seconds, total seconds, decoded body)"""
+    start = time.perf_counter()
+    connection.request('GET', path, headers={
+        'Authorization': AUTH_HEADER, 'Accept-Encoding': accept_encoding,
+    })
+    response = connection.getresponse()
+    first = response.read(1)
+    ttfb = time.perf_counter() - start
+    body = first + response.read()
+    total = time.perf_counter() - start
+    if response.status != 200:
+        raise RuntimeError(f"GET {path} returned {response.status}")
+    wire = len(body)
+    if response.getheader('Content-Encoding') == 'gzip':
+        body = gzip.decompress(body)
+    return wire, ttfb, total, json.loads(body)
+
+def main():
+    parser = argparse.ArgumentParser(description="Listing payload size and latency benchmark")
+    parser.add_argument('count', type=int, nargs='?', default=100000)
+    parser.add_argument('--server', default='async8',
+                        help="server as in bench_api.py --workers (default: async8)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("RESPONSE PAYLOAD BENCHMARK")
+    print("=" * 60)
+
+    rows = []
+    reference = None
+    same = True
+    with tempfile.TemporaryDirectory() as directory:
+        engine = use_temporary_database(directory, 'bench_payload.sqlite3')
+        with contextlib.redirect_stdout(io.StringIO()):
+            bulk_load_records(synthetic_transactions(args.count))
+        engine.dispose()
+        db_path = Path(directory) / 'bench_payload.sqlite3'
+        print(f"Transactions: {args.count}")
+
+        for label, path, accept_encoding in FORMATS:
+            port = free_port()
+            server = subprocess.Popen(
+                [sys.executable, str(BENCH_API), '--serve', str(db_path), str(port), args.server]
+            )
+            try:
+                wait_for_port(port)
+                connection = http.client.HTTPConnection('localhost', port, timeout=600)
+                for attempt in ('cold', 'cached'):
+                    wire, ttfb, total, body = fetch(connection, path, accept_encoding)
+                    rows.append((label, attempt, wire, ttfb, total))
+                    if reference is None:
+                        reference = body
+                    same = same and body == reference
+                    del body
+                connection.close()
+            finally:
+                server.terminate()
+                server.wait()
+
+    print(f"\n{'Format':<14} {'Fetch':<7} {'Wire MB':>9} {'vs pretty':>10} "
+          f"{'TTFB ms':>9} {'Total ms':>9}")
+    baseline = rows[0][2]
+    for label, attempt, wire, ttfb, total in rows:
+        print(f"{label:<14} {attempt:<7} {wire / 1e6:>9.2f} {wire / baseline:>9.1%} "
+              f"{ttfb * 1000:>9.1f} {total * 1000:>9.1f}")
+    print(f"\nAll formats decode to the same {len(reference['data'])} transactions: {same}")
+
+    if not same:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""
+Full-Text Search Benchmark
+Loads synthetic transactions into a temporary database and checks
+GET /transactions?q= in-process: the FTS5 index stays in sync through
+the bulk load, POST, PUT, DELETE and the batch endpoints (FTS5
+integrity-check after each), matches on counter_party and external_ref
+rank first, and the query searches the FTS5 index rather than scanning
+Transactions. Times searches against the client-side alternative of
+fetching the full listing (which cannot even search the SMS body), and
+the bulk load with and without the index triggers. Search results are
+checked against the same words matched in Python over every row. Exits 1 if a check fails.
+
+Usage: python scripts/bench_search.py [num_transactions]
+"""
+
+import re
+import sys
+import tempfile
+import time
+import unicodedata
+from pathlib import Path
+from urllib.parse import quote
+
+# Add etl, database and api to path
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent.parent / 'database'))
+sys.path.append(str(Path(__file__).parent.parent / 'api'))
+
+from sqlalchemy import text
+
+from db_config import count_queries
+from load_db import bulk_load_records
+from search import FTS_TABLE
+from bench_load import synthetic_transactions, use_temporary_database, time_loader
+from check_query_counts import call_api
+from response_cache import response_cache
+from pagination import DEFAULT_PAGE_SIZE
+
+# A plan line that reads every row of Transactions
+FULL_SCAN = re.compile(r'^SCAN "?Transactions"?( AS \w+)?$')
+
+SEARCHES = ['jane', 'Samuel Carter', 'gael', 'Hab*', 'completed', 'airtime']
+
+def index_in_sync(engine):
+    """True if the FTS5 index matches the Transactions table exactly"""
+    try:
+        with engine.begin() as connection:
+            connection.execute(text(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('integrity-check', 1)"
+            ))
+        return True
+    except Exception:
+        return False
+
+def found(query, transaction_id):
+    """True if GET /transactions?q= lists the transaction"""
+    _, result = call_api('GET', f'/transactions?q={query}&limit=1000&fields=transaction_id')
+    return any(t['transaction_id'] == transaction_id for t in result['data'])
+
+def words_of(value):
+    """Lowercase words of a text with accents removed, as FTS5 tokenizes it"""
+    plain = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode()
+    return re.findall(r'\w+', plain.lower())
+
+def expected_matches(engine, query):
+    """Ids of the transactions containing every word of the query, in Python"""
+    terms = words_of(query)
+    prefix = query.endswith('*')
+    with engine.connect() as connection:
+        rows = connection.execute(text(
+            'SELECT transaction_id, raw_data, counter_party, external_ref FROM Transactions'
+        )).all()
+    matches = set()
+    for transaction_id, *columns in rows:
+        words = set(words_of(' '.join(str(column) for column in columns)))
+        if all(term in words or (prefix and term == terms[-1] and any(w.startswith(term) for w in words))
+               for term in terms):
+            matches.add(transaction_id)
+    return matches
+
+def search_ids(query, extra=''):
+    """Ids listed by GET /transactions?q=, in rank order"""
+    _, result = call_api('GET', f'/transactions?q={quote(query)}&limit=1000{extra}')
+    return [t['transaction_id'] for t in result['data']]
+
+def check_sync(engine, report):
+    """Index follows each kind of write"""
+    status, created = call_api('POST', '/transactions', {
+        'external_ref': 'SEARCH-0001', 'amount': 1500,
+        'raw_data': 'Payment for zanzibar spices',
+        'transaction_date': '2024-06-01T09:00:00', 'counter_party': 'Kwame Mensah',
+    })
+    transaction_id = created['data']['transaction_id']
+    report('POST is searchable', status == 201 and found('zanzibar', transaction_id)
+           and found('kwame', transaction_id) and index_in_sync(engine))
+
+    call_api('PUT', f'/transactions/{transaction_id}', {'counter_party': 'Ama Owusu'})
+    report('PUT reindexes counter_party', found('owusu', transaction_id)
+           and not found('kwame', transaction_id) and index_in_sync(engine))
+
+    call_api('DELETE', f'/transactions/{transaction_id}')
+    report('DELETE removes the entry', not found('zanzibar', transaction_id)
+           and index_in_sync(engine))
+
+    _, batch = call_api('POST', '/transactions/batch', [
+        {'external_ref': f'SEARCH-B{i}', 'amount': 100 + i, 'raw_data': f'Quokka batch {i}',
+         'transaction_date': '2024-06-02T09:00:00'} for i in range(20)
+    ])
+    ids = [item['transaction_id'] for item in batch['results']]
+    _, result = call_api('GET', '/transactions?q=quokka&limit=1000')
+    report('batch POST is searchable', result['count'] == 20 and index_in_sync(engine))
+
+    call_api('DELETE', '/transactions/batch', ids)
+    _, result = call_api('GET', '/transactions?q=quokka')
+    report('batch DELETE removes the entries', result['count'] == 0 and index_in_sync(engine))
+
+def check_ranking(engine, report):
+    """Dedicated columns outrank the SMS body; diacritics and prefixes match"""
+    with engine.connect() as connection:
+        transaction_id, external_ref = connection.execute(text(
+            'SELECT transaction_id, external_ref FROM Transactions ORDER BY transaction_id LIMIT 1 OFFSET 7'
+        )).first()
+    _, result = call_api('GET', f'/transactions?q={external_ref}')
+    report('external_ref match ranks first',
+           result['count'] >= 1 and result['data'][0]['transaction_id'] == transaction_id)
+
+    _, result = call_api('GET', '/transactions?q=sophia&limit=20')
+    report('counter_party matches rank first', result['count'] > 0 and all(
+        'Sophia' in t['counter_party'] for t in result['data']))
+
+    _, result = call_api('GET', '/transactions?q=emile&limit=5')
+    report('search ignores diacritics', result['count'] > 0 and all(
+        'Émile' in t['counter_party'] for t in result['data']))
+
+    ids = search_ids('Sam*')
+    report('prefix search', ids and set(ids) <= expected_matches(engine, 'Sam*'))
+
+    _, result = call_api('GET', '/transactions?q=jane&status=PENDING&limit=1000')
+    report('q combines with filters', result['count'] > 0 and all(
+        t['transaction_status'] == 'PENDING' for t in result['data'])
+        and {t['transaction_id'] for t in result['data']} <= expected_matches(engine, 'jane'))
+
+    for path in ('/transactions?q=***', '/transactions?q=jane&cursor=abc',
+                 '/transactions?q=jane&stream=1', '/transactions?q=jane&limit=0'):
+        status, _ = call_api('GET', path)
+        report(f'{path} is a 400', status == 400)
+
+def check_plan(engine, report):
+    """The search reads the FTS5 index, not every transaction"""
+    with count_queries() as queries:
+        call_api('GET', '/transactions?q=jane&limit=50')
+    statement, parameters = next(
+        (s, p) for s, p in zip(queries.statements, queries.parameters) if FTS_TABLE in s
+    )
+    with engine.connect() as connection:
+        plan = [row[-1] for row in connection.exec_driver_sql(
+            f'EXPLAIN QUERY PLAN {statement}', parameters
+        )]
+    report('plan searches the FTS5 index', any('VIRTUAL TABLE INDEX' in line for line in plan)
+           and not any(FULL_SCAN.match(line) for line in plan))
+    for line in plan:
+        print(f"      {line}")
+
+def without_search_index(engine):
+    """Drop the index triggers and table, as before full-text search"""
+    with engine.begin() as connection:
+        for suffix in ('insert', 'delete', 'update'):
+            connection.execute(text(f'DROP TRIGGER {FTS_TABLE}_{suffix}'))
+        connection.execute(text(f'DROP TABLE {FTS_TABLE}'))
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    print("=" * 60)
+    print("FULL-TEXT SEARCH BENCHMARK")
+    print("=" * 60)
+
+    failures = 0
+    def report(label, ok):
+        nonlocal failures
+        failures += not ok
+        print(f"{label:<52} {'✓' if ok else '✗'}")
+
+    records = synthetic_transactions(count)
+    print(f"Transactions: {count}\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = use_temporary_database(directory, 'bench_search_plain.sqlite3')
+        without_search_index(engine)
+        plain_time = time_loader(bulk_load_records, records)
+        engine.dispose()
+
+        engine = use_temporary_database(directory, 'bench_search.sqlite3')
+        indexed_time = time_loader(bulk_load_records, records)
+        print(f"Bulk load without index: {plain_time:.2f}s")
+        print(f"Bulk load with index:    {indexed_time:.2f}s "
+              f"(+{(indexed_time / plain_time - 1) * 100:.0f}%)\n")
+        report('index in sync after bulk load', index_in_sync(engine))
+
+        check_sync(engine, report)
+        check_ranking(engine, report)
+        check_plan(engine, report)
+
+        response_cache.clear()
+        start = time.perf_counter()
+        call_api('GET', '/transactions')
+        listing_time = time.perf_counter() - start
+        print(f"\nFull listing for client-side search: {listing_time * 1000:.1f} ms\n")
+
+        print(f"{'q':<16} {'matches':>8} {'listed':>7} {'ms':>8}")
+        for query in SEARCHES:
+            response_cache.clear()
+            start = time.perf_counter()
+            status, result = call_api('GET', f'/transactions?q={quote(query)}')
+            search_time = time.perf_counter() - start
+            expected = expected_matches(engine, query)
+            listed = {t['transaction_id'] for t in result['data']}
+            ok = (status == 200 and len(listed) == min(len(expected), DEFAULT_PAGE_SIZE)
+                  and listed <= expected)
+            failures += not ok
+            print(f"{query:<16} {len(expected):>8} {len(listed):>7} "
+                  f"{search_time * 1000:>8.1f}  {'✓' if ok else '✗'}")
+
+        engine.dispose()
+
+    if failures:
+        print(f"\n✗ {failures} check(s) failed")
+        sys.exit(1)
+    print("\n✓ Search index in sync and ranked")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Streaming Listing Benchmark
+Loads growing numbers of synthetic transactions into a temporary
+database and fetches the full listing once buffered (GET /transactions)
+and once streamed (GET /transactions?stream=1) from a fresh server
+process each time. Reports time-to-first-byte, total time and the
+server's peak RSS, and checks both bodies hold the same transactions.
+
+The peak RSS is measured by the server itself (VmHWM, see
+instrumentation.own_peak_rss_mb) and printed when it is stopped. The
+ru_maxrss that wait4 returns for the child would also count this
+process's memory at fork, which grows with the records it loads.
+
+Usage: python scripts/bench_stream.py [--sizes 10000,50000] [--server async8]
+"""
+
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add etl, database and api to path
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent.parent / 'database'))
+sys.path.append(str(Path(__file__).parent.parent / 'api'))
+
+from load_db import bulk_load_records
+from instrumentation import own_peak_rss_mb
+from bench_load import synthetic_transactions, use_temporary_database
+import bench_api
+from bench_api import AUTH_HEADER, free_port, wait_for_port
+
+def serve(db_path, port, spec):
+    """Child mode: run bench_api's server until SIGTERM, then print its peak RSS in MB"""
+    def stop(signum, frame):
+        print(f"{own_peak_rss_mb():.1f}", flush=True)
+        os._exit(0)
+    signal.signal(signal.SIGTERM, stop)
+    bench_api.serve(db_path, port, spec)
+
+def fetch(port, path):
+    """Return (ttfb seconds, total seconds, parsed body, transfer encoding)"""
+    connection = http.client.HTTPConnection('localhost', port, timeout=600)
+    start = time.perf_counter()
+    connection.request('GET', path, headers={'Authorization': AUTH_HEADER})
+    response = connection.getresponse()
+    response.read(1)
+    ttfb = time.perf_counter() - start
+    body = b'{' + response.read()
+    total = time.perf_counter() - start
+    connection.close()
+    return ttfb, total, json.loads(body), response.getheader('Transfer-Encoding', '-')
+
+def measure(db_path, server_spec, path):
+    """Fetch path from a fresh server process, return timings and its peak RSS"""
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, __file__, '--serve', str(db_path), str(port), server_spec],
+        stdout=subprocess.PIPE, text=True
+    )
+    try:
+        wait_for_port(port)
+        ttfb, total, body, encoding = fetch(port, path)
+    finally:
+        server.terminate()
+        output, _ = server.communicate()
+    return ttfb, total, body, encoding, float(output)
+
+def main():
+    parser = argparse.ArgumentParser(description="Buffered vs streamed listing benchmark")
+    parser.add_argument('--sizes', default='10000,50000',
+                        help="comma separated transaction counts (default: 10000,50000)")
+    parser.add_argument('--server', default='async8',
+                        help="server as in bench_api.py --workers: async8 (asyncio) "
+                             "or 8 (thread pool); both stream chunked")
+    parser.add_argument('--serve', nargs=3, metavar=('DB', 'PORT', 'WORKERS'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve[0], int(args.serve[1]), args.serve[2])
+        return
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    print("=" * 60)
+    print("STREAMING LISTING BENCHMARK")
+    print("=" * 60)
+
+    rows = []
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        engine = use_temporary_database(directory, 'bench_stream.sqlite3')
+        db_path = Path(directory) / 'bench_stream.sqlite3'
+        records = synthetic_transactions(max(sizes))
+        loaded = 0
+        for size in sizes:
+            with contextlib.redirect_stdout(io.StringIO()):
+                bulk_load_records(records[loaded:size])
+            loaded = size
+
+            results = {}
+            for mode, path in (('buffered', '/transactions'), ('stream', '/transactions?stream=1')):
+                ttfb, total, body, encoding, rss = measure(db_path, args.server, path)
+                results[mode] = body
+                rows.append((size, mode, encoding, ttfb, total, rss))
+
+            same = (results['buffered']['count'] == results['stream']['count'] == size
+                    and results['buffered']['data'] == results['stream']['data'])
+            ok = ok and same
+            print(f"  {size} transactions: bodies identical: {same}")
+        engine.dispose()
+
+    print(f"\n{'Rows':>8} {'Mode':<9} {'Encoding':<9} {'TTFB ms':>9} {'Total s':>8} {'Server RSS MB':>14}")
+    for size, mode, encoding, ttfb, total, rss in rows:
+        print(f"{size:>8} {mode:<9} {encoding:<9} {ttfb * 1000:>9.1f} {total:>8.2f} {rss:>14.1f}")
+
+    if not ok:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
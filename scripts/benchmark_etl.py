@@ -0,0 +1,157 @@
+"""
+ETL Scaling Benchmark
+Generates synthetic SMS backups at several sizes (see sms_corpus.py),
+runs the in-process pipeline over each one into a fresh temporary
+SQLite database, and reports per-stage wall time, throughput and peak
+RSS for every size. Each size runs in its own interpreter so peak RSS
+is not carried over from the previous, smaller run.
+
+The scaling table is printed. Everything a run writes, dead-letter
+files included, stays in a temporary directory unless --output is
+given: then the table is written to <output>/etl_scaling_<timestamp>.md
+with the full per-stage run reports alongside it as JSON, and the
+dead-letter files to <output>/dead_letter/.
+
+Usage: python scripts/benchmark_etl.py [--sizes 10k,100k,1M,10M]
+       [--loader bulk|orm] [--workers N] [--output data/logs]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add etl and database to path
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent.parent / 'database'))
+
+from sms_corpus import parse_size, write_backup
+from categorize import workers_arg
+
+STAGES = ('extract', 'clean', 'categorize', 'load')
+
+def run_one(xml_path, db_path, report_path, loader, workers, dead_letter_dir):
+    """Child mode: run the pipeline once and write its run report"""
+    from bench_load import use_temporary_database
+    from instrumentation import RunReport
+    from run import run_in_process_pipeline
+
+    engine = use_temporary_database(Path(db_path).parent, Path(db_path).name)
+    report = RunReport('in-process', options={'loader': loader, 'workers': workers})
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_in_process_pipeline(
+            input_file=xml_path, bulk=loader == 'bulk', workers=workers, report=report,
+            dead_letter_dir=dead_letter_dir
+        )
+    engine.dispose()
+
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report.as_dict(), f)
+
+def benchmark_size(count, directory, loader, workers, dead_letter_dir):
+    """Generate a corpus of count messages and run the pipeline over it"""
+    xml_path = Path(directory) / f"sms_{count}.xml"
+    start = time.perf_counter()
+    write_backup(xml_path, count)
+    generate_time = time.perf_counter() - start
+
+    report_path = Path(directory) / f"report_{count}.json"
+    subprocess.run([
+        sys.executable, __file__, '--run-one', str(xml_path),
+        '--db', str(Path(directory) / f"db_{count}.sqlite3"),
+        '--report', str(report_path), '--loader', loader, '--workers', str(workers),
+        '--dead-letter-dir', str(dead_letter_dir),
+    ], check=True)
+
+    with open(report_path, encoding='utf-8') as f:
+        report = json.load(f)
+    report['messages'] = count
+    report['xml_mb'] = round(xml_path.stat().st_size / (1024 * 1024), 1)
+    report['generate_time_s'] = round(generate_time, 2)
+    xml_path.unlink()
+    return report
+
+def scaling_table(reports):
+    """Markdown table: one row per corpus size"""
+    header = (["Messages", "XML MB", "Wall s", "Msg/s", "Peak RSS MB"]
+              + [f"{stage} s" for stage in STAGES]
+              + [f"{stage} µs/msg" for stage in STAGES])
+    lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+    for report in reports:
+        stages = {stage['stage']: stage for stage in report['stages']}
+        count = report['messages']
+        row = [
+            f"{count:,}", f"{report['xml_mb']:.1f}", f"{report['wall_time_s']:.2f}",
+            f"{count / report['wall_time_s']:,.0f}", f"{report['peak_rss_mb']}",
+        ]
+        row += [f"{stages[stage]['wall_time_s']:.2f}" for stage in STAGES]
+        row += [f"{stages[stage]['wall_time_s'] / count * 1e6:.1f}" for stage in STAGES]
+        lines.append("| " + " | ".join(row) + " |")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="ETL scaling benchmark")
+    parser.add_argument('--sizes', default='10k,100k',
+                        help="comma separated corpus sizes (default: 10k,100k), e.g. 10k,100k,1M,10M")
+    parser.add_argument('--loader', choices=('bulk', 'orm'), default='bulk',
+                        help="bulk_load_records or load_records_to_db (default: bulk)")
+    parser.add_argument('--workers', type=workers_arg, default=1,
+                        help="categorize worker processes (default: 1)")
+    parser.add_argument('--output', default=None,
+                        help="directory to keep the scaling table, run reports and "
+                             "dead-letter files in, e.g. data/logs (default: keep nothing)")
+    parser.add_argument('--run-one', help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    parser.add_argument('--report', help=argparse.SUPPRESS)
+    parser.add_argument('--dead-letter-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        run_one(args.run_one, args.db, args.report, args.loader, args.workers,
+                args.dead_letter_dir)
+        return
+
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    output = Path(args.output) if args.output else None
+
+    print("=" * 60)
+    print("ETL SCALING BENCHMARK")
+    print("=" * 60)
+    print(f"Sizes: {', '.join(f'{size:,}' for size in sizes)}  Loader: {args.loader}  "
+          f"Workers: {args.workers}")
+
+    reports = []
+    with tempfile.TemporaryDirectory() as directory:
+        dead_letter_dir = (output or Path(directory)) / 'dead_letter'
+        for count in sizes:
+            print(f"\nRunning {count:,} messages...")
+            report = benchmark_size(count, directory, args.loader, args.workers, dead_letter_dir)
+            print(f"  ✓ {report['wall_time_s']:.2f}s, peak RSS {report['peak_rss_mb']} MB")
+            reports.append(report)
+
+    table = scaling_table(reports)
+    print()
+    print(table)
+    if output is None:
+        return
+
+    output.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    table_path = output / f"etl_scaling_{stamp}.md"
+    table_path.write_text(
+        f"# ETL scaling benchmark ({stamp})\n\n"
+        f"Loader: {args.loader}, workers: {args.workers}\n\n{table}\n",
+        encoding='utf-8'
+    )
+    with open(output / f"etl_scaling_{stamp}.json", 'w', encoding='utf-8') as f:
+        json.dump(reports, f, indent=2)
+    print(f"\n✓ Scaling table written to {table_path}")
+
+if __name__ == '__main__':
+    main()
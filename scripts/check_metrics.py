@@ -0,0 +1,210 @@
+"""
+Request Metrics Check
+Loads synthetic transactions into a temporary database, sends a known
+mix of requests through TransactionHandler in-process and checks what
+GET /metrics reports for them: request and status counts per route,
+cumulative histogram buckets, DB and serialization time within the
+request time, and response bytes equal to what was written. Also
+measures what recording costs per request and per SQL statement.
+Exits 1 if a check fails.
+
+Usage: python scripts/check_metrics.py [num_transactions]
+"""
+
+import contextlib
+import io
+import json
+import re
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Add etl, database and api to path
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent.parent / 'database'))
+sys.path.append(str(Path(__file__).parent.parent / 'api'))
+
+from load_db import bulk_load_records
+from bench_load import synthetic_transactions, use_temporary_database
+from check_query_counts import AUTH_HEADER
+from app import TransactionHandler
+from metrics import request_metrics, LATENCY_BUCKETS, _start_query, _finish_query
+from response_cache import response_cache
+
+# (method, path, body, route, expected status)
+REQUESTS = [
+    ('GET', '/transactions?limit=100', None, '/transactions', 200),
+    ('GET', '/transactions?limit=100', None, '/transactions', 200),
+    ('GET', '/transactions?stream=1', None, '/transactions', 200),
+    ('GET', '/transactions?q=jane', None, '/transactions', 200),
+    ('GET', '/transactions?from=tomorrow', None, '/transactions', 400),
+    ('GET', '/transactions/1', None, '/transactions/{id}', 200),
+    ('GET', '/transactions/999999', None, '/transactions/{id}', 404),
+    ('GET', '/transactions/summary?group_by=month', None, '/transactions/summary', 200),
+    ('POST', '/transactions', {'external_ref': 'METRICS-1', 'amount': 10, 'raw_data': 'Metrics check',
+                               'transaction_date': '2024-06-01T10:00:00'}, '/transactions', 201),
+    ('PUT', '/transactions/2', {'transaction_status': 'FAILED'}, '/transactions/{id}', 200),
+    ('DELETE', '/transactions/3', None, '/transactions/{id}', 200),
+    ('GET', '/nowhere', None, 'other', 404),
+]
+
+SAMPLE = re.compile(r'^(\w+)\{(.*)\} (\S+)$')
+LABEL = re.compile(r'(\w+)="([^"]*)"')
+
+def send(method, path, body=None, authorized=True):
+    """Run one request through TransactionHandler, return the bytes it wrote"""
+    payload = json.dumps(body).encode() if body is not None else b''
+    raw = (
+        f"{method} {path} HTTP/1.0\r\n"
+        + (f"Authorization: {AUTH_HEADER}\r\n" if authorized else '')
+        + f"Content-Length: {len(payload)}\r\n\r\n"
+    ).encode() + payload
+    handler = TransactionHandler.__new__(TransactionHandler)
+    handler.client_address = ('127.0.0.1', 0)
+    handler.request = None
+    handler.server = None
+    handler.rfile = io.BytesIO(raw)
+    handler.wfile = io.BytesIO()
+    handler.log_message = lambda *args: None
+    handler.handle_one_request()
+    return handler.wfile.getvalue()
+
+def parse_metrics(exposition):
+    """{(name, frozenset(labels)): value} of every sample"""
+    samples = {}
+    for line in exposition.splitlines():
+        if line.startswith('#'):
+            continue
+        match = SAMPLE.match(line)
+        if match:
+            name, labels, value = match.groups()
+            samples[(name, frozenset(LABEL.findall(labels)))] = float(value)
+        else:
+            name, value = line.split()
+            samples[(name, frozenset())] = float(value)
+    return samples
+
+def sample(samples, name, **labels):
+    return samples.get((name, frozenset(labels.items())), 0)
+
+def recording_cost():
+    """Microseconds to time and record one request with no work in it"""
+    runs = 100000
+    start = time.perf_counter()
+    for _ in range(runs):
+        timer = request_metrics.start('GET', '/transactions/42?fields=amount')
+        timer.status = 200
+        request_metrics.finish(timer)
+    return (time.perf_counter() - start) / runs * 1e6
+
+def query_hook_cost():
+    """Microseconds the execute hooks add to one SQL statement of a timed request"""
+    runs = 100000
+    timer = request_metrics.start('GET', '/transactions')
+    start = time.perf_counter()
+    for _ in range(runs):
+        _start_query(None, None, 'SELECT 1', (), None, False)
+        _finish_query(None, None, 'SELECT 1', (), None, False)
+    elapsed = time.perf_counter() - start
+    request_metrics.finish(timer)
+    request_metrics.clear()
+    return elapsed / runs * 1e6
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    print("=" * 60)
+    print("REQUEST METRICS CHECK")
+    print("=" * 60)
+
+    failures = 0
+    def report(label, ok):
+        nonlocal failures
+        failures += not ok
+        print(f"{label:<52} {'✓' if ok else '✗'}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = use_temporary_database(directory, 'check_metrics.sqlite3')
+        with contextlib.redirect_stdout(io.StringIO()):
+            bulk_load_records(synthetic_transactions(count))
+        response_cache.clear()
+        request_metrics.clear()
+        print(f"Transactions: {count}\n")
+
+        expected_counts = defaultdict(int)
+        expected_bytes = defaultdict(int)
+        statuses_ok = True
+        for method, path, body, route, status in REQUESTS:
+            written = send(method, path, body)
+            statuses_ok &= written.startswith(f'HTTP/1.1 {status} '.encode())
+            expected_counts[(method, route, str(status))] += 1
+            expected_bytes[(method, route)] += len(written)
+        written = send('GET', '/transactions', authorized=False)
+        expected_counts[('GET', '/transactions', '401')] += 1
+        expected_bytes[('GET', '/transactions')] += len(written)
+        report('requests answered as expected', statuses_ok)
+
+        exposition = send('GET', '/metrics').partition(b'\r\n\r\n')[2].decode()
+        samples = parse_metrics(exposition)
+
+        reported = {
+            (dict(labels)['method'], dict(labels)['route'], dict(labels)['status']): value
+            for (name, labels), value in samples.items() if name == 'http_responses_total'
+        }
+        report('status counts per route', reported == expected_counts)
+
+        reported = {
+            (dict(labels)['method'], dict(labels)['route']): value
+            for (name, labels), value in samples.items() if name == 'http_response_bytes_total'
+        }
+        report('bytes written per route, headers included', reported == expected_bytes)
+
+        routes = {(method, route) for method, route, _ in expected_counts}
+        buckets_ok = timing_ok = True
+        for method, route in routes:
+            total = sum(n for (m, r, _), n in expected_counts.items() if (m, r) == (method, route))
+            for name in ('http_request_duration_seconds', 'http_request_db_seconds',
+                         'http_request_serialization_seconds'):
+                cumulative = [sample(samples, f'{name}_bucket', method=method, route=route, le=str(b))
+                              for b in LATENCY_BUCKETS]
+                cumulative.append(sample(samples, f'{name}_bucket', method=method, route=route, le='+Inf'))
+                buckets_ok &= (cumulative == sorted(cumulative) and cumulative[-1] == total
+                               and sample(samples, f'{name}_count', method=method, route=route) == total)
+            duration = sample(samples, 'http_request_duration_seconds_sum', method=method, route=route)
+            db = sample(samples, 'http_request_db_seconds_sum', method=method, route=route)
+            serialization = sample(samples, 'http_request_serialization_seconds_sum',
+                                   method=method, route=route)
+            timing_ok &= db + serialization <= duration
+        report('histogram buckets are cumulative and complete', buckets_ok)
+        report('DB + serialization time within request time', timing_ok)
+
+        listing = dict(method='GET', route='/transactions')
+        report('listings spend time in SQL and in JSON', (
+            sample(samples, 'http_request_db_seconds_sum', **listing) > 0
+            and sample(samples, 'http_request_serialization_seconds_sum', **listing) > 0))
+        report('/metrics counts itself in flight',
+               sample(samples, 'http_requests_in_flight') == 1)
+
+        print("\nGET /transactions as reported:")
+        for name in ('http_request_duration_seconds', 'http_request_db_seconds',
+                     'http_request_serialization_seconds'):
+            total = sample(samples, f'{name}_sum', **listing)
+            print(f"  {name:<36} {total * 1000:>8.2f} ms")
+
+        per_request = recording_cost()
+        per_query = query_hook_cost()
+        print(f"\nRecording a request:      {per_request:.2f} µs")
+        print(f"Timing one SQL statement: {per_query:.2f} µs")
+        report('recording costs microseconds per request', per_request < 50 and per_query < 20)
+
+        engine.dispose()
+
+    if failures:
+        print(f"\n✗ {failures} check(s) failed")
+        sys.exit(1)
+    print("\n✓ Metrics match the requests sent")
+
+if __name__ == '__main__':
+    main()
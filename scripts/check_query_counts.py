@@ -0,0 +1,196 @@
+"""
+API Query Count Check
+Runs API requests in-process against a temporary database loaded with
+synthetic transactions and counts the SQL statements each one issues
+(db_config.count_queries). Listing and fetching transactions must take
+a fixed number of queries, whatever the page size, narrow ?fields=
+requests a single query with no joins, and authentication none once
+the credential cache is warm. Exits 1 if any request goes
+over its budget.
+
+Usage: python scripts/check_query_counts.py [num_transactions]
+"""
+
+import base64
+import contextlib
+import io
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# Add etl, database and api to path
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent.parent / 'database'))
+sys.path.append(str(Path(__file__).parent.parent / 'api'))
+
+import db_config
+from db_config import count_queries
+from models import User
+from load_db import bulk_load_records
+from bench_load import synthetic_transactions, use_temporary_database
+from app import TransactionHandler
+from auth import verify_credentials
+
+AUTH_HEADER = 'Basic ' + base64.b64encode(b'admin:password123').decode()
+
+# selectinload fetches related rows with IN lists of at most this many
+# keys, so fees cost one extra query per 500 transactions listed
+SELECTIN_CHUNK_SIZE = 500
+
+# (method, path, body, maximum queries with credentials already cached,
+# for fewer than SELECTIN_CHUNK_SIZE rows)
+REQUESTS = [
+    ('GET', '/transactions', None, 2),
+    ('GET', '/transactions?limit=10', None, 2),
+    ('GET', '/transactions?limit=500', None, 2),
+    ('GET', '/transactions?category=PAYMENT&limit=200', None, 2),
+    ('GET', '/transactions/5', None, 2),
+    ('GET', '/transactions?fields=amount&limit=500', None, 1),
+    ('GET', '/transactions/5?fields=amount,category', None, 1),
+    ('PUT', '/transactions/5', {'amount': 1234}, 4),
+    ('POST', '/transactions', {
+        'external_ref': 'CHECK-1', 'amount': 500, 'raw_data': 'check',
+        'transaction_date': '2024-05-01T10:00:00', 'fee_amount': 20,
+    }, 2),
+]
+
+def check_sparse_fieldsets():
+    """Narrow requests select only their columns; raw_data is never read"""
+    # In response order, which follows fieldsets.ALL_FIELDS
+    narrow = ('transaction_id', 'amount', 'transaction_status', 'transaction_date')
+    with count_queries() as queries:
+        status, result = call_api('GET', f"/transactions?fields={','.join(narrow)}&limit=20")
+    select = queries.statements[-1]
+    ok = (status == 200 and all(tuple(t) == narrow for t in result['data'])
+          and 'JOIN' not in select and 'raw_data' not in select and 'counter_party' not in select)
+    print(f"{'narrow fieldset: no joins, only its columns':<48} {'✓' if ok else '✗'}")
+
+    with count_queries() as queries:
+        call_api('GET', '/transactions?limit=20')
+    full_ok = not any('raw_data' in statement for statement in queries.statements)
+    print(f"{'full listing does not load raw_data':<48} {'✓' if full_ok else '✗'}")
+
+    status, _ = call_api('GET', '/transactions?fields=amount,nope')
+    print(f"{'unknown field is a 400':<48} {'✓' if status == 400 else '✗'}")
+    return ok and full_ok and status == 400
+
+# POST bodies whose response must equal a later GET; Numeric(15, 2)
+# columns round 12.345 to 12.35 on the way back
+POST_BODIES = [
+    {'external_ref': 'CHECK-2', 'amount': 750.5, 'raw_data': 'check',
+     'transaction_date': '2024-05-02T08:30:00', 'category_code': 'PAYMENT', 'fee_amount': 15},
+    {'external_ref': 'CHECK-3', 'amount': 12.345, 'raw_data': 'check',
+     'transaction_date': '2024-05-02T09:30:00', 'fee_amount': 0.125},
+]
+
+def check_post_response():
+    """POST answers from memory; the result must match what was stored"""
+    ok = True
+    for body in POST_BODIES:
+        status, created = call_api('POST', '/transactions', body)
+        _, stored = call_api('GET', f"/transactions/{created['data']['transaction_id']}")
+        ok = ok and status == 201 and created['data'] == stored['data']
+    print(f"{'POST response matches the stored transaction':<48} {'✓' if ok else '✗'}")
+    return ok
+
+def check_credential_cache():
+    """Auth is query-free when cached and sees a password change at once"""
+    with count_queries() as queries:
+        cached = verify_credentials('admin', 'password123')
+        wrong = verify_credentials('admin', 'wrong')
+    ok = cached and not wrong and queries.count == 0
+    print(f"{'cached auth (right + wrong password)':<48} {queries.count:>8} queries  "
+          f"{'✓' if ok else '✗'}")
+
+    session = db_config.get_session()
+    admin = session.query(User).filter_by(username='admin').one()
+    admin.password_text = 'rotated'
+    session.commit()
+    rotated = verify_credentials('admin', 'rotated') and not verify_credentials('admin', 'password123')
+    admin.password_text = 'password123'
+    session.commit()
+    session.close()
+    restored = verify_credentials('admin', 'password123')
+    print(f"{'password change invalidates cache':<48} {'✓' if rotated and restored else '✗'}")
+    return ok and rotated and restored
+
+def call_api_raw(method, path, body=None, headers=None):
+    """
+    Run one request through TransactionHandler without a socket,
+    return (status, {header: value}, body bytes)
+    """
+    payload = json.dumps(body).encode() if body is not None else b''
+    extra = ''.join(f"{name}: {value}\r\n" for name, value in (headers or {}).items())
+    raw = (
+        f"{method} {path} HTTP/1.0\r\n"
+        f"Authorization: {AUTH_HEADER}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"{extra}"
+        f"Content-Length: {len(payload)}\r\n\r\n"
+    ).encode() + payload
+
+    handler = TransactionHandler.__new__(TransactionHandler)
+    handler.client_address = ('127.0.0.1', 0)
+    handler.request = None
+    handler.server = None
+    handler.rfile = io.BytesIO(raw)
+    handler.wfile = io.BytesIO()
+    handler.log_message = lambda *args: None
+    handler.handle_one_request()
+
+    head, _, response_body = handler.wfile.getvalue().partition(b'\r\n\r\n')
+    status_line, *header_lines = head.decode('latin-1').split('\r\n')
+    response_headers = dict(line.split(': ', 1) for line in header_lines)
+    return int(status_line.split(' ', 2)[1]), response_headers, response_body
+
+def call_api(method, path, body=None):
+    """Run one request through TransactionHandler, return (status, parsed JSON)"""
+    status, _, response_body = call_api_raw(method, path, body)
+    return status, json.loads(response_body)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    print("=" * 60)
+    print("API QUERY COUNT CHECK")
+    print("=" * 60)
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        engine = use_temporary_database(directory, 'check_query_counts.sqlite3')
+        with contextlib.redirect_stdout(io.StringIO()):
+            bulk_load_records(synthetic_transactions(count))
+        print(f"Transactions: {count}\n")
+        # Warm the credential cache
+        call_api('GET', '/transactions/1')
+
+        print(f"{'Request':<48} {'status':>6} {'rows':>5} {'queries':>8} {'budget':>7}")
+        for method, path, body, budget in REQUESTS:
+            with count_queries() as queries:
+                status, result = call_api(method, path, body)
+            rows = result.get('count', 1 if 'data' in result else 0)
+            # Paginated pages load one row more than they return
+            budget += rows // SELECTIN_CHUNK_SIZE
+            ok = status < 400 and queries.count <= budget
+            failures += not ok
+            print(f"{method + ' ' + path:<48} {status:>6} {rows:>5} {queries.count:>8} "
+                  f"{budget:>7}  {'✓' if ok else '✗'}")
+            if not ok:
+                for statement in queries.statements:
+                    print(f"      {' '.join(statement.split())[:100]}")
+
+        print()
+        failures += not check_sparse_fieldsets()
+        failures += not check_post_response()
+        failures += not check_credential_cache()
+
+        engine.dispose()
+
+    if failures:
+        print(f"\n✗ {failures} check(s) failed")
+        sys.exit(1)
+    print("\n✓ All requests within their query budget")
+
+if __name__ == '__main__':
+    main()
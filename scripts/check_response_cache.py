@@ -0,0 +1,124 @@
+"""
+API Response Cache Check
+Runs API requests in-process against a temporary database loaded with
+synthetic transactions and checks the GET response cache
+(api/response_cache.py): repeated polls run no SQL, If-None-Match gets
+304 Not Modified, and POST/PUT/DELETE invalidate exactly the responses
+they change. Then times an uncached poll against a cached one. Exits 1
+if any check fails.
+
+Usage: python scripts/check_response_cache.py [num_transactions]
+"""
+
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add etl, database and api to path
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent.parent / 'database'))
+sys.path.append(str(Path(__file__).parent.parent / 'api'))
+
+from db_config import count_queries
+from load_db import bulk_load_records
+from bench_load import synthetic_transactions, use_temporary_database
+from check_query_counts import call_api_raw
+from response_cache import response_cache
+
+LISTING = '/transactions?limit=50&status=COMPLETED'
+
+def get(path, etag=None):
+    """GET path, return (status, ETag, body bytes, queries run)"""
+    headers = {'If-None-Match': etag} if etag else None
+    with count_queries() as queries:
+        status, response_headers, body = call_api_raw('GET', path, headers=headers)
+    return status, response_headers.get('ETag'), body, queries.count
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    print("=" * 60)
+    print("API RESPONSE CACHE CHECK")
+    print("=" * 60)
+
+    checks = []
+    def check(name, ok):
+        checks.append(ok)
+        print(f"  {'✓' if ok else '✗'} {name}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = use_temporary_database(directory, 'check_response_cache.sqlite3')
+        with contextlib.redirect_stdout(io.StringIO()):
+            bulk_load_records(synthetic_transactions(count))
+        response_cache.clear()
+        print(f"Transactions: {count}\n")
+
+        status, listing_etag, body, queries = get(LISTING)
+        check("first poll reads the database and sets an ETag",
+              status == 200 and listing_etag and queries > 0)
+        status, etag, cached_body, queries = get(LISTING)
+        check("repeat poll is served from the cache",
+              status == 200 and etag == listing_etag and cached_body == body and queries == 0)
+        status, etag, body, queries = get(LISTING, listing_etag)
+        check("If-None-Match with the current ETag gets 304 and no body",
+              status == 304 and etag == listing_etag and body == b'' and queries == 0)
+        status, _, _, queries = get('/transactions?status=COMPLETED&limit=50')
+        check("reordered query parameters share the entry", status == 200 and queries == 0)
+
+        _, item5_etag, _, _ = get('/transactions/5')
+        _, item6_etag, _, _ = get('/transactions/6')
+
+        call_api_raw('PUT', '/transactions/5', {'amount': 4321})
+        status, etag, body, queries = get('/transactions/5', item5_etag)
+        check("PUT refreshes the updated transaction",
+              status == 200 and etag != item5_etag and queries > 0
+              and json.loads(body)['data']['amount'] == 4321)
+        status, _, _, queries = get('/transactions/6', item6_etag)
+        check("PUT keeps other transactions cached", status == 304 and queries == 0)
+        _, _, _, queries = get(LISTING, listing_etag)
+        check("PUT refreshes listings", queries > 0)
+
+        _, listing_etag, _, _ = get(LISTING)
+        call_api_raw('POST', '/transactions', {
+            'external_ref': 'CACHE-1', 'amount': 500, 'raw_data': 'check',
+            'transaction_date': '2030-01-01T10:00:00',
+        })
+        status, etag, body, queries = get(LISTING, listing_etag)
+        check("POST refreshes listings",
+              status == 200 and queries > 0 and etag != listing_etag
+              and json.loads(body)['data'][0]['external_ref'] == 'CACHE-1')
+        _, _, _, queries = get('/transactions/6', item6_etag)
+        check("POST keeps transactions cached", queries == 0)
+
+        call_api_raw('DELETE', '/transactions/6')
+        status, _, _, _ = get('/transactions/6', item6_etag)
+        check("DELETE drops the deleted transaction", status == 404)
+
+        # Poll cost: full listing rebuilt every time vs answered with 304
+        rounds = 20
+        _, etag, _, _ = get('/transactions')
+        start = time.perf_counter()
+        for _ in range(rounds):
+            response_cache.clear()
+            get('/transactions')
+        uncached = (time.perf_counter() - start) / rounds
+        start = time.perf_counter()
+        for _ in range(rounds):
+            get('/transactions', etag)
+        cached = (time.perf_counter() - start) / rounds
+        print(f"\nPolling GET /transactions ({count} rows): "
+              f"uncached {uncached * 1000:.1f} ms, cached 304 {cached * 1000:.3f} ms")
+
+        engine.dispose()
+
+    if not all(checks):
+        print(f"\n✗ {checks.count(False)} check(s) failed")
+        sys.exit(1)
+    print("\n✓ Response cache checks passed")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Transaction Summary Check
+Loads synthetic transactions into a temporary database and compares
+GET /transactions/summary for each group_by against the same totals
+summed on the client from the full GET /transactions listing, the way
+reports used to do it. Also reports the SQL statements, response size
+and time of both. Exits 1 if any group differs.
+
+Usage: python scripts/check_summary.py [num_transactions]
+"""
+
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+# Add etl, database and api to path
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent.parent / 'database'))
+sys.path.append(str(Path(__file__).parent.parent / 'api'))
+
+from db_config import count_queries
+from load_db import bulk_load_records
+from bench_load import synthetic_transactions, use_temporary_database
+from check_query_counts import call_api, call_api_raw
+from response_cache import response_cache
+
+GROUPINGS = ['category', 'status', 'counter_party', 'day', 'week', 'month',
+             'category,month', 'status,week']
+
+# Client-side group value of a listed transaction, per group_by key
+CLIENT_KEYS = {
+    'category': lambda t: t['category']['category_code'],
+    'status': lambda t: t['transaction_status'],
+    'counter_party': lambda t: t['counter_party'],
+    'day': lambda t: datetime.fromisoformat(t['transaction_date']).strftime('%Y-%m-%d'),
+    'week': lambda t: datetime.fromisoformat(t['transaction_date']).strftime('%G-W%V'),
+    'month': lambda t: datetime.fromisoformat(t['transaction_date']).strftime('%Y-%m'),
+}
+
+def client_summary(transactions, keys):
+    """{group values: (count, amount, fees)} summed in Python"""
+    groups = defaultdict(lambda: [0, 0.0, 0.0])
+    for t in transactions:
+        group = groups[tuple(CLIENT_KEYS[key](t) for key in keys)]
+        group[0] += 1
+        group[1] += t['amount']
+        group[2] += sum(fee['amount'] for fee in t['fees'])
+    return {k: (c, round(a, 2), round(f, 2)) for k, (c, a, f) in groups.items()}
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    print("=" * 60)
+    print("TRANSACTION SUMMARY CHECK")
+    print("=" * 60)
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        engine = use_temporary_database(directory, 'check_summary.sqlite3')
+        with contextlib.redirect_stdout(io.StringIO()):
+            bulk_load_records(synthetic_transactions(count))
+        response_cache.clear()
+        print(f"Transactions: {count}\n")
+
+        start = time.perf_counter()
+        with count_queries() as listing_queries:
+            _, _, listing_body = call_api_raw('GET', '/transactions')
+        listing_time = time.perf_counter() - start
+        _, listing = call_api('GET', '/transactions')
+        transactions = listing['data']
+
+        print(f"{'group_by':<16} {'groups':>7} {'queries':>8} {'bytes':>9} {'ms':>8}")
+        print(f"{'(full listing)':<16} {'-':>7} {listing_queries.count:>8} "
+              f"{len(listing_body):>9} {listing_time * 1000:>8.1f}")
+        for grouping in GROUPINGS:
+            keys = grouping.split(',')
+            start = time.perf_counter()
+            with count_queries() as queries:
+                status, _, body = call_api_raw('GET', f'/transactions/summary?group_by={grouping}')
+            elapsed = time.perf_counter() - start
+            _, result = call_api('GET', f'/transactions/summary?group_by={grouping}')
+
+            server = {
+                tuple(group[key] for key in keys): (group['count'], group['amount'], group['fees'])
+                for group in result['data']
+            }
+            expected = client_summary(transactions, keys)
+            ok = (status == 200 and queries.count == 1 and server == expected
+                  and result['totals']['count'] == len(transactions))
+            failures += not ok
+            print(f"{grouping:<16} {result['count']:>7} {queries.count:>8} {len(body):>9} "
+                  f"{elapsed * 1000:>8.1f}  {'✓' if ok else '✗'}")
+
+        status, result = call_api('GET', '/transactions/summary?group_by=category&status=COMPLETED')
+        expected = client_summary([t for t in transactions if t['transaction_status'] == 'COMPLETED'],
+                                  ['category'])
+        server = {(g['category'],): (g['count'], g['amount'], g['fees']) for g in result['data']}
+        ok = status == 200 and server == expected
+        failures += not ok
+        print(f"\n{'status filter matches the client-side sums':<48} {'✓' if ok else '✗'}")
+
+        status, _ = call_api('GET', '/transactions/summary?group_by=amount')
+        failures += status != 400
+        print(f"{'unknown group_by is a 400':<48} {'✓' if status == 400 else '✗'}")
+
+        engine.dispose()
+
+    if failures:
+        print(f"\n✗ {failures} check(s) failed")
+        sys.exit(1)
+    print("\n✓ Summaries match the client-side totals")
+
+if __name__ == '__main__':
+    main()
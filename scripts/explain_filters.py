@@ -0,0 +1,141 @@
+"""
+Filter Query Plan Check
+Loads synthetic transactions into a temporary database, runs filtered
+GET /transactions and /transactions/summary requests in-process,
+captures the SQL each one sends and runs EXPLAIN QUERY PLAN on it with
+the same parameters. Every filter must be answered by searching an
+index; a full scan of Transactions fails the check. Also checks the
+filtered rows against the same filter applied in Python.
+
+Usage: python scripts/explain_filters.py [num_transactions]
+"""
+
+import contextlib
+import io
+import re
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+# Add etl, database and api to path
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent.parent / 'database'))
+sys.path.append(str(Path(__file__).parent.parent / 'api'))
+
+from db_config import count_queries
+from load_db import bulk_load_records
+from bench_load import synthetic_transactions, use_temporary_database
+from check_query_counts import call_api
+
+# (request, index the Transactions lookup must use)
+CASES = [
+    ('/transactions?from=2024-05-02&to=2024-05-03&limit=100', 'idx_transaction_date_id'),
+    ('/transactions?from=2024-05-02T06:00:00', 'idx_transaction_date_id'),
+    ('/transactions?status=PENDING&from=2024-05-02&limit=100', 'idx_transaction_status_date_id'),
+    ('/transactions?category=PAYMENT&to=2024-05-02&limit=100', 'idx_transaction_category_date_id'),
+    ('/transactions?min_amount=40000&max_amount=45000', 'idx_transaction_amount'),
+    ('/transactions?min_amount=40000&max_amount=45000&limit=50', 'idx_transaction_amount'),
+    ('/transactions/summary?group_by=day&from=2024-05-02&to=2024-05-03', 'idx_transaction_date_id'),
+]
+
+# Requests with a malformed filter, each a 400
+INVALID = [
+    '/transactions?from=yesterday',
+    '/transactions?min_amount=abc',
+    '/transactions?from=2024-06-01&to=2024-05-01',
+    '/transactions?from=2024-05-01T00:00:00%2B02:00&to=2024-05-02',
+    '/transactions/summary?min_amount=10&max_amount=5',
+]
+
+# A plan line that reads every row of Transactions
+FULL_SCAN = re.compile(r'^SCAN "?Transactions"?( AS \w+)?$')
+
+def matches(transaction, params):
+    """The API's filters, applied in Python to a listed transaction"""
+    date = datetime.fromisoformat(transaction['transaction_date'])
+    if 'status' in params and transaction['transaction_status'] != params['status']:
+        return False
+    if 'category' in params and transaction['category']['category_code'] != params['category']:
+        return False
+    if 'from' in params and date < datetime.fromisoformat(params['from']):
+        return False
+    if 'to' in params and date.date() > datetime.fromisoformat(params['to']).date():
+        return False
+    if 'min_amount' in params and transaction['amount'] < float(params['min_amount']):
+        return False
+    if 'max_amount' in params and transaction['amount'] > float(params['max_amount']):
+        return False
+    return True
+
+def query_plan(engine, path):
+    """Run a request in-process, return (status, result, plan of its Transactions query)"""
+    with count_queries() as queries:
+        status, result = call_api('GET', path)
+    statement, parameters = next(
+        (s, p) for s, p in zip(queries.statements, queries.parameters)
+        if 'FROM "Transactions"' in s
+    )
+    with engine.connect() as connection:
+        plan = [row[-1] for row in connection.exec_driver_sql(
+            f'EXPLAIN QUERY PLAN {statement}', parameters
+        )]
+    return status, result, plan
+
+def expected_rows(listing, path):
+    """(transactions of the listing that path's filters select, rows path should return)"""
+    params = dict(pair.split('=', 1) for pair in path.split('?', 1)[1].split('&'))
+    expected = [t for t in listing if matches(t, params)]
+    if 'limit' in params:
+        return expected, min(len(expected), int(params['limit']))
+    return expected, len(expected)
+
+def rows_returned(path, result):
+    """Transactions a listing returned, or a summary counted"""
+    if path.startswith('/transactions/summary'):
+        return result['totals']['count']
+    return result['count']
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    print("=" * 60)
+    print("FILTER QUERY PLAN CHECK")
+    print("=" * 60)
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        engine = use_temporary_database(directory, 'explain_filters.sqlite3')
+        with contextlib.redirect_stdout(io.StringIO()):
+            bulk_load_records(synthetic_transactions(count))
+        _, listing = call_api('GET', '/transactions?fields=transaction_id,amount,'
+                                     'transaction_status,transaction_date,category')
+        print(f"Transactions: {count}\n")
+
+        for path, index in CASES:
+            status, result, plan = query_plan(engine, path)
+            expected, rows = expected_rows(listing['data'], path)
+            rows_ok = rows_returned(path, result) == rows
+
+            uses_index = any(index in line for line in plan)
+            full_scan = any(FULL_SCAN.match(line) for line in plan)
+            ok = status == 200 and uses_index and not full_scan and rows_ok
+            failures += not ok
+            print(f"{'✓' if ok else '✗'} {path}  ({len(expected)} matching)")
+            for line in plan:
+                print(f"      {line}")
+
+        for path in INVALID:
+            status, _ = call_api('GET', path)
+            failures += status != 400
+            print(f"{'✓' if status == 400 else '✗'} {path} is a 400")
+
+        engine.dispose()
+
+    if failures:
+        print(f"\n✗ {failures} check(s) failed")
+        sys.exit(1)
+    print("\n✓ Every filter searches an index")
+
+if __name__ == '__main__':
+    main()
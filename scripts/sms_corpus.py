@@ -0,0 +1,204 @@
+"""
+Synthetic SMS Corpus Generator
+Writes an SMS backup XML file in the same format as
+data/raw/modified_sms_v2.xml, with any number of M-Money messages built
+from the message shapes etl/categorize.py understands, plus noise
+(other senders, non-transaction messages) and malformed records
+(bad or missing dates and types, empty bodies) the pipeline has to skip.
+The file is written incrementally, so 10M messages need no more memory
+than 10k.
+
+Usage: python scripts/sms_corpus.py 1M -o data/raw/synthetic_1m.xml
+       [--seed 42] [--noise 0.05] [--malformed 0.01]
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from xml.sax.saxutils import quoteattr
+
+NAMES = ['Jane Smith', 'Samuel Carter', 'Alex Doe', 'Robert Brown',
+         'Linda Green', 'Agent Sophia', 'Gaël Mukamana', 'Émile Habimana']
+
+TEMPLATES = [
+    "You have received {amount} RWF from {name} (*********013) on your mobile money "
+    "account at {date}. Message from sender: . Your new balance:{balance} RWF. "
+    "Financial Transaction Id: {txid}.",
+    "TxId: {txid}. Your payment of {amount} RWF to {name} {code} has been completed "
+    "at {date}. Your new balance: {balance} RWF. Fee was {fee} RWF.",
+    "*113*R*A bank deposit of {amount} RWF has been added to your mobile money account "
+    "at {date}. Your NEW BALANCE :{balance} RWF. Cash Deposit::CASH::::0::250795963036."
+    "Thank you for using MTN MobileMoney.*EN#",
+    "*165*S*{amount} RWF transferred to {name} (250791666666) from 36521838 at {date} . "
+    "Fee was: {fee} RWF. New balance: {balance} RWF. Transaction Id: {txid}",
+    "You {name} (*********036) have via agent: Agent Sophia (250790777777), withdrawn "
+    "{amount} RWF from your mobile money account: 36521838 at {date}. Your new balance: "
+    "{balance} RWF. Fee paid: {fee} RWF. Financial Transaction Id: {txid}.",
+    "*162*TxId:{txid}*S*Your payment of {amount} RWF to Airtime with token  has been "
+    "completed at {date}. Fee was {fee} RWF. Your new balance: {balance} RWF .",
+    "Your bill payment of {amount} RWF to {name} {code} is PENDING. "
+    "Transaction Id: {txid}. Related TXID: {txid2}.",
+    "Transaction Id: {txid} FAILED: payment of {amount} RWF from {name} * was unsuccessful.",
+    "Yello! Umaze kugura 1GB. Your balance is {balance} RWF.",
+]
+
+# Messages from other senders, dropped by the extract step
+NOISE_SENDERS = ['MTN', 'Airtel', '+250788123456', 'BK', 'RRA']
+NOISE_BODIES = [
+    "Dear customer, your data bundle expires today. Dial *345# to renew.",
+    "Your OTP is {code}. Do not share it with anyone.",
+    "Meeting moved to 3pm, see you there & bring the <draft> \"v2\".",
+]
+
+# Ways a record can be broken, each rejected by a different check
+MALFORMED_KINDS = ('bad_date', 'missing_date', 'bad_type', 'empty_body')
+
+START_DATE = datetime(2024, 5, 1)
+SERVICE_CENTER = '+250788110381'
+
+def format_amount(value):
+    """Format an amount like the operator does, with thousand separators"""
+    return f"{value:,}" if random.random() < 0.7 else str(value)
+
+def synthetic_bodies(count, seed=42):
+    """Generate count synthetic M-Money SMS bodies"""
+    random.seed(seed)
+    bodies = []
+    for _ in range(count):
+        template = random.choice(TEMPLATES)
+        bodies.append(template.format(
+            amount=format_amount(random.randint(100, 500000)),
+            balance=format_amount(random.randint(0, 900000)),
+            fee=random.choice([0, 20, 100, 250, 350]),
+            name=random.choice(NAMES),
+            code=random.randint(10000, 99999),
+            txid=random.randint(10**10, 10**11),
+            txid2=random.randint(10**10, 10**11),
+            date=f"2024-05-{random.randint(1, 28):02d} 1{random.randint(0, 9)}:30:51",
+        ))
+    return bodies
+
+def parse_size(value):
+    """Parse a message count such as 10000, 100k or 1M"""
+    multipliers = {'k': 10**3, 'm': 10**6}
+    value = value.strip().lower()
+    if value and value[-1] in multipliers:
+        return int(float(value[:-1]) * multipliers[value[-1]])
+    return int(value)
+
+def synthetic_sms(count, seed=42, noise=0.05, malformed=0.01):
+    """
+    Yield count SMS attribute dicts in date order.
+    A noise fraction comes from other senders, a malformed fraction is
+    broken in one of MALFORMED_KINDS, and the rest are M-Money messages
+    with unique transaction IDs.
+    """
+    rng = random.Random(seed)
+    timestamp = START_DATE
+    txid = 76000000000 + rng.randint(0, 10**8)
+
+    for _ in range(count):
+        timestamp += timedelta(seconds=rng.randint(1, 40))
+        txid += 1
+        date_ms = int(timestamp.timestamp() * 1000) + rng.randint(0, 999)
+        amount = rng.randint(100, 500000)
+        balance = rng.randint(0, 900000)
+
+        roll = rng.random()
+        if roll < noise:
+            address = rng.choice(NOISE_SENDERS)
+            body = rng.choice(NOISE_BODIES).format(code=rng.randint(100000, 999999))
+        else:
+            address = 'M-Money'
+            body = rng.choice(TEMPLATES).format(
+                amount=f"{amount:,}" if rng.random() < 0.7 else amount,
+                balance=f"{balance:,}" if rng.random() < 0.7 else balance,
+                fee=rng.choice([0, 20, 100, 250, 350]),
+                name=rng.choice(NAMES),
+                code=rng.randint(10000, 99999),
+                txid=txid,
+                txid2=txid + 10**10,
+                date=timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            )
+
+        sms = {
+            'protocol': '0',
+            'address': address,
+            'date': str(date_ms),
+            'type': '1',
+            'subject': 'null',
+            'body': body,
+            'toa': 'null',
+            'sc_toa': 'null',
+            'service_center': SERVICE_CENTER,
+            'read': '1',
+            'status': '-1',
+            'locked': '0',
+            'date_sent': str(date_ms - rng.randint(1000, 9000)),
+            'sub_id': '6',
+            'readable_date': (f"{timestamp.day} {timestamp:%b %Y} "
+                              f"{timestamp.hour % 12 or 12}:{timestamp:%M:%S %p}"),
+            'contact_name': '(Unknown)',
+        }
+
+        if noise <= roll < noise + malformed:
+            kind = rng.choice(MALFORMED_KINDS)
+            if kind == 'bad_date':
+                sms['date'] = 'bad'
+            elif kind == 'missing_date':
+                del sms['date']
+            elif kind == 'bad_type':
+                sms['type'] = 'x'
+            else:
+                sms['body'] = ''
+
+        yield sms
+
+def write_backup(output_path, count, seed=42, noise=0.05, malformed=0.01):
+    """Write count synthetic messages as an SMS backup XML file"""
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(output_path, 'w', encoding='utf-8', buffering=1024 * 1024) as f:
+        f.write("<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>\n")
+        f.write(f'<smses count="{count}">\n')
+        f.writelines(
+            "  <sms "
+            + " ".join(f"{name}={quoteattr(value)}" for name, value in sms.items())
+            + " />\n"
+            for sms in synthetic_sms(count, seed, noise, malformed)
+        )
+        f.write("</smses>\n")
+
+    return output_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic SMS backup XML file")
+    parser.add_argument('count', help="number of messages, e.g. 10000, 100k, 1M, 10M")
+    parser.add_argument('-o', '--output', default=None,
+                        help="output file (default: data/raw/synthetic_<count>.xml)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--noise', type=float, default=0.05,
+                        help="fraction of messages from other senders (default: 0.05)")
+    parser.add_argument('--malformed', type=float, default=0.01,
+                        help="fraction of malformed records (default: 0.01)")
+    args = parser.parse_args()
+
+    count = parse_size(args.count)
+    output = args.output or (
+        Path(__file__).parent.parent / 'data' / 'raw' / f"synthetic_{args.count.lower()}.xml"
+    )
+
+    print("=" * 60)
+    print("SYNTHETIC SMS CORPUS")
+    print("=" * 60)
+    start = time.perf_counter()
+    path = write_backup(output, count, args.seed, args.noise, args.malformed)
+    elapsed = time.perf_counter() - start
+    size_mb = path.stat().st_size / (1024 * 1024)
+    print(f"✓ Wrote {count:,} messages to {path} ({size_mb:.1f} MB) in {elapsed:.1f}s")
+
+if __name__ == '__main__':
+    main()
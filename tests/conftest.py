@@ -0,0 +1,78 @@
+"""
+Shared pytest setup: the repo's modules are imported by directory, the
+way the ETL scripts and the API import each other, api_database gives
+API tests a temporary database of synthetic transactions and api_server
+serves it over HTTP
+"""
+
+import contextlib
+import io
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+
+for directory in ('etl', 'database', 'api', 'scripts'):
+    sys.path.append(str(ROOT / directory))
+
+import db_config
+from load_db import bulk_load_records
+from reference_data import reference_data
+from bench_load import synthetic_transactions, use_temporary_database
+from bench_api import free_port
+from app import TransactionHandler, create_server
+from auth import credential_cache
+from response_cache import response_cache
+
+# Synthetic transactions loaded into the api_database fixture
+API_TRANSACTIONS = 1000
+
+
+def clear_api_caches():
+    """Empty the in-process caches that outlive one database"""
+    response_cache.clear()
+    credential_cache.invalidate()
+    reference_data.invalidate()
+
+
+@pytest.fixture(scope='module')
+def api_database(tmp_path_factory):
+    """
+    Point db_config sessions at a temporary database seeded like
+    init_db.py and loaded with API_TRANSACTIONS synthetic transactions,
+    for requests run in-process with check_query_counts.call_api, with
+    the reference data loaded as the API server loads it.
+    Yields its engine; sessions go back to the default database after
+    the module's tests.
+    """
+    default_bind = db_config.SessionLocal.kw['bind']
+    engine = use_temporary_database(tmp_path_factory.mktemp('api'), 'api.sqlite3')
+    with contextlib.redirect_stdout(io.StringIO()):
+        bulk_load_records(synthetic_transactions(API_TRANSACTIONS))
+    clear_api_caches()
+    # As app.run() does at startup
+    reference_data.refresh()
+    yield engine
+    engine.dispose()
+    db_config.SessionLocal.configure(bind=default_bind)
+    clear_api_caches()
+
+
+@pytest.fixture(scope='module')
+def api_server(api_database):
+    """
+    Port of the threaded API server (two workers) serving api_database
+    on a background thread, with access logging off
+    """
+    port = free_port()
+    server = create_server(port, workers=2)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    log_message = TransactionHandler.log_message
+    TransactionHandler.log_message = lambda *args: None
+    yield port
+    TransactionHandler.log_message = log_message
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,36 @@
+"""Credential cache generations: a password read before a change is never cached after it"""
+
+from sqlalchemy import event
+
+from auth import CredentialCache, credential_cache, verify_credentials
+
+
+def test_store_is_skipped_after_an_invalidation():
+    cache = CredentialCache()
+    generation = cache.generation
+    cache.invalidate('admin')
+    cache.store('admin', 'old-password', generation)
+    assert cache.check('admin', 'old-password') is None
+    assert len(cache) == 0
+
+    cache.store('admin', 'new-password', cache.generation)
+    assert cache.check('admin', 'new-password') is True
+
+
+def test_lookup_racing_a_password_change_is_not_cached(api_database):
+    credential_cache.invalidate()
+
+    def password_changed(*args):
+        # Another thread commits a new password while this lookup's
+        # query is running
+        credential_cache.invalidate()
+
+    event.listen(api_database, 'after_cursor_execute', password_changed)
+    try:
+        assert verify_credentials('admin', 'password123')
+    finally:
+        event.remove(api_database, 'after_cursor_execute', password_changed)
+    assert len(credential_cache) == 0
+
+    assert verify_credentials('admin', 'password123')
+    assert len(credential_cache) == 1
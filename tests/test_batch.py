@@ -0,0 +1,59 @@
+"""POST /transactions/batch validates every field of every item on its own"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from reference_data import reference_data
+from app import batch_item_rows
+from check_query_counts import call_api
+
+VALID_ITEM = {
+    'external_ref': 'BATCH-TEST', 'amount': 1500, 'raw_data': 'Batch test',
+    'transaction_date': '2024-06-01T12:00:00', 'fee_amount': 25,
+}
+
+INVALID_ITEMS = [
+    ({'raw_data': None}, 'raw_data must not be null'),
+    ({'external_ref': ['REF-1']}, 'external_ref must be a string'),
+    ({'amount': json.loads('1e400')}, 'amount must be a finite number'),
+    ({'amount': float('nan')}, 'amount must be a finite number'),
+    ({'amount': 10**400}, 'amount must be a finite number'),
+    ({'amount': True}, 'amount must be a number'),
+    ({'fee_amount': '25'}, 'fee_amount must be a number'),
+    ({'currency': None}, 'currency must not be null'),
+    ({'counter_party': 42}, 'counter_party must be a string'),
+    ({'transaction_date': None}, 'transaction_date must be an ISO 8601 date and time'),
+]
+
+
+@pytest.mark.parametrize('change, message', INVALID_ITEMS, ids=[m for _, m in INVALID_ITEMS])
+def test_invalid_field_is_rejected(api_database, change, message):
+    with pytest.raises(ValueError, match=message):
+        batch_item_rows({**VALID_ITEM, **change}, reference_data.get(), datetime.now())
+
+
+def test_nullable_fields_accept_null(api_database):
+    transaction_row, _ = batch_item_rows(
+        {**VALID_ITEM, 'sender_notes': None, 'counter_party': None}, reference_data.get(), datetime.now()
+    )
+    assert transaction_row['counter_party'] is None
+
+
+def test_each_bad_item_gets_its_own_400(api_database):
+    items = [
+        {**VALID_ITEM, 'external_ref': 'BATCH-0'},
+        {**VALID_ITEM, 'raw_data': None},
+        {**VALID_ITEM, 'external_ref': ['BATCH-2']},
+        {**VALID_ITEM, 'amount': float('inf')},
+        {**VALID_ITEM, 'external_ref': 'BATCH-4'},
+    ]
+    status, result = call_api('POST', '/transactions/batch', items)
+    assert status == 207
+    assert [item['status'] for item in result['results']] == [201, 400, 400, 400, 201]
+
+    created = [item['transaction_id'] for item in result['results'] if item['status'] == 201]
+    for transaction_id, external_ref in zip(created, ('BATCH-0', 'BATCH-4')):
+        status, stored = call_api('GET', f'/transactions/{transaction_id}')
+        assert status == 200 and stored['data']['external_ref'] == external_ref
@@ -0,0 +1,42 @@
+"""
+Listing and summary filters: every one searches an index (EXPLAIN QUERY
+PLAN, as scripts/explain_filters.py prints it) and selects the same rows
+as the filter applied in Python; malformed values are a 400
+"""
+
+import pytest
+
+from check_query_counts import call_api
+from explain_filters import CASES, FULL_SCAN, INVALID, expected_rows, query_plan, rows_returned
+
+
+@pytest.fixture(scope='module')
+def listing(api_database):
+    _, result = call_api('GET', '/transactions?fields=transaction_id,amount,'
+                                'transaction_status,transaction_date,category')
+    return result['data']
+
+
+@pytest.mark.parametrize('path, index', CASES, ids=[path for path, _ in CASES])
+def test_filter_searches_its_index(api_database, listing, path, index):
+    status, result, plan = query_plan(api_database, path)
+    assert status == 200
+    assert any(index in line for line in plan), plan
+    assert not any(FULL_SCAN.match(line) for line in plan), plan
+    _, rows = expected_rows(listing, path)
+    assert rows_returned(path, result) == rows
+
+
+@pytest.mark.parametrize('path', INVALID)
+def test_malformed_filter_is_a_400(api_database, path):
+    status, _ = call_api('GET', path)
+    assert status == 400
+
+
+@pytest.mark.parametrize('bound', ['2024-05-01T00:00:00%2B02:00', '2024-05-01T00:00:00Z'])
+def test_timezone_offset_is_a_400(api_database, bound):
+    for path in (f'/transactions?from={bound}&to=2024-05-02',
+                 f'/transactions/summary?to={bound}'):
+        status, result = call_api('GET', path)
+        assert status == 400, path
+        assert 'timezone offset' in result['message']
@@ -0,0 +1,29 @@
+"""Per-stage memory reported by ETL stage scripts in subprocess mode"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from instrumentation import STAGE_STATS_ENV
+
+ETL_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'etl')
+
+# A stage that does nothing but report, like the end of a stage script's main()
+STAGE = (
+    "import sys; sys.path.insert(0, sys.argv[1]); "
+    "from instrumentation import write_stage_stats; write_stage_stats(0, 0, 0)"
+)
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='VmHWM is Linux only')
+def test_stage_peak_rss_excludes_the_parent(tmp_path):
+    parent_memory = b'x' * (200 * 1024 * 1024)  # written, so resident
+    stats_path = tmp_path / 'stage.json'
+    env = dict(os.environ, **{STAGE_STATS_ENV: str(stats_path)})
+    subprocess.run([sys.executable, '-c', STAGE, ETL_DIR], env=env, check=True)
+    stats = json.loads(stats_path.read_text())
+    del parent_memory
+    assert 0 < stats['peak_rss_mb'] < 100
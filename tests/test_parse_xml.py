@@ -0,0 +1,38 @@
+"""iter_sms filtering against an incremental run's high-watermark"""
+
+from parse_xml import iter_sms
+
+BODY = 'TxId: {txid}. Your payment of 500 RWF to Alex Doe 12345 has been completed.'
+
+
+def write_backup(path, messages):
+    """Minimal SMS backup of (address, date, txid) messages"""
+    path.write_text(
+        "<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>\n<smses>\n"
+        + ''.join(
+            f'  <sms address="{address}" date="{date}" body="{BODY.format(txid=txid)}" />\n'
+            for address, date, txid in messages
+        )
+        + "</smses>\n",
+        encoding='utf-8'
+    )
+    return path
+
+
+def test_since_keeps_messages_sharing_the_watermark_millisecond(tmp_path):
+    backup = write_backup(tmp_path / 'backup.xml', [
+        ('M-Money', '1000', 1),
+        ('M-Money', '2000', 2),   # loaded by the previous run: the watermark
+        ('M-Money', '2000', 3),   # arrived later in the same millisecond
+        ('M-Money', '3000', 4),
+        ('Other', '3000', 5),
+    ])
+    stats = {}
+    dates = [sms['date'] for sms in iter_sms(backup, since=2000, stats=stats)]
+    assert dates == ['2000', '2000', '3000']
+    assert stats == {'skipped_old': 1, 'sms_read': 5}
+
+
+def test_without_since_every_m_money_message_is_read(tmp_path):
+    backup = write_backup(tmp_path / 'backup.xml', [('M-Money', '1000', 1), ('M-Money', 'bad', 2)])
+    assert [sms['date'] for sms in iter_sms(backup)] == ['1000', 'bad']
@@ -0,0 +1,93 @@
+"""
+SQL statements per API request, counted with db_config.count_queries:
+query budgets, sparse fieldsets and the credential cache
+(scripts/check_query_counts.py prints the same checks as a table)
+"""
+
+import pytest
+
+import db_config
+from db_config import count_queries
+from models import User
+from auth import verify_credentials
+from check_query_counts import POST_BODIES, REQUESTS, SELECTIN_CHUNK_SIZE, call_api
+
+
+@pytest.fixture(autouse=True)
+def warm_credentials(api_database):
+    """Budgets assume the credential cache already holds admin"""
+    call_api('GET', '/transactions/1')
+
+
+@pytest.mark.parametrize(
+    'method, path, body, budget', REQUESTS,
+    ids=[f'{method} {path}' for method, path, _, _ in REQUESTS]
+)
+def test_request_within_query_budget(method, path, body, budget):
+    with count_queries() as queries:
+        status, result = call_api(method, path, body)
+    rows = result.get('count', 1 if 'data' in result else 0)
+    # Paginated pages load one row more than they return
+    budget += rows // SELECTIN_CHUNK_SIZE
+    assert status < 400
+    assert queries.count <= budget, '\n'.join(queries.statements)
+
+
+def test_narrow_fieldset_selects_only_its_columns():
+    # In response order, which follows fieldsets.ALL_FIELDS
+    narrow = ('transaction_id', 'amount', 'transaction_status', 'transaction_date')
+    with count_queries() as queries:
+        status, result = call_api('GET', f"/transactions?fields={','.join(narrow)}&limit=20")
+    assert status == 200
+    assert all(tuple(t) == narrow for t in result['data'])
+    select = queries.statements[-1]
+    assert 'JOIN' not in select
+    assert 'raw_data' not in select and 'counter_party' not in select
+
+
+def test_full_listing_does_not_load_raw_data():
+    with count_queries() as queries:
+        call_api('GET', '/transactions?limit=20')
+    assert not any('raw_data' in statement for statement in queries.statements)
+
+
+def test_unknown_field_is_a_400():
+    for path in ('/transactions?fields=amount,nope', '/transactions/5?fields=nope'):
+        status, _ = call_api('GET', path)
+        assert status == 400, path
+
+
+def test_fields_only_applies_to_transactions():
+    status, result = call_api('GET', '/transactions/summary?group_by=status&fields=nope')
+    assert status == 200
+    assert result['group_by'] == ['status']
+
+
+@pytest.mark.parametrize('body', POST_BODIES, ids=[body['external_ref'] for body in POST_BODIES])
+def test_post_response_matches_the_stored_transaction(body):
+    status, created = call_api('POST', '/transactions', body)
+    _, stored = call_api('GET', f"/transactions/{created['data']['transaction_id']}")
+    assert status == 201
+    assert created['data'] == stored['data']
+
+
+def test_cached_auth_is_query_free():
+    with count_queries() as queries:
+        assert verify_credentials('admin', 'password123')
+        assert not verify_credentials('admin', 'wrong')
+    assert queries.count == 0
+
+
+def test_password_change_invalidates_the_cache():
+    session = db_config.get_session()
+    admin = session.query(User).filter_by(username='admin').one()
+    try:
+        admin.password_text = 'rotated'
+        session.commit()
+        assert verify_credentials('admin', 'rotated')
+        assert not verify_credentials('admin', 'password123')
+    finally:
+        admin.password_text = 'password123'
+        session.commit()
+        session.close()
+    assert verify_credentials('admin', 'password123')
@@ -0,0 +1,43 @@
+"""Reference data generations: rows read before a change are never kept after it"""
+
+from sqlalchemy import event
+
+import db_config
+from models import TransactionCategory
+from reference_data import reference_data
+
+
+def test_load_racing_a_change_is_not_kept(api_database):
+    reference_data.invalidate()
+
+    def categories_changed(*args):
+        # Another thread changes a category while this load's queries run
+        reference_data.invalidate()
+
+    event.listen(api_database, 'after_cursor_execute', categories_changed)
+    try:
+        assert reference_data.get().category('TRANSFER') is not None
+    finally:
+        event.remove(api_database, 'after_cursor_execute', categories_changed)
+    assert reference_data._data is None
+
+    data = reference_data.get()
+    assert reference_data.get() is data
+
+
+def test_commit_drops_rows_loaded_after_the_flush(api_database):
+    session = db_config.get_session()
+    category = TransactionCategory(category_name='Reference test', category_code='REFERENCE_TEST')
+    try:
+        session.add(category)
+        session.flush()
+        # A get() between flush and commit reads the rows as they were
+        # before this transaction
+        assert 'REFERENCE_TEST' not in reference_data.get().categories
+        session.commit()
+        assert 'REFERENCE_TEST' in reference_data.get().categories
+    finally:
+        session.delete(category)
+        session.commit()
+        session.close()
+    assert 'REFERENCE_TEST' not in reference_data.get().categories
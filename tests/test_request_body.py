@@ -0,0 +1,37 @@
+"""Malformed Content-Length headers get a 400 on a live threaded server"""
+
+import socket
+
+import pytest
+
+from check_query_counts import AUTH_HEADER
+
+
+def send_raw(port, method, path, content_length, body=b'{}'):
+    """Send a request with the given Content-Length header, return the response bytes"""
+    with socket.create_connection(('localhost', port), timeout=5) as connection:
+        connection.sendall(
+            f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+            f"Authorization: {AUTH_HEADER}\r\n"
+            f"Content-Length: {content_length}\r\n\r\n".encode() + body
+        )
+        response = b''
+        while chunk := connection.recv(65536):
+            response += chunk
+    return response
+
+
+@pytest.mark.parametrize('content_length', ['abc', '1x', '-1', '1_0'])
+@pytest.mark.parametrize('path', ['/transactions', '/transactions/batch', '/transactions/1'])
+def test_invalid_content_length_is_a_400(api_server, path, content_length):
+    method = 'PUT' if path == '/transactions/1' else 'POST'
+    response = send_raw(api_server, method, path, content_length)
+    status_line, _, rest = response.partition(b'\r\n')
+    assert status_line.split()[1] == b'400'
+    assert b'Content-Length must be a non-negative integer' in rest
+
+
+def test_missing_body_is_a_400(api_server):
+    response = send_raw(api_server, 'POST', '/transactions', '0', body=b'')
+    assert response.split()[1] == b'400'
+    assert b'Request body required' in response
@@ -0,0 +1,49 @@
+"""GET /transactions?stream=1 from the threaded server: chunked over HTTP/1.1"""
+
+import http.client
+import json
+import socket
+
+from check_query_counts import AUTH_HEADER, call_api
+from conftest import API_TRANSACTIONS
+
+
+def test_stream_is_chunked_over_http_1_1(api_server):
+    connection = http.client.HTTPConnection('localhost', api_server, timeout=30)
+    connection.request('GET', '/transactions?stream=1', headers={'Authorization': AUTH_HEADER})
+    response = connection.getresponse()
+    body = json.loads(response.read())
+    connection.close()
+
+    assert response.status == 200
+    assert response.version == 11
+    assert response.getheader('Transfer-Encoding') == 'chunked'
+    assert response.getheader('Content-Length') is None
+    assert body['count'] == len(body['data']) == API_TRANSACTIONS
+    _, buffered = call_api('GET', '/transactions')
+    assert body['data'] == buffered['data']
+
+
+def test_stream_to_http_1_0_client_ends_at_close(api_server):
+    with socket.create_connection(('localhost', api_server), timeout=30) as connection:
+        connection.sendall(
+            f"GET /transactions?stream=1 HTTP/1.0\r\nAuthorization: {AUTH_HEADER}\r\n\r\n".encode()
+        )
+        response = b''
+        while chunk := connection.recv(65536):
+            response += chunk
+    head, _, body = response.partition(b'\r\n\r\n')
+    assert head.startswith(b'HTTP/1.1 200')
+    assert b'Transfer-Encoding' not in head
+    assert json.loads(body)['count'] == API_TRANSACTIONS
+
+
+def test_other_responses_close_the_connection(api_server):
+    connection = http.client.HTTPConnection('localhost', api_server, timeout=30)
+    connection.request('GET', '/transactions/1', headers={'Authorization': AUTH_HEADER})
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    assert response.status == 200
+    assert response.getheader('Connection') == 'close'
+    assert response.getheader('Content-Length') is not None
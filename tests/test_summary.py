@@ -0,0 +1,28 @@
+"""group_by=week groups by ISO 8601 week, computed in SQLite"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, literal, select
+
+from summary import iso_week
+from check_query_counts import call_api
+
+
+@pytest.mark.parametrize('year', range(2019, 2031))
+def test_iso_week_matches_python_around_new_year(year):
+    days = [datetime(year, 12, 20, 23, 59) + timedelta(days=offset) for offset in range(20)]
+    with create_engine('sqlite://').connect() as connection:
+        weeks = [connection.execute(select(iso_week(literal(day)))).scalar() for day in days]
+    assert weeks == [day.strftime('%G-W%V') for day in days]
+
+
+def test_summary_week_is_iso(api_database):
+    status, created = call_api('POST', '/transactions', {
+        'external_ref': 'WEEK-1', 'amount': 100, 'raw_data': 'ISO week check',
+        'transaction_date': '2024-12-30T10:00:00',
+    })
+    assert status == 201
+    status, result = call_api('GET', '/transactions/summary?group_by=week&from=2024-12-30&to=2024-12-31')
+    assert status == 200
+    assert [group['week'] for group in result['data']] == ['2025-W01']